@@ -2,4 +2,112 @@ import os
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
+# Point at any OpenAI-compatible server (e.g. scripts/fake_openai_server.py)
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL")
+
 MODEL_NAME = "gpt-4.1-mini"
+
+# AI call limits: concurrent requests, per-call timeout and retries
+AI_MAX_CONCURRENCY = int(os.getenv("AI_MAX_CONCURRENCY", 8))
+AI_TIMEOUT_SECONDS = float(os.getenv("AI_TIMEOUT_SECONDS", 30))
+AI_MAX_RETRIES = int(os.getenv("AI_MAX_RETRIES", 2))
+AI_RETRY_BACKOFF_SECONDS = float(os.getenv("AI_RETRY_BACKOFF_SECONDS", 0.5))
+
+# Bytes of raw CSV handed to the parser at a time during upload
+CSV_BLOCK_SIZE = int(os.getenv("CSV_BLOCK_SIZE", 8 * 1024 * 1024))
+
+# Directory holding persisted datasets (Arrow IPC files)
+DATA_DIR = os.getenv("DATA_DIR", "data")
+
+# Directory for persistent caches (SQLite)
+CACHE_DIR = os.getenv("CACHE_DIR", os.path.join(DATA_DIR, "cache"))
+
+# Ingest: string columns with at most this share of distinct values
+# (relative to non-null rows) are stored as category
+CATEGORY_MAX_UNIQUE_RATIO = float(os.getenv("CATEGORY_MAX_UNIQUE_RATIO", 0.5))
+
+# Memory budget for datasets kept resident in RAM; the rest stay on disk
+DATASET_MEMORY_BUDGET = int(os.getenv("DATASET_MEMORY_BUDGET_MB", 1024)) * 1024 * 1024
+
+# Versions kept per dataset; older ones are dropped along with any
+# column files no remaining version references
+DATASET_HISTORY_MAX_VERSIONS = int(os.getenv("DATASET_HISTORY_MAX_VERSIONS", 20))
+
+# Render budget for /plot: above this many rows, line/scatter/histogram
+# data is decimated or binned server-side
+PLOT_MAX_POINTS = int(os.getenv("PLOT_MAX_POINTS", 5000))
+
+# NL -> query translation cache
+QUERY_CACHE_MAX_ENTRIES = int(os.getenv("QUERY_CACHE_MAX_ENTRIES", 10000))
+QUERY_CACHE_TTL_SECONDS = float(os.getenv("QUERY_CACHE_TTL_SECONDS", 7 * 24 * 3600))
+
+# Overview/chart insight cache (content-addressed by context + model)
+INSIGHT_CACHE_MAX_ENTRIES = int(os.getenv("INSIGHT_CACHE_MAX_ENTRIES", 5000))
+
+# Compiled structured-query plans kept in memory
+QUERY_PLAN_CACHE_SIZE = int(os.getenv("QUERY_PLAN_CACHE_SIZE", 1024))
+
+# /rows: largest page served, and sort indexes (one per dataset
+# version, column and direction) kept in memory
+ROWS_MAX_LIMIT = int(os.getenv("ROWS_MAX_LIMIT", 1000))
+ROW_INDEX_CACHE_SIZE = int(os.getenv("ROW_INDEX_CACHE_SIZE", 16))
+
+# Rows per record batch when streaming exports
+EXPORT_BATCH_ROWS = int(os.getenv("EXPORT_BATCH_ROWS", 65536))
+
+# Filter indexes: columns with at least this many rows get a sorted
+# index once filtered twice; it answers a condition when at most this
+# share of rows match (above that a scan is cheaper). Indexes kept, by
+# count and by index size:
+FILTER_INDEX_MIN_ROWS = int(os.getenv("FILTER_INDEX_MIN_ROWS", 100_000))
+FILTER_INDEX_MAX_SELECTIVITY = float(os.getenv("FILTER_INDEX_MAX_SELECTIVITY", 0.1))
+FILTER_INDEX_CACHE_SIZE = int(os.getenv("FILTER_INDEX_CACHE_SIZE", 64))
+FILTER_INDEX_MAX_BYTES = int(os.getenv("FILTER_INDEX_MAX_MB", 256)) * 1024 * 1024
+
+# Approximate mode: rows in the uniform sample behind ungrouped
+# estimates, rows drawn per group for grouped ones, confidence level of
+# the reported bounds, and samples/sketches kept in memory
+APPROX_SAMPLE_ROWS = int(os.getenv("APPROX_SAMPLE_ROWS", 100_000))
+APPROX_STRATUM_ROWS = int(os.getenv("APPROX_STRATUM_ROWS", 2_000))
+APPROX_CONFIDENCE = float(os.getenv("APPROX_CONFIDENCE", 0.95))
+APPROX_CACHE_SIZE = int(os.getenv("APPROX_CACHE_SIZE", 32))
+
+# Parallel groupby: threads used, and the row count from which a
+# groupby is split across them
+GROUPBY_WORKERS = int(os.getenv("GROUPBY_WORKERS", os.cpu_count() or 1))
+GROUPBY_PARALLEL_MIN_ROWS = int(os.getenv("GROUPBY_PARALLEL_MIN_ROWS", 1_000_000))
+
+# Job pool for CPU-heavy request work: worker threads, jobs allowed to be
+# queued or running before requests are turned away (503), default
+# per-job timeout and finished jobs kept for /jobs/{job_id}
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", min(32, (os.cpu_count() or 1) + 4)))
+JOB_QUEUE_MAX = int(os.getenv("JOB_QUEUE_MAX", 64))
+JOB_TIMEOUT_SECONDS = float(os.getenv("JOB_TIMEOUT_SECONDS", 120))
+JOB_HISTORY_SIZE = int(os.getenv("JOB_HISTORY_SIZE", 1000))
+
+# Rendered /plot responses kept in memory, bounded by their encoded
+# size (0 disables the cache)
+FIGURE_CACHE_MAX_BYTES = int(os.getenv("FIGURE_CACHE_MAX_MB", 128)) * 1024 * 1024
+
+# Correlation heatmaps: rows sampled above this count (0 uses every
+# row), rows per matrix-product chunk, matrices kept in memory, and the
+# widest heatmap that still gets value labels
+CORRELATION_SAMPLE_ROWS = int(os.getenv("CORRELATION_SAMPLE_ROWS", 100_000))
+CORRELATION_CHUNK_ROWS = int(os.getenv("CORRELATION_CHUNK_ROWS", 4096))
+CORRELATION_CACHE_SIZE = int(os.getenv("CORRELATION_CACHE_SIZE", 32))
+CORRELATION_TEXT_MAX_COLUMNS = int(os.getenv("CORRELATION_TEXT_MAX_COLUMNS", 20))
+
+# Static chart images (PNG/SVG): drawing processes (0 draws in the
+# request's job thread) and the in-memory image cache size
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", min(4, os.cpu_count() or 1)))
+IMAGE_CACHE_MAX_BYTES = int(os.getenv("IMAGE_CACHE_MAX_MB", 64)) * 1024 * 1024
+
+# Readiness probe (GET /ready): what is loaded before the instance
+# reports ready, comma-separated: plotly, images (drawing processes and
+# matplotlib), ai (OpenAI SDK and client), datasets (latest upload and
+# its stats)
+READY_WARMUP = [
+    step.strip()
+    for step in os.getenv("READY_WARMUP", "plotly,images,ai").split(",")
+    if step.strip()
+]
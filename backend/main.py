@@ -1,32 +1,183 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException, Query
+from fastapi import FastAPI, UploadFile, File, Header, HTTPException, Query
 import pandas as pd
-import numpy as np
-from io import StringIO
 
 # AI + Query + Plot services
 from services.ai_service import (
     build_ai_context,
     generate_insights,
     generate_query,
-    generate_chart_insights
+    schedule_chart_insights,
+    chart_insights_status,
+    insight_cache,
+    query_cache
+)
+from fastapi.responses import Response, StreamingResponse
+from core.config import CORRELATION_SAMPLE_ROWS
+from services.query_service import execute_query, plan_cache_info, query_columns
+from services.plot_service import (
+    build_plot,
+    plot_columns,
+    prepare_plot_data,
+    build_chart_context
+)
+from services.file_service import read_csv_stream
+from services.dtype_service import optimize_dtypes
+from services.serialize_service import FastJSONResponse, frame_records
+from services.index_service import filter_index_info
+from services.approx_service import approx_info
+from services.correlation_service import (
+    cluster_order,
+    correlation_cache_info,
+    dataset_correlation,
+    top_pairs
+)
+from services.image_service import (
+    IMAGE_FORMATS,
+    image_cache_info,
+    prepare_image,
+    render_image
+)
+from services.warmup_service import start_warmup, warmup_status
+from services.figure_service import (
+    etag_matches,
+    figure_body,
+    figure_cache_info,
+    figure_key,
+    get_figure,
+    record_not_modified,
+    store_figure
+)
+from services.job_service import (
+    JobQueueFull,
+    JobTimeout,
+    job_info,
+    job_status,
+    run_job,
+    submit_job
+)
+from services.rows_service import get_rows, row_index_info
+from services.transport_service import (
+    ARROW_STREAM,
+    COLUMNAR_JSON,
+    RECORDS_JSON,
+    arrow_stream,
+    frame_columns,
+    frame_table,
+    negotiate
+)
+from services.export_service import (
+    export_filename,
+    export_media_type,
+    stream_export,
+    validate_export
+)
+from services.dataset_store import (
+    dataset_columns,
+    diff_versions,
+    open_dataset_table,
+    valid_dataset_id,
+    version_history
+)
+from services.dataset_registry import (
+    create_dataset,
+    update_dataset,
+    rollback_dataset,
+    get_dataset,
+    dataset_snapshot,
+    has_dataset,
+    dataset_version,
+    latest_dataset_id,
+    list_datasets,
+    registry_stats,
+    VersionConflict
+)
+from services.stats_service import (
+    cache_stats,
+    compute_dataset_stats,
+    get_dataset_stats,
+    overview_stats,
+    stats_cache_info,
+    update_dataset_stats
 )
-from fastapi.responses import FileResponse
-from services.query_service import execute_query
-from services.plot_service import generate_plot
 
 app = FastAPI()
 
-stored_df: pd.DataFrame | None = None
+# Column selections and shallow transforms share buffers with the stored
+# frames instead of copying them (the default from pandas 3 onwards)
+pd.set_option("mode.copy_on_write", True)
 
 
 # =====================================================
 # Utilities
 # =====================================================
 
-def clean_dataframe(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.replace([np.inf, -np.inf], None)
-    df = df.where(pd.notnull(df), None)
-    return df
+def resolve_dataset_id(dataset_id: str | None) -> str:
+    # Clients that predate dataset IDs get the most recent upload
+    dataset_id = dataset_id or latest_dataset_id()
+
+    if dataset_id is None:
+        raise HTTPException(status_code=400, detail="No dataset uploaded")
+
+    # IDs become directory names: malformed ones are never looked up
+    if not valid_dataset_id(dataset_id) or not has_dataset(dataset_id):
+        raise HTTPException(status_code=404, detail="Dataset not found")
+
+    return dataset_id
+
+
+def require_dataset(dataset_id: str | None, columns: list | None = None) -> pd.DataFrame:
+    return get_dataset(resolve_dataset_id(dataset_id), columns)
+
+
+def require_stats(dataset_id: str) -> dict:
+    version = dataset_version(dataset_id)
+
+    # Stats are cached per version: the frame must be that version
+    return get_dataset_stats(
+        dataset_id,
+        version,
+        lambda: get_dataset(dataset_id, version=version)
+    )
+
+
+def require_media_type(accept: str | None, offered: list) -> str:
+    """Response media type for an Accept header; 406 if none is acceptable."""
+    media_type = negotiate(accept, offered)
+
+    if media_type is None:
+        raise HTTPException(
+            status_code=406,
+            detail=f"Acceptable formats: {', '.join(offered)}"
+        )
+
+    return media_type
+
+
+def _queue_full(e: JobQueueFull) -> HTTPException:
+    return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+
+
+async def run_in_job(kind: str, fn, finish=None, **options):
+    """Run ``fn`` on the job pool and return its result."""
+    try:
+        return await run_job(kind, fn, finish, **options)
+    except JobQueueFull as e:
+        raise _queue_full(e)
+    except JobTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
+
+
+def start_background_job(kind: str, fn, finish=None, **options) -> FastJSONResponse:
+    """Queue ``fn`` and answer 202 with a job ID to poll at /jobs/{job_id}."""
+    try:
+        job = submit_job(kind, fn, finish, **options)
+    except JobQueueFull as e:
+        raise _queue_full(e)
+
+    return FastJSONResponse(
+        {"job_id": job["job_id"], "status": job["status"]},
+        status_code=202
+    )
 
 
 # =====================================================
@@ -35,22 +186,29 @@ def clean_dataframe(df: pd.DataFrame) -> pd.DataFrame:
 
 @app.post("/upload")
 async def upload_csv(file: UploadFile = File(...)):
-    global stored_df
 
-    try:
-        contents = await file.read()
-        df = pd.read_csv(StringIO(contents.decode("utf-8")))
-    except Exception:
-        raise HTTPException(status_code=400, detail="Invalid CSV file")
+    def ingest():
+        try:
+            df, ingest_stats = read_csv_stream(file.file)
+        except Exception:
+            raise HTTPException(status_code=400, detail="Invalid CSV file")
 
-    df = clean_dataframe(df)
-    stored_df = df
+        df, memory_report = optimize_dtypes(df)
+        dataset_id = create_dataset(df)
+        cache_stats(dataset_id, 1, compute_dataset_stats(df))
 
-    return {
-        "columns": list(df.columns),
-        "preview": df.head(5).to_dict(orient="records"),
-        "row_count": len(df)
-    }
+        return {
+            "dataset_id": dataset_id,
+            "columns": list(df.columns),
+            "preview": frame_records(df.head(5)),
+            "row_count": len(df),
+            "ingest": ingest_stats,
+            "memory": memory_report
+        }
+
+    # Parsed off the event loop. No timeout: the dataset would still be
+    # created after the client was told it failed.
+    return FastJSONResponse(await run_in_job("upload", ingest, timeout=None))
 
 
 # =====================================================
@@ -58,18 +216,10 @@ async def upload_csv(file: UploadFile = File(...)):
 # =====================================================
 
 @app.get("/stats")
-def get_stats():
-    if stored_df is None:
-        raise HTTPException(status_code=400, detail="No dataset uploaded")
+async def get_stats(dataset_id: str | None = Query(None)):
+    dataset_id = resolve_dataset_id(dataset_id)
 
-    return {
-        "null_counts": stored_df.isnull().sum().to_dict(),
-        "dtypes": stored_df.dtypes.astype(str).to_dict(),
-        "shape": {
-            "rows": stored_df.shape[0],
-            "columns": stored_df.shape[1]
-        }
-    }
+    return await run_in_job("stats", lambda: overview_stats(require_stats(dataset_id)))
 
 
 # =====================================================
@@ -77,24 +227,24 @@ def get_stats():
 # =====================================================
 
 @app.get("/column-stats")
-def column_stats(column: str = Query(...)):
-    if stored_df is None:
-        raise HTTPException(status_code=400, detail="No dataset uploaded")
+async def column_stats(column: str = Query(...), dataset_id: str | None = Query(None)):
+    dataset_id = resolve_dataset_id(dataset_id)
+    stats = await run_in_job("stats", lambda: require_stats(dataset_id))
 
-    if column not in stored_df.columns:
+    if column not in stats["columns"]:
         raise HTTPException(status_code=404, detail="Column not found")
 
-    series = stored_df[column]
+    summary = stats["columns"][column]["numeric"]
 
-    if not pd.api.types.is_numeric_dtype(series):
+    if summary is None:
         return {"message": "Selected column is not numeric"}
 
     return {
-        "mean": float(series.mean()),
-        "median": float(series.median()),
-        "std": float(series.std()),
-        "min": float(series.min()),
-        "max": float(series.max())
+        "mean": summary["mean"],
+        "median": summary["50%"],
+        "std": summary["std"],
+        "min": summary["min"],
+        "max": summary["max"]
     }
 
 
@@ -103,14 +253,19 @@ def column_stats(column: str = Query(...)):
 # =====================================================
 
 @app.get("/ai/overview-insights")
-def ai_overview_insights():
-    if stored_df is None:
-        raise HTTPException(status_code=400, detail="No dataset uploaded")
+async def ai_overview_insights(dataset_id: str | None = Query(None)):
+    dataset_id = resolve_dataset_id(dataset_id)
+
+    def build_context():
+        df, version = dataset_snapshot(dataset_id)
+        return build_ai_context(df, get_dataset_stats(dataset_id, version, lambda: df))
 
     try:
-        context = build_ai_context(stored_df)
-        insights = generate_insights(context)
+        context = await run_in_job("overview", build_context)
+        insights = await generate_insights(context)
         return {"insights": insights}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"AI generation failed: {str(e)}")
 
@@ -120,98 +275,326 @@ def ai_overview_insights():
 # =====================================================
 
 @app.post("/ai/query")
-def ai_query(payload: dict):
-    if stored_df is None:
-        raise HTTPException(status_code=400, detail="No dataset uploaded")
+async def ai_query(payload: dict, dataset_id: str | None = Query(None)):
+    dataset_id = resolve_dataset_id(dataset_id)
 
     if "question" not in payload:
         raise HTTPException(status_code=400, detail="Missing question")
 
     user_question = payload["question"]
 
-    query_json = generate_query(
+    query_json = await generate_query(
         user_question,
-        list(stored_df.columns)
+        dataset_columns(dataset_id)
     )
 
     if "clarification_needed" in query_json:
         return query_json
 
+    # Opt-in: estimate from samples / sketches, with error bounds
+    approx_key = None
+    if payload.get("approximate"):
+        approx_key = (dataset_id, dataset_version(dataset_id))
+
+    def run_query():
+        version = approx_key[1] if approx_key else None
+        df = get_dataset(dataset_id, query_columns(query_json), version)
+        return execute_query(df, query_json, approx_key)
+
     try:
-        result = execute_query(stored_df, query_json)
-        return {
+        result = await run_in_job("query", run_query)
+
+        if approx_key is not None:
+            return FastJSONResponse({"structured_query": query_json, **result})
+
+        return FastJSONResponse({
             "structured_query": query_json,
             "answer": result
-        }
+        })
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
 # =====================================================
-# Plot Generation
+# Row browsing
 # =====================================================
 
-@app.post("/plot")
-def create_plot(config: dict):
-    if stored_df is None:
-        raise HTTPException(status_code=400, detail="No dataset uploaded")
+@app.get("/rows")
+def browse_rows(
+    dataset_id: str | None = Query(None),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=0),
+    sort: str | None = Query(None),
+    descending: bool = Query(False),
+    columns: list[str] | None = Query(None),
+    cursor: str | None = Query(None),
+    accept: str | None = Header(None)
+):
+    """A page of rows: records (default), columnar JSON or an Arrow stream."""
+    media_type = require_media_type(accept, [RECORDS_JSON, COLUMNAR_JSON, ARROW_STREAM])
+
+    dataset_id = resolve_dataset_id(dataset_id)
+
+    # The sort index is cached per version: read frame and version together
+    needed = None if columns is None else columns + ([sort] if sort else [])
+    df, version = dataset_snapshot(dataset_id, needed)
 
     try:
-        # 1. Generate plot
-        fig_json = generate_plot(stored_df, config)
-
-        # 2. Prepare data for insight generation
-        working_df = stored_df.copy()
+        page = get_rows(
+            df,
+            (dataset_id, version),
+            offset=offset,
+            limit=limit,
+            sort=sort,
+            descending=descending,
+            columns=columns,
+            cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-        filters = config.get("filters", [])
-        if filters:
-            from services.plot_service import apply_filters
-            working_df = apply_filters(working_df, filters)
+    frame = page.pop("page")
+    info = {"dataset_id": dataset_id, "version": version, **page}
+
+    # Page details (cursor, row ids, ...) travel in the schema metadata
+    if media_type == ARROW_STREAM:
+        return StreamingResponse(
+            arrow_stream(frame_table(frame, info)),
+            media_type=ARROW_STREAM
+        )
+
+    rows = frame_columns(frame) if media_type == COLUMNAR_JSON else frame_records(frame)
+
+    return FastJSONResponse({**info, "rows": rows}, media_type=media_type)
+
+
+@app.get("/datasets/{dataset_id}/data")
+def get_dataset_data(
+    dataset_id: str,
+    columns: list[str] | None = Query(None),
+    offset: int = Query(0, ge=0),
+    limit: int | None = Query(None, ge=0),
+    accept: str | None = Header(None)
+):
+    """
+    Column data for table and chart views: columnar JSON (default) or
+    an Arrow IPC stream read straight from the stored files.
+    """
+    media_type = require_media_type(accept, [COLUMNAR_JSON, ARROW_STREAM, RECORDS_JSON])
+
+    dataset_id = resolve_dataset_id(dataset_id)
+    version = dataset_version(dataset_id)
+
+    available = dataset_columns(dataset_id, version)
+    for col in columns or []:
+        if col not in available:
+            raise HTTPException(status_code=400, detail=f"Column '{col}' not found")
+
+    columns = list(dict.fromkeys(columns)) if columns else available
+
+    if media_type == ARROW_STREAM:
+        table = open_dataset_table(dataset_id, version).select(columns)
+
+        return StreamingResponse(
+            arrow_stream(table.slice(offset, limit)),
+            media_type=ARROW_STREAM,
+            headers={
+                "X-Dataset-Version": str(version),
+                "X-Total-Rows": str(table.num_rows)
+            }
+        )
+
+    df = get_dataset(dataset_id, columns, version)
+    stop = None if limit is None else offset + limit
+
+    # "application/json" gets the same columnar body
+    return FastJSONResponse(
+        {
+            "dataset_id": dataset_id,
+            "version": version,
+            "offset": offset,
+            "total_rows": len(df),
+            "columns": columns,
+            "data": frame_columns(df.iloc[offset:stop])
+        },
+        media_type=media_type
+    )
 
-        x = config.get("x")
-        y = config.get("y")
-        aggregation = config.get("aggregation")
 
-        if aggregation and x and y:
-            from services.plot_service import aggregate_data
+# =====================================================
+# Plot Generation
+# =====================================================
 
-            plot_df = aggregate_data(working_df, x, y, aggregation)
-        else:
-            plot_df = working_df[[x, y]].dropna()
+@app.post("/plot")
+async def create_plot(
+    config: dict,
+    dataset_id: str | None = Query(None),
+    background: bool = Query(False),
+    if_none_match: str | None = Header(None)
+):
+    dataset_id = resolve_dataset_id(dataset_id)
+    version = dataset_version(dataset_id)
+    dataset_key = (dataset_id, version)
+    cache_key = figure_key(dataset_id, version, config)
+
+    def send(figure):
+        if etag_matches(if_none_match, figure.etag):
+            record_not_modified()
+            return Response(status_code=304, headers={"ETag": figure.etag})
+
+        # 4. Generate AI insights in the background; the chart goes out now
+        insights_id = schedule_chart_insights(figure.chart_context)
+
+        return Response(
+            figure_body(figure, insights_id),
+            media_type="application/json",
+            headers={"ETag": figure.etag}
+        )
+
+    # Same dataset version and chart config: already rendered
+    cached = get_figure(cache_key)
+    if cached is not None:
+        return send(cached)
+
+    def render_chart():
+        df = get_dataset(dataset_id, plot_columns(config), version)
+
+        # 1. Filter + aggregate once; chart and insights share the result
+        plot_df = prepare_plot_data(df, config, dataset_key)
+
+        # 2. Generate plot
+        fig_json, render = build_plot(plot_df, config)
 
         # 3. Build compressed insight context (efficient!)
-        chart_context = {
-            "chart_type": config["chart_type"],
-            "x": x,
-            "y": y,
-            "aggregation": aggregation,
-            "row_count": len(plot_df),
-            "y_stats": {
-                "min": float(plot_df[y].min()) if y else None,
-                "max": float(plot_df[y].max()) if y else None,
-                "mean": float(plot_df[y].mean()) if y else None
-            }
-        }
-
-        # 4. Generate AI insights automatically
-        insights = generate_chart_insights(chart_context)
+        chart_context = build_chart_context(plot_df, config)
 
-        return {
+        response = {
             "plot": fig_json,
-            "insights": insights
+            "render": render,
+            "approximate": plot_df.attrs.get("approximate")
         }
 
+        return response, store_figure(cache_key, response, chart_context)
+
+    def respond(rendered):
+        response, figure = rendered
+        return {**response, "insights_id": schedule_chart_insights(figure.chart_context)}
+
+    if background:
+        return start_background_job("plot", render_chart, respond)
+
+    try:
+        _, figure = await run_in_job("plot", render_chart)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return send(figure)
+
+
+@app.post("/plot/image")
+async def create_plot_image(
+    config: dict,
+    dataset_id: str | None = Query(None),
+    fmt: str = Query("png", alias="format"),
+    width: int = Query(640, ge=16, le=4096),
+    height: int = Query(480, ge=16, le=4096),
+    dpi: int = Query(100, ge=10, le=600),
+    if_none_match: str | None = Header(None)
+):
+    """Static PNG / SVG of a /plot config (reports, thumbnails)."""
+    if fmt not in IMAGE_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported image format: {fmt}")
+
+    dataset_id = resolve_dataset_id(dataset_id)
+    dataset_key = (dataset_id, dataset_version(dataset_id))
+
+    def draw():
+        df = get_dataset(dataset_id, plot_columns(config), dataset_key[1])
+        spec, digest, _ = prepare_image(df, config, fmt, width, height, dpi, dataset_key)
+        etag = f'"{digest}"'
+
+        # Same picture as the client already has: nothing to draw
+        if etag_matches(if_none_match, etag):
+            return None, etag
+
+        return render_image(spec, digest), etag
+
+    try:
+        image, etag = await run_in_job("image", draw)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+    if image is None:
+        return Response(status_code=304, headers={"ETag": etag})
 
+    return Response(image, media_type=IMAGE_FORMATS[fmt], headers={"ETag": etag})
+
+
+# =====================================================
+# Correlations
+# =====================================================
+
+@app.get("/correlations")
+async def get_correlations(
+    dataset_id: str | None = Query(None),
+    method: str = Query("pearson"),
+    top_k: int = Query(20, ge=0),
+    cluster: bool = Query(False),
+    sample_rows: int = Query(CORRELATION_SAMPLE_ROWS, ge=0)
+):
+    """Most correlated column pairs; ``cluster`` also returns a column order."""
+    dataset_id = resolve_dataset_id(dataset_id)
+    version = dataset_version(dataset_id)
+
+    def correlate_columns():
+        correlation = dataset_correlation(
+            (dataset_id, version),
+            lambda: get_dataset(dataset_id, version=version),
+            method,
+            sample_rows
+        )
+
+        columns = correlation.columns
+        if cluster:
+            columns = [columns[i] for i in cluster_order(correlation.matrix)]
+
+        return {
+            "dataset_id": dataset_id,
+            "version": version,
+            "method": correlation.method,
+            "rows": correlation.rows,
+            "total_rows": correlation.total_rows,
+            "columns": columns,
+            "pairs": top_pairs(correlation.columns, correlation.matrix, top_k)
+        }
+
+    try:
+        return FastJSONResponse(await run_in_job("correlation", correlate_columns))
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 # =====================================================
 # NEW — AI Chart Insights
 # =====================================================
 
+@app.get("/ai/chart-insights/{insights_id}")
+async def chart_insights(insights_id: str, wait: float = Query(0.0)):
+    """Insights for a /plot call; ``wait`` long-polls up to that many seconds."""
+    status = await chart_insights_status(insights_id, wait)
 
+    if status is None:
+        raise HTTPException(status_code=404, detail="Insights not found")
+
+    return status
 
 
 # =====================================================
@@ -219,48 +602,188 @@ def create_plot(config: dict):
 # =====================================================
 
 @app.post("/transform")
-def transform_data(config: dict):
-    global stored_df
-
-    if stored_df is None:
-        raise HTTPException(status_code=400, detail="No dataset uploaded")
-
-    try:
+async def transform_data(
+    config: dict,
+    dataset_id: str | None = Query(None),
+    background: bool = Query(False)
+):
+    dataset_id = resolve_dataset_id(dataset_id)
+
+    def run_transform():
         from services.transform_service import transform_dataframe
 
-        stored_df = transform_dataframe(stored_df, config)
+        # Frame and version read together, so the new version's parent
+        # and shared columns are the ones actually transformed
+        df, parent_version = dataset_snapshot(dataset_id)
+
+        new_df = transform_dataframe(df, config)
+
+        # Columns the transform left untouched keep their cached stats
+        # and are shared with the parent version instead of rewritten
+        parent_stats = get_dataset_stats(dataset_id, parent_version, lambda: df)
+        stats = update_dataset_stats(df, parent_stats, new_df)
+
+        operations = config.get("row_operations", []) + config.get("column_operations", [])
+
+        # A transform committed on the same parent meanwhile wins; this
+        # one is rejected rather than silently dropping it
+        try:
+            version = update_dataset(
+                dataset_id,
+                new_df,
+                parent_df=df,
+                parent_version=parent_version,
+                label=", ".join(op["type"] for op in operations)
+            )
+        except VersionConflict as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        df = new_df
+        cache_stats(dataset_id, version, stats)
 
         return {
-            "columns": list(stored_df.columns),
-            "row_count": len(stored_df),
-            "preview": stored_df.head(5).to_dict(orient="records")
+            "dataset_id": dataset_id,
+            "version": version,
+            "columns": list(df.columns),
+            "row_count": len(df),
+            "preview": frame_records(df.head(5))
         }
 
+    # No timeout, like uploads: a timed-out transform would still commit
+    # its version after the client was told it failed
+    if background:
+        return start_background_job("transform", run_transform, timeout=None)
+
+    try:
+        return FastJSONResponse(await run_in_job("transform", run_transform, timeout=None))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.post("/transform/explain")
+def explain_transform(config: dict):
+    """Plan a transform would run, before and after optimization."""
+    try:
+        from services.transform_service import explain_plan
+
+        return explain_plan(config)
+
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
 # =====================================================
-# EXPORT CSV
+# EXPORT (streamed)
 # =====================================================
 
-from fastapi.responses import FileResponse
+@app.get("/export/{fmt}")
+def export_dataset(
+    fmt: str,
+    dataset_id: str | None = Query(None),
+    compression: str | None = Query(None)
+):
+    dataset_id = resolve_dataset_id(dataset_id)
+
+    try:
+        validate_export(fmt, compression)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    filename = export_filename("modified_dataset", fmt, compression)
+
+    return StreamingResponse(
+        stream_export(dataset_id, fmt, compression),
+        media_type=export_media_type(fmt, compression),
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
 
 
-@app.get("/export/csv")
-def export_csv():
-    global stored_df
+# =====================================================
+# Datasets & Metrics
+# =====================================================
 
-    if stored_df is None:
-        raise HTTPException(status_code=400, detail="No dataset available")
+@app.get("/datasets")
+def get_datasets():
+    return {"datasets": list_datasets()}
 
-    file_path = "exported_dataset.csv"
 
-    # Save current dataframe (after transforms if any)
-    stored_df.to_csv(file_path, index=False)
+@app.get("/datasets/{dataset_id}/versions")
+def get_dataset_versions(dataset_id: str):
+    return {
+        "dataset_id": dataset_id,
+        "versions": version_history(resolve_dataset_id(dataset_id))
+    }
 
-    return FileResponse(
-        path=file_path,
-        filename="modified_dataset.csv",
-        media_type="text/csv"
-    )
+
+@app.get("/datasets/{dataset_id}/diff")
+def get_dataset_diff(
+    dataset_id: str,
+    base: int = Query(...),
+    target: int | None = Query(None)
+):
+    try:
+        return diff_versions(resolve_dataset_id(dataset_id), base, target)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+
+
+@app.post("/datasets/{dataset_id}/rollback")
+def rollback_dataset_version(dataset_id: str, version: int = Query(...)):
+    dataset_id = resolve_dataset_id(dataset_id)
+
+    try:
+        new_version = rollback_dataset(dataset_id, version)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+
+    df = get_dataset(dataset_id, version=new_version)
+
+    return FastJSONResponse({
+        "dataset_id": dataset_id,
+        "version": new_version,
+        "columns": list(df.columns),
+        "row_count": len(df),
+        "preview": frame_records(df.head(5))
+    })
+
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    """Status of a background job; ``result`` holds the response once done."""
+    status = job_status(job_id)
+
+    if status is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    return FastJSONResponse(status)
+
+
+@app.get("/ready")
+def readiness():
+    """
+    Readiness probe: 503 until the READY_WARMUP steps (started by the
+    first call) have run, then 200.
+    """
+    start_warmup()
+    status = warmup_status()
+
+    return FastJSONResponse(status, status_code=200 if status["ready"] else 503)
+
+
+@app.get("/metrics")
+def get_metrics():
+    return {
+        "datasets": registry_stats(),
+        "stats_cache": stats_cache_info(),
+        "query_cache": query_cache.stats(),
+        "insight_cache": insight_cache.stats(),
+        "query_plans": plan_cache_info(),
+        "row_indexes": row_index_info(),
+        "filter_indexes": filter_index_info(),
+        "approx": approx_info(),
+        "correlations": correlation_cache_info(),
+        "figure_cache": figure_cache_info(),
+        "image_cache": image_cache_info(),
+        "jobs": job_info()
+    }
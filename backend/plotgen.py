@@ -1,13 +1,23 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Header, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import Response
 from pydantic import BaseModel
 import pandas as pd
-import matplotlib.pyplot as plt
-import io
+
+from services.dataset_store import (
+    current_version,
+    dataset_exists,
+    load_dataset,
+    valid_dataset_id
+)
+from services.figure_service import etag_matches
+from services.image_service import IMAGE_FORMATS, prepare_image, render_image
+from services.plot_service import plot_columns
 
 app = FastAPI()
 
+pd.set_option("mode.copy_on_write", True)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:3000"],
@@ -16,38 +26,48 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Static chart images for datasets uploaded to the main API. Datasets
+# are read from the shared store (DATA_DIR), at their current version
+# on every request, and drawn by image_service.
+
 class PlotRequest(BaseModel):
-    data: list
-    chart_type: str
-    x_column: str
-    y_column: str | None = None
+    dataset_id: str
+    config: dict
+    format: str = "png"
+    width: int = 640
+    height: int = 480
+    dpi: int = 100
 
 @app.post("/generate")
-def generate_plot(request: PlotRequest):
-    df = pd.DataFrame(request.data)
-
-    plt.figure()
-
-    if request.chart_type == "line":
-        plt.plot(df[request.x_column], df[request.y_column])
-
-    elif request.chart_type == "scatter":
-        plt.scatter(df[request.x_column], df[request.y_column])
+def generate_plot(request: PlotRequest, if_none_match: str | None = Header(None)):
+    if request.format not in IMAGE_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported image format: {request.format}")
 
-    elif request.chart_type == "bar":
-        plt.bar(df[request.x_column], df[request.y_column])
+    if not valid_dataset_id(request.dataset_id) or not dataset_exists(request.dataset_id):
+        raise HTTPException(status_code=404, detail="Dataset not found")
 
-    else:
-        plt.plot([1,2,3], [4,5,6])
+    version = current_version(request.dataset_id)
+    df = load_dataset(request.dataset_id, plot_columns(request.config), version)
 
-    plt.title(f"{request.chart_type.capitalize()} Plot")
-    plt.xlabel(request.x_column)
-    if request.y_column:
-        plt.ylabel(request.y_column)
+    try:
+        spec, digest, _ = prepare_image(
+            df,
+            request.config,
+            request.format,
+            request.width,
+            request.height,
+            request.dpi,
+            (request.dataset_id, version)
+        )
+    except (KeyError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    img_bytes = io.BytesIO()
-    plt.savefig(img_bytes, format="png")
-    img_bytes.seek(0)
-    plt.close()
+    etag = f'"{digest}"'
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
 
-    return StreamingResponse(img_bytes, media_type="image/png")
\ No newline at end of file
+    return Response(
+        render_image(spec, digest),
+        media_type=IMAGE_FORMATS[request.format],
+        headers={"ETag": etag}
+    )
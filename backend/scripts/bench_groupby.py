@@ -0,0 +1,94 @@
+"""
+Speedup of the parallel groupby over the serial one, per worker count.
+
+Run from backend/:
+
+    python -m scripts.bench_groupby                # 10M rows
+    python -m scripts.bench_groupby 50000000       # custom sizes
+
+Worker counts go 1, 2, 4, ... up to GROUPBY_WORKERS (set it to the core
+count to see the whole curve). Every parallel result is checked against
+the serial pandas groupby.
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from core.config import GROUPBY_WORKERS
+from services.groupby_service import groupby_aggregate
+
+pd.set_option("mode.copy_on_write", True)
+
+AGGREGATIONS = ["sum", "count", "mean", "min", "max", "median"]
+
+KEYS = {
+    "int key (100k groups)": "customer",
+    "category key (50 groups)": "region"
+}
+
+
+def make_frame(rows, seed=0):
+    rng = np.random.default_rng(seed)
+
+    return pd.DataFrame({
+        "customer": rng.integers(0, 100_000, rows),
+        "region": pd.Categorical.from_codes(
+            rng.integers(0, 50, rows),
+            [f"region_{i}" for i in range(50)]
+        ),
+        "amount": rng.exponential(100, rows)
+    })
+
+
+def best_of(fn, repeats=3):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+def worker_counts():
+    counts = [1]
+    while counts[-1] * 2 <= GROUPBY_WORKERS:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != GROUPBY_WORKERS:
+        counts.append(GROUPBY_WORKERS)
+    return counts
+
+
+def main(sizes):
+    workers = worker_counts()
+
+    for rows in sizes:
+        df = make_frame(rows)
+        print(f"\n{rows:,} rows")
+
+        for key_name, key in KEYS.items():
+            print(f"\n{key_name}")
+            print(f"{'aggregation':<14}" + "".join(f"{f'{w}w (ms)':>12}" for w in workers) + f"{'speedup':>10}")
+
+            for aggregation in AGGREGATIONS:
+                serial = df["amount"].groupby(df[key], sort=False, observed=True).agg(aggregation)
+
+                times = []
+                for w in workers:
+                    result = groupby_aggregate(df["amount"], df[key], aggregation, workers=w)
+                    pd.testing.assert_series_equal(result, serial, check_exact=False, rtol=1e-9)
+                    times.append(best_of(
+                        lambda: groupby_aggregate(df["amount"], df[key], aggregation, workers=w)
+                    ))
+
+                print(
+                    f"{aggregation:<14}" + "".join(f"{t:>12.1f}" for t in times)
+                    + f"{times[0] / times[-1]:>9.1f}x"
+                )
+
+        del df
+
+
+if __name__ == "__main__":
+    main([int(n) for n in sys.argv[1:]] or [10_000_000])
@@ -0,0 +1,108 @@
+"""
+Latency of execute_query on synthetic data.
+
+Run from backend/:
+
+    python -m scripts.bench_query            # 1M and 10M rows
+    python -m scripts.bench_query 1000000    # custom sizes
+
+Each query is timed against the previous copy-and-filter-per-condition
+implementation (kept below as ``legacy_execute_query``) for reference.
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from services.query_service import execute_query, plan_cache_info
+
+pd.set_option("mode.copy_on_write", True)
+
+QUERIES = {
+    "count filtered": {
+        "filters": [{"column": "age", "operator": ">", "value": 30}],
+        "aggregation": "count"
+    },
+    "mean 2 filters": {
+        "filters": [
+            {"column": "age", "operator": ">=", "value": 25},
+            {"column": "salary", "operator": "<", "value": 90000}
+        ],
+        "aggregation": "mean",
+        "column": "salary"
+    },
+    "groupby mean": {
+        "groupby": "department",
+        "aggregation": "mean",
+        "column": "salary"
+    },
+    "filtered groupby median": {
+        "filters": [{"column": "age", "operator": "<", "value": 50}],
+        "groupby": "department",
+        "aggregation": "median",
+        "column": "salary"
+    }
+}
+
+
+def make_frame(rows, seed=0):
+    rng = np.random.default_rng(seed)
+
+    return pd.DataFrame({
+        "age": rng.integers(18, 70, rows),
+        "salary": rng.normal(60000, 15000, rows),
+        "department": rng.choice(
+            ["eng", "sales", "ops", "hr", "legal", "support"], rows
+        ),
+        "score": rng.random(rows)
+    })
+
+
+def legacy_execute_query(df, query):
+    working_df = df.copy()
+
+    ops = {
+        "==": lambda s, v: s == v, ">": lambda s, v: s > v,
+        "<": lambda s, v: s < v, ">=": lambda s, v: s >= v,
+        "<=": lambda s, v: s <= v
+    }
+    for f in query.get("filters", []):
+        working_df = working_df[ops[f["operator"]](working_df[f["column"]], f["value"])]
+
+    if "groupby" in query:
+        working_df = working_df.groupby(query["groupby"])
+
+    if query["aggregation"] == "count":
+        return working_df.size() if hasattr(working_df, "groups") else len(working_df)
+
+    return getattr(working_df[query["column"]], query["aggregation"])()
+
+
+def best_of(fn, repeats=3):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+def main(sizes):
+    for rows in sizes:
+        df = make_frame(rows)
+        print(f"\n{rows:,} rows")
+        print(f"{'query':<26}{'plan (ms)':>12}{'legacy (ms)':>14}{'speedup':>10}")
+
+        for name, query in QUERIES.items():
+            new = best_of(lambda: execute_query(df, query))
+            old = best_of(lambda: legacy_execute_query(df, query))
+            print(f"{name:<26}{new:>12.1f}{old:>14.1f}{old / new:>9.1f}x")
+
+        del df
+
+    print("\nplan cache:", plan_cache_info())
+
+
+if __name__ == "__main__":
+    main([int(n) for n in sys.argv[1:]] or [1_000_000, 10_000_000])
@@ -0,0 +1,110 @@
+"""
+Cold-start cost of the API: import time per module, then the first-use
+cost of what GET /ready warms.
+
+Run from backend/:
+
+    python -m scripts.bench_startup              # main, 5 runs
+    python -m scripts.bench_startup upload 10    # another module / runs
+
+Every run imports the module in a fresh interpreter with
+``python -X importtime``; the median over the runs is reported. A
+module's cumulative time includes the imports it triggers first, so a
+package imported by several modules is counted under the first one.
+"""
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+# Third-party packages reported as a whole, next to our own modules
+PACKAGES = {
+    "fastapi", "starlette", "pydantic", "numpy", "pandas", "pyarrow",
+    "orjson", "httpx", "openai", "plotly", "matplotlib"
+}
+
+TOP_MODULES = 25
+
+WARMUP_SCRIPT = """
+import json, time
+from services.warmup_service import WARMUP_STEPS
+times = {}
+for step, warm in WARMUP_STEPS.items():
+    start = time.perf_counter()
+    try:
+        warm()
+    except Exception as e:
+        times[step] = repr(e)
+        continue
+    times[step] = time.perf_counter() - start
+print(json.dumps(times))
+"""
+
+
+def import_times(module):
+    """(wall seconds, {module: cumulative seconds}) for one fresh import."""
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    wall = time.perf_counter() - start
+
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+
+        _, cumulative, name = line[len("import time:"):].split("|")
+        name = name.strip()
+
+        if name.startswith("services.") or name.startswith("core.") or name in PACKAGES or name == module:
+            modules[name] = int(cumulative) / 1e6
+
+    return wall, modules
+
+
+def first_use_times():
+    result = subprocess.run(
+        [sys.executable, "-c", WARMUP_SCRIPT],
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def main(module, runs):
+    walls = []
+    samples = {}
+
+    for _ in range(runs):
+        wall, modules = import_times(module)
+        walls.append(wall)
+        for name, seconds in modules.items():
+            samples.setdefault(name, []).append(seconds)
+
+    print(f"import {module}: {statistics.median(walls) * 1000:.0f} ms "
+          f"(interpreter start included, median of {runs})\n")
+
+    medians = {name: statistics.median(times) for name, times in samples.items()}
+    print(f"{'module':<36}{'cumulative (ms)':>16}")
+    for name, seconds in sorted(medians.items(), key=lambda item: -item[1])[:TOP_MODULES]:
+        print(f"{name:<36}{seconds * 1000:>16.1f}")
+
+    print(f"\n{'first use (/ready warmup)':<36}{'ms':>16}")
+    for step, seconds in first_use_times().items():
+        if isinstance(seconds, str):
+            print(f"{step:<36}{'failed: ' + seconds:>16}")
+        else:
+            print(f"{step:<36}{seconds * 1000:>16.1f}")
+
+
+if __name__ == "__main__":
+    main(
+        sys.argv[1] if len(sys.argv) > 1 else "main",
+        int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    )
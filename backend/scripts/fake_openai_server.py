@@ -0,0 +1,74 @@
+"""
+Minimal OpenAI-compatible server for exercising ai_service locally.
+
+Run from backend/:
+
+    uvicorn scripts.fake_openai_server:app --port 9000
+    OPENAI_BASE_URL=http://127.0.0.1:9000/v1 OPENAI_API_KEY=fake uvicorn main:app
+
+Knobs (env): FAKE_OPENAI_LATENCY seconds per call, FAKE_OPENAI_FAIL_RATE
+fraction of calls answered with a retryable 503. GET /stats reports call
+counts and the peak number of concurrent requests seen.
+"""
+import asyncio
+import json
+import os
+import random
+import time
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+
+LATENCY = float(os.getenv("FAKE_OPENAI_LATENCY", 0.2))
+FAIL_RATE = float(os.getenv("FAKE_OPENAI_FAIL_RATE", 0))
+
+app = FastAPI()
+
+stats = {"calls": 0, "failures": 0, "in_flight": 0, "peak_in_flight": 0}
+
+
+def fake_answer(messages):
+    system = next((m["content"] for m in messages if m["role"] == "system"), "")
+
+    # NL -> query prompt: answer with a structured query
+    if "structured JSON queries" in system:
+        return json.dumps({"aggregation": "count"})
+
+    return "- Fake insight one\n- Fake insight two"
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(payload: dict):
+    stats["calls"] += 1
+    stats["in_flight"] += 1
+    stats["peak_in_flight"] = max(stats["peak_in_flight"], stats["in_flight"])
+
+    try:
+        await asyncio.sleep(LATENCY)
+
+        if random.random() < FAIL_RATE:
+            stats["failures"] += 1
+            return JSONResponse(
+                status_code=503,
+                content={"error": {"message": "fake overload", "type": "server_error"}}
+            )
+
+        return {
+            "id": f"chatcmpl-fake-{stats['calls']}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": payload.get("model", "fake"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": fake_answer(payload["messages"])},
+                "finish_reason": "stop"
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        }
+    finally:
+        stats["in_flight"] -= 1
+
+
+@app.get("/stats")
+def get_stats():
+    return stats
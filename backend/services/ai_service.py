@@ -1,21 +1,175 @@
+import asyncio
 import json
-from openai import OpenAI
-from core.config import OPENAI_API_KEY, MODEL_NAME
+import random
+import re
+import threading
+import unicodedata
+import uuid
+from collections import OrderedDict
+
+from core.config import (
+    OPENAI_API_KEY,
+    OPENAI_BASE_URL,
+    MODEL_NAME,
+    AI_MAX_CONCURRENCY,
+    AI_TIMEOUT_SECONDS,
+    AI_MAX_RETRIES,
+    AI_RETRY_BACKOFF_SECONDS,
+    QUERY_CACHE_MAX_ENTRIES,
+    QUERY_CACHE_TTL_SECONDS,
+    INSIGHT_CACHE_MAX_ENTRIES
+)
+from services.cache_service import PersistentCache, stable_hash
+from services.stats_service import (
+    compute_dataset_stats,
+    numeric_summary,
+    overview_stats
+)
+
+# One pooled HTTP client shared by every request; retries are handled
+# below so the backoff policy and the concurrency cap work together.
+#
+# The OpenAI SDK takes longer to import than the rest of the service
+# combined, so it is imported and the client created on the first AI
+# call (or by the readiness warmup) rather than at import time. The
+# service can therefore start and serve data endpoints without an API
+# key.
+_client = None
+_client_lock = threading.Lock()
+
+_ai_semaphore = asyncio.Semaphore(AI_MAX_CONCURRENCY)
+
+
+def get_client():
+    """The shared AsyncOpenAI client, created on first use."""
+    global _client
+
+    with _client_lock:
+        if _client is None:
+            import httpx
+            from openai import AsyncOpenAI
+
+            _client = AsyncOpenAI(
+                api_key=OPENAI_API_KEY,
+                base_url=OPENAI_BASE_URL,
+                max_retries=0,
+                timeout=AI_TIMEOUT_SECONDS,
+                http_client=httpx.AsyncClient(
+                    limits=httpx.Limits(
+                        max_connections=AI_MAX_CONCURRENCY,
+                        max_keepalive_connections=AI_MAX_CONCURRENCY
+                    )
+                )
+            )
+
+        return _client
+
+
+def _retryable_errors() -> tuple:
+    from openai import (
+        APIConnectionError,
+        APITimeoutError,
+        InternalServerError,
+        RateLimitError
+    )
+
+    return (
+        APIConnectionError,
+        APITimeoutError,
+        InternalServerError,
+        RateLimitError
+    )
+
+
+async def chat_completion(messages, temperature):
+    """
+    One chat completion with bounded concurrency, timeout and retries.
+
+    At most AI_MAX_CONCURRENCY calls are in flight; transient failures
+    are retried with exponential backoff and jitter, sleeping outside
+    the semaphore so waiting calls do not hold a slot.
+    """
+    client = get_client()
+    retryable = _retryable_errors()
+
+    for attempt in range(AI_MAX_RETRIES + 1):
+        try:
+            async with _ai_semaphore:
+                response = await client.chat.completions.create(
+                    model=MODEL_NAME,
+                    messages=messages,
+                    temperature=temperature,
+                    timeout=AI_TIMEOUT_SECONDS
+                )
+            return response.choices[0].message.content
+
+        except retryable:
+            if attempt == AI_MAX_RETRIES:
+                raise
 
-client = OpenAI(api_key=OPENAI_API_KEY)
+            delay = AI_RETRY_BACKOFF_SECONDS * 2 ** attempt
+            await asyncio.sleep(delay * (0.5 + random.random()))
+
+
+# ============================================================
+# INSIGHT MEMOIZATION
+# ============================================================
+#
+# Insights depend only on the context JSON and the model, so identical
+# contexts (re-rendered charts, unchanged datasets) reuse earlier
+# answers. Concurrent requests for the same key share one LLM call.
+#
+# The caches are SQLite: reads and writes run in a worker thread
+# (asyncio.to_thread), never on the event loop.
+
+insight_cache = PersistentCache(
+    "insight_cache",
+    max_entries=INSIGHT_CACHE_MAX_ENTRIES
+)
+
+_inflight_insights: dict = {}
+
+
+async def memoized_insights(kind, context, generate):
+    key = stable_hash(kind, context, MODEL_NAME)
+
+    cached = await asyncio.to_thread(insight_cache.get, key)
+    if cached is not None:
+        return cached
+
+    task = _inflight_insights.get(key)
+
+    if task is None:
+        async def run():
+            insights = await generate()
+            await asyncio.to_thread(insight_cache.set, key, insights)
+            return insights
+
+        task = asyncio.ensure_future(run())
+        _inflight_insights[key] = task
+        task.add_done_callback(lambda _: _inflight_insights.pop(key, None))
+
+    # shield: one cancelled waiter must not cancel the shared call
+    return await asyncio.shield(task)
 
 
 # ============================================================
 # DATASET OVERVIEW INSIGHTS
 # ============================================================
 
-def build_ai_context(df):
+def build_ai_context(df, stats=None):
+    # Precomputed stats (see stats_service) avoid rescanning the frame
+    if stats is None:
+        stats = compute_dataset_stats(df)
+
+    overview = overview_stats(stats)
+
     return {
-        "rows": df.shape[0],
-        "columns": df.shape[1],
-        "nulls": df.isnull().sum().to_dict(),
-        "dtypes": df.dtypes.astype(str).to_dict(),
-        "numeric_summary": df.describe().to_dict(),
+        "rows": overview["shape"]["rows"],
+        "columns": overview["shape"]["columns"],
+        "nulls": overview["null_counts"],
+        "dtypes": overview["dtypes"],
+        "numeric_summary": numeric_summary(stats),
         "sample_rows": df.head(5).to_dict(orient="records")
     }
 
@@ -39,13 +193,15 @@ Be concise.
 """
 
 
-def generate_insights(context):
-    response = client.chat.completions.create(
-        model=MODEL_NAME,
-        messages=[{"role": "user", "content": build_overview_prompt(context)}],
-        temperature=0.3
+async def generate_insights(context):
+    return await memoized_insights(
+        "overview",
+        context,
+        lambda: chat_completion(
+            [{"role": "user", "content": build_overview_prompt(context)}],
+            temperature=0.3
+        )
     )
-    return response.choices[0].message.content
 
 
 # ============================================================
@@ -63,7 +219,7 @@ Schema:
     {{ "column": "name", "operator": "== | > | < | >= | <=", "value": value }}
   ],
   "groupby": "column",
-  "aggregation": "mean | sum | count | min | max | median",
+  "aggregation": "mean | sum | count | min | max | median | nunique",
   "column": "target_column",
   "multiply": number (optional)
 }}
@@ -74,6 +230,7 @@ Rules:
 - multiply optional
 - aggregation required
 - column required except for count
+- nunique counts distinct values of column
 - Use ONLY these columns:
 {columns}
 
@@ -85,26 +242,80 @@ Return only JSON.
 """
 
 
-def generate_query(question, columns):
-    response = client.chat.completions.create(
-        model=MODEL_NAME,
-        messages=[
+# temperature=0 translations are deterministic enough to reuse. Keys
+# combine the question with a fingerprint of everything else the prompt
+# depends on (columns, model), so a schema change never hits old entries.
+query_cache = PersistentCache(
+    "query_cache",
+    max_entries=QUERY_CACHE_MAX_ENTRIES,
+    ttl_seconds=QUERY_CACHE_TTL_SECONDS
+)
+
+FILLER_PHRASES = re.compile(
+    r"^(please |can you |could you |show me |tell me |give me |what is |what's |the )+",
+    re.IGNORECASE
+)
+
+QUOTED_LITERAL = re.compile(r"(\"[^\"]*\"|'[^']*')")
+
+
+def normalize_question(question):
+    """
+    Cache key form of a question: whitespace collapsed, leading filler
+    phrases and trailing sentence punctuation dropped. Case is kept and
+    quoted literals are left exactly as written, since column names and
+    filter values are case-sensitive.
+    """
+    # Odd positions are quoted literals
+    parts = QUOTED_LITERAL.split(question)
+    for i in range(0, len(parts), 2):
+        parts[i] = re.sub(r"\s+", " ", unicodedata.normalize("NFKC", parts[i]))
+
+    text = "".join(parts).strip()
+    if not text.endswith(("'", '"')):
+        text = text.rstrip("?!. ")
+
+    return FILLER_PHRASES.sub("", text)
+
+
+def schema_fingerprint(columns):
+    return stable_hash(list(columns), MODEL_NAME)
+
+
+async def generate_query(question, columns):
+    fingerprint = schema_fingerprint(columns)
+    exact_key = stable_hash("exact", question, fingerprint)
+    # "normalized-v2": keys from the older, case-folding normalization
+    # must not be hit
+    normalized_key = stable_hash("normalized-v2", normalize_question(question), fingerprint)
+
+    cached = await asyncio.to_thread(query_cache.get, exact_key, normalized_key)
+    if cached is not None:
+        return cached
+
+    content = await chat_completion(
+        [
             {"role": "system", "content": build_query_prompt(columns)},
             {"role": "user", "content": question}
         ],
         temperature=0
     )
 
-    content = response.choices[0].message.content
-
     try:
-        return json.loads(content)
+        query = json.loads(content)
     except json.JSONDecodeError:
         return {
             "clarification_needed": True,
             "question": "I could not interpret the question. Please rephrase."
         }
 
+    # Clarification requests are not worth replaying
+    if "clarification_needed" not in query:
+        await asyncio.to_thread(query_cache.set, exact_key, query)
+        await asyncio.to_thread(query_cache.set, normalized_key, query)
+
+    return query
+
 
 # ============================================================
 # NEW — CHART INSIGHT GENERATION
@@ -129,14 +340,70 @@ Avoid generic statements.
 """
 
 
-def generate_chart_insights(chart_context):
+async def generate_chart_insights(chart_context):
     prompt = build_chart_prompt(chart_context)
 
-    response = client.chat.completions.create(
-        model=MODEL_NAME,
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.3
+    return await memoized_insights(
+        "chart",
+        chart_context,
+        lambda: chat_completion(
+            [{"role": "user", "content": prompt}],
+            temperature=0.3
+        )
     )
 
-    return response.choices[0].message.content
+
+# ============================================================
+# BACKGROUND CHART INSIGHTS
+# ============================================================
+#
+# /plot returns the figure immediately and hands out an ID; the
+# insights are generated in the background and fetched separately.
+
+MAX_INSIGHT_TASKS = 1000
+
+_insight_tasks: OrderedDict = OrderedDict()
+
+
+def _consume_exception(task):
+    # Failures are reported through chart_insights_status()
+    if not task.cancelled():
+        task.exception()
+
+
+def schedule_chart_insights(chart_context) -> str:
+    insights_id = uuid.uuid4().hex
+
+    task = asyncio.create_task(generate_chart_insights(chart_context))
+    task.add_done_callback(_consume_exception)
+    _insight_tasks[insights_id] = task
+
+    # Forget the oldest finished tasks once the table is full
+    while len(_insight_tasks) > MAX_INSIGHT_TASKS:
+        oldest_id, oldest = next(iter(_insight_tasks.items()))
+        if not oldest.done():
+            break
+        del _insight_tasks[oldest_id]
+
+    return insights_id
+
+
+async def chart_insights_status(insights_id, wait=0.0):
+    """Status of a scheduled insight task, waiting up to ``wait`` seconds."""
+    task = _insight_tasks.get(insights_id)
+
+    if task is None:
+        return None
+
+    if not task.done() and wait > 0:
+        await asyncio.wait({task}, timeout=min(wait, AI_TIMEOUT_SECONDS))
+
+    if not task.done():
+        return {"status": "pending"}
+
+    if task.cancelled() or task.exception() is not None:
+        error = "cancelled" if task.cancelled() else str(task.exception())
+        return {"status": "failed", "error": error}
+
+    return {"status": "done", "insights": task.result()}
 
@@ -0,0 +1,342 @@
+import threading
+import time
+from collections import OrderedDict
+from statistics import NormalDist
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from core.config import (
+    APPROX_CACHE_SIZE,
+    APPROX_CONFIDENCE,
+    APPROX_SAMPLE_ROWS,
+    APPROX_STRATUM_ROWS
+)
+from services.filter_service import build_mask
+from services.sketch_service import (
+    hll_estimate,
+    hll_registers,
+    tdigest,
+    tdigest_quantile
+)
+
+
+# =====================================================
+# Approximate aggregation
+# =====================================================
+#
+# Opt-in fast answers for exploration. Each dataset version keeps, in
+# memory and next to nothing else:
+#
+# - a uniform sample of row positions (APPROX_SAMPLE_ROWS) for
+#   ungrouped estimates
+# - per grouping, a stratified sample: up to APPROX_STRATUM_ROWS rows
+#   of every group, so small groups are estimated as well as large ones
+#   (groups at or under that size are kept whole and come out exact)
+# - per column, HyperLogLog and t-digest sketches (sketch_service)
+#
+# count / sum / mean come with normal confidence intervals (finite
+# population corrected), sample medians with order-statistic intervals.
+# Unfiltered medians and all distinct counts use the sketches. Other
+# aggregations are left to the exact path.
+
+APPROX_AGGREGATIONS = {"count", "sum", "mean", "median", "nunique"}
+
+
+class Sample(NamedTuple):
+    rows: np.ndarray
+    # Stratum of each sampled row
+    strata: np.ndarray
+    # Rows per stratum in the dataset / in the sample
+    population: np.ndarray
+    sampled: np.ndarray
+    # Group key of each stratum (None when ungrouped)
+    labels: pd.Index | None
+
+
+class Estimate(NamedTuple):
+    labels: list | None
+    value: np.ndarray
+    lower: np.ndarray
+    upper: np.ndarray
+    method: str
+    sample_rows: int
+    population_rows: int
+
+    @property
+    def approximate(self) -> bool:
+        return self.sample_rows < self.population_rows
+
+
+_lock = threading.Lock()
+_cache: OrderedDict = OrderedDict()
+_stats = {"hits": 0, "misses": 0, "build_seconds": 0.0}
+
+
+def _cached(key: tuple, build):
+    with _lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            _stats["hits"] += 1
+            return _cache[key]
+        _stats["misses"] += 1
+
+    start = time.perf_counter()
+    value = build()
+
+    with _lock:
+        _stats["build_seconds"] += time.perf_counter() - start
+        _cache[key] = value
+        while len(_cache) > APPROX_CACHE_SIZE:
+            _cache.popitem(last=False)
+
+    return value
+
+
+def approx_info() -> dict:
+    with _lock:
+        return {**_stats, "entries": len(_cache)}
+
+
+def _z_score() -> float:
+    return NormalDist().inv_cdf((1 + APPROX_CONFIDENCE) / 2)
+
+
+# =====================================================
+# Samples
+# =====================================================
+
+def uniform_sample(df: pd.DataFrame, key: tuple) -> Sample:
+    """Uniform sample without replacement, cached under ``key``."""
+    def build():
+        n = len(df)
+        size = min(n, APPROX_SAMPLE_ROWS)
+        rows = np.sort(np.random.default_rng().choice(n, size, replace=False))
+
+        return Sample(
+            rows=rows,
+            strata=np.zeros(size, dtype=np.intp),
+            population=np.array([n]),
+            sampled=np.array([size]),
+            labels=None
+        )
+
+    return _cached(key + ("uniform",), build)
+
+
+def stratified_sample(df: pd.DataFrame, key: tuple, groupby: tuple) -> Sample:
+    """
+    Sample stratified by the ``groupby`` columns, cached under ``key``.
+
+    Each row of group h is kept with probability
+    min(1, APPROX_STRATUM_ROWS / N_h), which needs no sort; estimates
+    use the realized group sample sizes. Rows with a missing key are
+    left out, like in groupby.
+    """
+    def build():
+        grouped = df.groupby(list(groupby), observed=True, sort=False)
+        population = grouped.size()
+
+        codes = grouped.ngroup().to_numpy()
+        if codes.dtype.kind == "f":
+            codes = np.where(np.isnan(codes), -1, codes).astype(np.intp)
+
+        rates = np.minimum(1.0, APPROX_STRATUM_ROWS / population.to_numpy())
+        rates = np.append(rates, 0.0)
+
+        keep = np.random.default_rng().random(len(df)) < rates[codes]
+        rows = np.flatnonzero(keep)
+        strata = codes[rows]
+
+        return Sample(
+            rows=rows,
+            strata=strata,
+            population=population.to_numpy(),
+            sampled=np.bincount(strata, minlength=len(population)),
+            labels=population.index
+        )
+
+    return _cached(key + ("strata", groupby), build)
+
+
+# =====================================================
+# Estimators
+# =====================================================
+
+def _sample_median(strata, values, valid, groups: int):
+    """Per-stratum median of the valid values with order-statistic bounds."""
+    y = values[valid]
+    s = strata[valid]
+    order = np.lexsort((y, s))
+    y = y[order]
+
+    counts = np.bincount(s, minlength=groups)
+    starts = np.cumsum(counts) - counts
+    last = np.maximum(counts - 1, 0)
+
+    # Ranks of the median and of the interval ends: a binomial(k, 1/2)
+    # number of values falls below the true median
+    mid = last / 2
+    half = _z_score() * np.sqrt(counts) / 2
+    lo = np.clip(np.floor(mid - half), 0, last).astype(np.intp)
+    hi = np.clip(np.ceil(mid + half), 0, last).astype(np.intp)
+
+    # Empty strata read a NaN placeholder
+    y = np.append(y, np.nan)
+    starts[counts == 0] = len(y) - 1
+
+    value = (y[starts + np.floor(mid).astype(np.intp)] + y[starts + np.ceil(mid).astype(np.intp)]) / 2
+
+    return value, y[starts + lo], y[starts + hi], counts
+
+
+def estimate_sample(sample: Sample, values: pd.Series | None, match: np.ndarray | None, aggregation: str):
+    """
+    Per-stratum (value, lower, upper, matched) of ``aggregation`` from
+    sampled rows.
+
+    ``values`` are the sampled target values (None counts rows),
+    ``match`` the filter mask over the sampled rows; ``matched`` is the
+    number of sampled rows that count towards each stratum.
+    """
+    groups = len(sample.population)
+    strata = sample.strata
+    n = sample.sampled.astype(np.float64)
+    N = sample.population.astype(np.float64)
+
+    with np.errstate(all="ignore"):
+        fpc = np.clip(1 - n / N, 0, 1)
+
+    valid = np.ones(len(strata), dtype=bool) if match is None else match
+    if values is not None:
+        valid = valid & values.notna().to_numpy()
+
+    if aggregation == "count":
+        y = valid.astype(np.float64)
+    else:
+        if not pd.api.types.is_numeric_dtype(values.dtype):
+            raise ValueError(f"Approximate {aggregation} needs a numeric column")
+        y = np.where(valid, values.to_numpy(dtype="float64", na_value=np.nan), 0.0)
+
+    if aggregation == "median":
+        value, lower, upper, matched = _sample_median(strata, y, valid, groups)
+        exact = fpc == 0
+        lower[exact] = value[exact]
+        upper[exact] = value[exact]
+        return value, lower, upper, matched
+
+    matched = np.bincount(strata, weights=valid, minlength=groups)
+
+    if aggregation == "mean":
+        # Mean over the matching rows only (a domain mean)
+        size, domain, scale = matched, valid, 1.0
+    else:
+        # count / sum: population total of y, which is zero outside the
+        # filter
+        size, domain, scale = n, True, N
+
+    with np.errstate(all="ignore"):
+        mean = np.bincount(strata, weights=y, minlength=groups) / size
+        deviation = np.where(domain, y - mean[strata], 0.0)
+        variance = np.bincount(strata, weights=deviation ** 2, minlength=groups) / (size - 1)
+        stderr = np.sqrt(variance / size * fpc)
+
+    stderr[fpc == 0] = 0.0
+
+    value = mean * scale
+    margin = _z_score() * stderr * scale
+
+    return value, value - margin, value + margin, matched
+
+
+# =====================================================
+# Entry point
+# =====================================================
+
+def approximate_aggregate(
+    df: pd.DataFrame,
+    key: tuple,
+    aggregation: str,
+    column: str | None = None,
+    groupby: tuple = (),
+    filters: list | None = None
+) -> Estimate | None:
+    """
+    Estimate ``aggregation`` of ``column`` (rows if None) over the rows
+    matching ``filters``, per ``groupby`` group.
+
+    ``df`` is the whole dataset version identified by ``key``, e.g.
+    (dataset id, version); samples and sketches are cached under it.
+    Returns None when no approximate method applies (the caller then
+    computes the exact answer).
+    """
+    if aggregation not in APPROX_AGGREGATIONS:
+        return None
+
+    filters = filters or []
+    total = len(df)
+
+    # -------- Sketches --------
+    if aggregation == "nunique":
+        # A sample says little about distinct counts; HyperLogLog reads
+        # every (matching) row but in constant memory
+        if groupby:
+            return None
+
+        series = df[column]
+        if filters:
+            registers = hll_registers(series[build_mask(df, filters)])
+        else:
+            registers = _cached(key + ("hll", column), lambda: hll_registers(series))
+
+        value, error = hll_estimate(registers)
+        margin = _z_score() * error * value
+
+        return Estimate(
+            None, np.array([value]), np.array([value - margin]), np.array([value + margin]),
+            "hyperloglog", 0, total
+        )
+
+    if aggregation == "median" and not groupby and not filters:
+        if not pd.api.types.is_numeric_dtype(df[column].dtype):
+            raise ValueError("Approximate median needs a numeric column")
+
+        digest = _cached(key + ("tdigest", column), lambda: tdigest(df[column]))
+        value = lower = upper = np.nan
+        if digest is not None:
+            value, lower, upper = tdigest_quantile(digest, 0.5)
+
+        return Estimate(
+            None, np.array([value]), np.array([lower]), np.array([upper]),
+            "t-digest", 0, total
+        )
+
+    # -------- Samples --------
+    if groupby:
+        sample = stratified_sample(df, key, tuple(groupby))
+        method = "stratified_sample"
+    else:
+        sample = uniform_sample(df, key)
+        method = "uniform_sample"
+
+    # Column by column: projecting df first would copy whole blocks
+    needed = [f["column"] for f in filters] + ([column] if column else [])
+    sampled = pd.DataFrame(
+        {col: df[col].take(sample.rows) for col in dict.fromkeys(needed)},
+        index=df.index[sample.rows]
+    )
+
+    match = build_mask(sampled, filters) if filters else None
+    values = sampled[column] if column else None
+
+    value, lower, upper, matched = estimate_sample(sample, values, match, aggregation)
+
+    # Like groupby, only groups with matching rows are reported
+    labels = None
+    if sample.labels is not None:
+        present = matched > 0
+        labels = list(sample.labels[present])
+        value, lower, upper = value[present], lower[present], upper[present]
+
+    return Estimate(labels, value, lower, upper, method, len(sample.rows), total)
@@ -0,0 +1,121 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from core.config import CACHE_DIR
+
+
+# =====================================================
+# Helpers
+# =====================================================
+
+def stable_hash(*parts) -> str:
+    """SHA-256 of JSON-encoded parts, independent of dict key order."""
+    payload = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# =====================================================
+# Persistent key/value cache
+# =====================================================
+
+class PersistentCache:
+    """
+    JSON values in a SQLite table, with optional TTL and an LRU bound.
+
+    Entries survive restarts. Each cache gets its own table in a shared
+    database file under CACHE_DIR.
+    """
+
+    def __init__(self, name: str, max_entries: int, ttl_seconds: float | None = None):
+        os.makedirs(CACHE_DIR, exist_ok=True)
+
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            os.path.join(CACHE_DIR, "cache.sqlite3"),
+            check_same_thread=False
+        )
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {name} ("
+            "key TEXT PRIMARY KEY, value TEXT, created REAL, accessed REAL)"
+        )
+        self._conn.execute(
+            f"CREATE INDEX IF NOT EXISTS {name}_accessed ON {name} (accessed)"
+        )
+        self._conn.commit()
+
+        self._counters = {"hits": 0, "misses": 0, "evictions": 0, "expired": 0}
+
+    def _lookup(self, key: str, now: float):
+        row = self._conn.execute(
+            f"SELECT value, created FROM {self.name} WHERE key = ?", (key,)
+        ).fetchone()
+
+        if row is not None and self.ttl_seconds and now - row[1] > self.ttl_seconds:
+            self._conn.execute(f"DELETE FROM {self.name} WHERE key = ?", (key,))
+            self._counters["expired"] += 1
+            return None
+
+        return row
+
+    def get(self, *keys: str):
+        """Value of the first key present; counts as one hit or miss."""
+        now = time.time()
+
+        with self._lock:
+            for key in keys:
+                row = self._lookup(key, now)
+
+                if row is not None:
+                    self._conn.execute(
+                        f"UPDATE {self.name} SET accessed = ? WHERE key = ?", (now, key)
+                    )
+                    self._conn.commit()
+                    self._counters["hits"] += 1
+                    return json.loads(row[0])
+
+            self._conn.commit()
+            self._counters["misses"] += 1
+
+        return None
+
+    def set(self, key: str, value):
+        now = time.time()
+
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.name} VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now)
+            )
+
+            excess = self._count() - self.max_entries
+            if excess > 0:
+                self._conn.execute(
+                    f"DELETE FROM {self.name} WHERE key IN ("
+                    f"SELECT key FROM {self.name} ORDER BY accessed LIMIT ?)",
+                    (excess,)
+                )
+                self._counters["evictions"] += excess
+
+            self._conn.commit()
+
+    def _count(self) -> int:
+        return self._conn.execute(f"SELECT COUNT(*) FROM {self.name}").fetchone()[0]
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._counters["hits"] + self._counters["misses"]
+
+            return {
+                **self._counters,
+                "hit_rate": self._counters["hits"] / lookups if lookups else None,
+                "entries": self._count(),
+                "max_entries": self.max_entries
+            }
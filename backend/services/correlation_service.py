@@ -0,0 +1,298 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from core.config import (
+    CORRELATION_CACHE_SIZE,
+    CORRELATION_CHUNK_ROWS,
+    CORRELATION_SAMPLE_ROWS
+)
+from services.cache_service import stable_hash
+from services.filter_service import select_rows
+
+
+# =====================================================
+# Correlation matrix
+# =====================================================
+#
+# DataFrame.corr() loops over column pairs in Python-level kernels and
+# is quadratic in the number of columns on top of the row pass. Here
+# the whole matrix comes out of a few matrix products over row chunks:
+#
+# - every numeric column is shifted by its mean (for accuracy) and
+#   missing values are zeroed; with M the validity mask,
+#   X'X, X'M, (X^2)'M and M'M give per pair the sums over the rows
+#   where both columns are present (pairwise-complete, like pandas)
+# - without missing values a single X'X is enough
+# - Spearman is Pearson over ranks (average ties), each column ranked
+#   over its own non-null values; identical to pandas without nulls
+# - above CORRELATION_SAMPLE_ROWS rows a uniform row sample is used
+#   (fixed seed, so a dataset version always gives the same matrix)
+#
+# Matrices are cached per dataset version, method, sample size and
+# filters (CORRELATION_CACHE_SIZE).
+
+METHODS = {"pearson", "spearman"}
+
+
+class Correlation(NamedTuple):
+    columns: list
+    matrix: np.ndarray
+    method: str
+    # Rows the matrix was computed from / rows after filters
+    rows: int
+    total_rows: int
+
+
+_lock = threading.Lock()
+_cache: OrderedDict = OrderedDict()
+_stats = {"hits": 0, "misses": 0, "build_seconds": 0.0}
+
+
+def _cached(key: tuple, build):
+    with _lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            _stats["hits"] += 1
+            return _cache[key]
+        _stats["misses"] += 1
+
+    start = time.perf_counter()
+    value = build()
+
+    with _lock:
+        _stats["build_seconds"] += time.perf_counter() - start
+        _cache[key] = value
+        while len(_cache) > CORRELATION_CACHE_SIZE:
+            _cache.popitem(last=False)
+
+    return value
+
+
+def correlation_cache_info() -> dict:
+    with _lock:
+        return {**_stats, "entries": len(_cache)}
+
+
+def numeric_columns(df: pd.DataFrame) -> list:
+    return list(df.select_dtypes(include="number").columns)
+
+
+def _sample_rows(rows: int, sample_rows: int) -> np.ndarray | None:
+    if not sample_rows or rows <= sample_rows:
+        return None
+
+    rng = np.random.default_rng(0)
+    return np.sort(rng.choice(rows, sample_rows, replace=False))
+
+
+def _sources(df: pd.DataFrame, columns: list, rows: np.ndarray | None, method: str) -> list:
+    """Per column, what row chunks are read from."""
+    if method == "pearson":
+        return [df[col] for col in columns]
+
+    # Ranks need the whole column; held as float32 (multiples of 1/2,
+    # exact up to 2^23 rows)
+    sources = []
+    for col in columns:
+        series = df[col] if rows is None else df[col].take(rows)
+        sources.append(series.rank().to_numpy(dtype="float32", na_value=np.nan))
+    return sources
+
+
+def _chunk(sources: list, rows: np.ndarray | None, start: int, stop: int, method: str) -> np.ndarray:
+    if method == "spearman" or rows is None:
+        parts = [src[start:stop] for src in sources]
+    else:
+        parts = [src.take(rows[start:stop]) for src in sources]
+
+    return np.column_stack([
+        part if isinstance(part, np.ndarray) else part.to_numpy(dtype="float64", na_value=np.nan)
+        for part in parts
+    ]).astype(np.float64, copy=False)
+
+
+def correlate(
+    df: pd.DataFrame,
+    method: str = "pearson",
+    sample_rows: int | None = CORRELATION_SAMPLE_ROWS
+) -> Correlation:
+    """
+    Pairwise-complete correlation matrix of the numeric columns of
+    ``df``; ``sample_rows`` (0 or None for every row) caps the rows used.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unsupported correlation method: {method}")
+
+    columns = numeric_columns(df)
+    rows = _sample_rows(len(df), sample_rows)
+    sources = _sources(df, columns, rows, method)
+
+    n = len(df) if rows is None else len(rows)
+    p = len(columns)
+
+    # Any constant shift leaves the correlation unchanged; the mean
+    # keeps the sums small
+    with np.errstate(all="ignore"):
+        shift = np.array([
+            np.nanmean(src) if isinstance(src, np.ndarray) else src.mean()
+            for src in sources
+        ], dtype=np.float64)
+    shift = np.nan_to_num(shift)
+
+    complete = not any(
+        np.isnan(src).any() if isinstance(src, np.ndarray) else src.hasnans
+        for src in sources
+    )
+
+    xx = np.zeros((p, p))
+    x_sum = np.zeros((p, p))
+    x_sq = np.zeros((p, p))
+    count = np.zeros((p, p))
+
+    for start in range(0, n, CORRELATION_CHUNK_ROWS):
+        chunk = _chunk(sources, rows, start, start + CORRELATION_CHUNK_ROWS, method) - shift
+
+        if complete:
+            xx += chunk.T @ chunk
+            x_sum += chunk.sum(axis=0)[:, None]
+            continue
+
+        mask = ~np.isnan(chunk)
+        chunk[~mask] = 0.0
+        mask = mask.astype(np.float64)
+
+        xx += chunk.T @ chunk
+        # [i, j]: sums of column i over the rows where j is present too
+        x_sum += chunk.T @ mask
+        x_sq += (chunk * chunk).T @ mask
+        count += mask.T @ mask
+
+    if complete:
+        count[:] = n
+        x_sq[:] = np.diag(xx)[:, None]
+
+    with np.errstate(all="ignore"):
+        covariance = xx - x_sum * x_sum.T / count
+        variance = x_sq - x_sum * x_sum / count
+        matrix = covariance / np.sqrt(variance * variance.T)
+
+    # Fewer than two common rows or a constant column: undefined
+    matrix[(count < 2) | (variance <= 0) | (variance.T <= 0)] = np.nan
+
+    return Correlation(
+        columns=columns,
+        matrix=np.clip(matrix, -1.0, 1.0),
+        method=method,
+        rows=n,
+        total_rows=len(df)
+    )
+
+
+def dataset_correlation(
+    key: tuple | None,
+    load_df,
+    method: str = "pearson",
+    sample_rows: int | None = CORRELATION_SAMPLE_ROWS,
+    filters: list | None = None
+) -> Correlation:
+    """
+    Correlation of the rows of ``load_df()`` matching ``filters``,
+    cached under ``key`` (dataset id, version); None skips the cache.
+    """
+    filters = filters or []
+
+    def build():
+        df = select_rows(load_df(), filters)
+        if df.empty:
+            raise ValueError("No data available after filters")
+        return correlate(df, method, sample_rows)
+
+    if key is None:
+        return build()
+
+    return _cached(key + (method, sample_rows, stable_hash(filters)), build)
+
+
+# =====================================================
+# Reading the matrix
+# =====================================================
+
+def top_pairs(columns: list, matrix: np.ndarray, k: int) -> list:
+    """The ``k`` column pairs with the largest absolute correlation."""
+    first, second = np.triu_indices(len(matrix), 1)
+    values = matrix[first, second]
+
+    defined = np.flatnonzero(~np.isnan(values))
+    strength = np.abs(values[defined])
+
+    if k < len(defined):
+        # Only the k strongest are sorted
+        keep = np.argpartition(-strength, k)[:k]
+        defined, strength = defined[keep], strength[keep]
+
+    ordered = defined[np.argsort(-strength, kind="stable")]
+
+    return [
+        {
+            "x": columns[first[i]],
+            "y": columns[second[i]],
+            "correlation": float(values[i])
+        }
+        for i in ordered
+    ]
+
+
+def strongest_columns(matrix: np.ndarray, limit: int) -> list:
+    """Positions of the ``limit`` columns with the strongest off-diagonal correlation."""
+    if len(matrix) <= limit:
+        return list(range(len(matrix)))
+
+    # Undefined correlations rank below every defined one
+    strength = np.nan_to_num(np.abs(matrix), nan=-1.0)
+    np.fill_diagonal(strength, -1.0)
+    best = strength.max(axis=1)
+
+    # Kept in their original order
+    return sorted(np.argsort(-best, kind="stable")[:limit].tolist())
+
+
+def cluster_order(matrix: np.ndarray) -> list:
+    """
+    Leaf order of an average-linkage clustering on 1 - |r|, so strongly
+    correlated columns end up next to each other.
+    """
+    p = len(matrix)
+    if p < 3:
+        return list(range(p))
+
+    distance = 1.0 - np.abs(np.nan_to_num(matrix, nan=0.0))
+    np.fill_diagonal(distance, np.inf)
+
+    members = [[i] for i in range(p)]
+    sizes = np.ones(p)
+    alive = np.ones(p, dtype=bool)
+
+    for _ in range(p - 1):
+        i, j = divmod(int(np.argmin(distance)), p)
+        i, j = min(i, j), max(i, j)
+
+        # Average linkage: size-weighted mean of the two rows
+        merged = (sizes[i] * distance[i] + sizes[j] * distance[j]) / (sizes[i] + sizes[j])
+        merged[~alive] = np.inf
+        merged[i] = np.inf
+
+        distance[i] = merged
+        distance[:, i] = merged
+        distance[j] = np.inf
+        distance[:, j] = np.inf
+
+        members[i] += members[j]
+        sizes[i] += sizes[j]
+        alive[j] = False
+
+    return members[int(np.flatnonzero(alive)[0])]
@@ -0,0 +1,265 @@
+import threading
+import uuid
+from collections import OrderedDict
+
+import pandas as pd
+
+from core.config import DATASET_MEMORY_BUDGET
+from services.dataset_store import (
+    current_version,
+    dataset_exists,
+    list_datasets as list_stored_datasets,
+    load_dataset,
+    rollback_dataset as rollback_stored_dataset,
+    save_dataset,
+    shared_columns
+)
+from services.index_service import release_indexes
+
+
+# =====================================================
+# Registry state
+# =====================================================
+#
+# Every dataset is written through to the store on create/update, so the
+# store directory doubles as the spill area: evicting a dataset only
+# drops its in-memory copy, and a later miss memory-maps it back in.
+#
+# Only the current version of a dataset is kept resident. Older versions
+# live in the store, where they share unchanged columns with each other.
+
+class VersionConflict(Exception):
+    pass
+
+
+_lock = threading.RLock()
+
+_resident: OrderedDict = OrderedDict()
+_resident_sizes: dict = {}
+_resident_bytes = 0
+
+_versions: dict = {}
+_latest_id: str | None = None
+
+_stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+
+def _frame_size(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(deep=True).sum())
+
+
+def _evict(dataset_id: str):
+    global _resident_bytes
+
+    df = _resident.pop(dataset_id)
+    _resident_bytes -= _resident_sizes.pop(dataset_id)
+    _stats["evictions"] += 1
+
+    # Filter indexes would otherwise keep the columns alive
+    release_indexes(df)
+
+
+def _forget(dataset_id: str) -> pd.DataFrame | None:
+    global _resident_bytes
+
+    df = _resident.pop(dataset_id, None)
+    if df is not None:
+        _resident_bytes -= _resident_sizes.pop(dataset_id)
+
+    return df
+
+
+def _make_resident(dataset_id: str, df: pd.DataFrame):
+    global _resident_bytes
+
+    previous = _forget(dataset_id)
+
+    size = _frame_size(df)
+
+    # Larger than the whole budget: leave it on disk only
+    if size > DATASET_MEMORY_BUDGET:
+        if previous is not None:
+            release_indexes(previous)
+        return
+
+    while _resident and _resident_bytes + size > DATASET_MEMORY_BUDGET:
+        _evict(next(iter(_resident)))
+
+    _resident[dataset_id] = df
+    _resident_sizes[dataset_id] = size
+    _resident_bytes += size
+
+    # Columns the new version still shares keep their indexes
+    if previous is not None:
+        release_indexes(previous, keep=df)
+
+
+# =====================================================
+# Public API
+# =====================================================
+
+def create_dataset(df: pd.DataFrame) -> str:
+    global _latest_id
+
+    dataset_id = uuid.uuid4().hex[:12]
+
+    with _lock:
+        _versions[dataset_id] = save_dataset(dataset_id, df, label="upload")
+        _make_resident(dataset_id, df)
+        _latest_id = dataset_id
+
+    return dataset_id
+
+
+def update_dataset(
+    dataset_id: str,
+    df: pd.DataFrame,
+    parent_df: pd.DataFrame | None = None,
+    parent_version: int | None = None,
+    label: str = ""
+) -> int:
+    """
+    Store ``df`` as the next version of a dataset.
+
+    ``parent_df`` is the frame (of ``parent_version``, default current)
+    that ``df`` was derived from; columns still sharing its buffers are
+    referenced from the parent version rather than written again.
+
+    Raises VersionConflict if ``parent_version`` is no longer current:
+    another update or a rollback was committed after it was read.
+    """
+    with _lock:
+        current = dataset_version(dataset_id)
+
+        if parent_version is None:
+            parent_version = current
+        elif parent_version != current:
+            raise VersionConflict(
+                f"Dataset {dataset_id} changed (version {parent_version} -> {current}), retry"
+            )
+        shared = shared_columns(parent_df, df) if parent_df is not None else {}
+
+        version = save_dataset(
+            dataset_id,
+            df,
+            parent=parent_version,
+            shared=shared,
+            label=label
+        )
+        _versions[dataset_id] = version
+        _make_resident(dataset_id, df)
+
+    return version
+
+
+def rollback_dataset(dataset_id: str, version: int) -> int:
+    """Restore an earlier version as a new current version (no data copied)."""
+    with _lock:
+        new_version = rollback_stored_dataset(dataset_id, version)
+        _versions[dataset_id] = new_version
+        # Re-read (memory-mapped) on next access
+        previous = _forget(dataset_id)
+        if previous is not None:
+            release_indexes(previous)
+
+    return new_version
+
+
+def has_dataset(dataset_id: str) -> bool:
+    return dataset_id in _resident or dataset_exists(dataset_id)
+
+
+def latest_dataset_id() -> str | None:
+    """Most recently uploaded dataset, including ones from before a restart."""
+    if _latest_id is not None:
+        return _latest_id
+
+    stored = list_stored_datasets()
+    return stored[-1] if stored else None
+
+
+def dataset_version(dataset_id: str) -> int:
+    with _lock:
+        if dataset_id not in _versions:
+            _versions[dataset_id] = current_version(dataset_id)
+        return _versions[dataset_id]
+
+
+def _read(dataset_id: str, columns: list | None, version: int | None = None) -> tuple:
+    with _lock:
+        # The resident frame is always the current version
+        current = dataset_version(dataset_id)
+        if version is None:
+            version = current
+        df = _resident.get(dataset_id) if version == current else None
+
+        if df is not None:
+            _resident.move_to_end(dataset_id)
+            _stats["hits"] += 1
+        else:
+            _stats["misses"] += 1
+
+    if df is None:
+        df = load_dataset(dataset_id, columns, version)
+
+        if columns is None:
+            with _lock:
+                # An update or rollback during the load made this frame
+                # stale; the resident copy belongs to the new version
+                if _versions.get(dataset_id) == version:
+                    _make_resident(dataset_id, df)
+
+        return df, version
+
+    if columns is not None:
+        df = df[[c for c in dict.fromkeys(columns) if c in df.columns]]
+
+    return df, version
+
+
+def get_dataset(
+    dataset_id: str,
+    columns: list | None = None,
+    version: int | None = None
+) -> pd.DataFrame:
+    """
+    Return a dataset, reading only ``columns`` if given.
+
+    Resident datasets are served from memory. On a miss the current
+    version is memory-mapped; a full read is kept resident (subject to
+    the budget) unless a newer version was committed meanwhile, a column
+    subset is not, since it would not satisfy later requests.
+
+    ``version`` pins the read to the version a cache key was built from;
+    once superseded it is read from the store's history.
+    """
+    return _read(dataset_id, columns, version)[0]
+
+
+def dataset_snapshot(dataset_id: str, columns: list | None = None) -> tuple:
+    """(frame, version) of the current version, read together."""
+    return _read(dataset_id, columns)
+
+
+def list_datasets() -> list:
+    return [
+        {
+            "dataset_id": dataset_id,
+            "version": dataset_version(dataset_id),
+            "resident": dataset_id in _resident
+        }
+        for dataset_id in list_stored_datasets()
+    ]
+
+
+def registry_stats() -> dict:
+    with _lock:
+        lookups = _stats["hits"] + _stats["misses"]
+
+        return {
+            **_stats,
+            "hit_rate": _stats["hits"] / lookups if lookups else None,
+            "resident_datasets": len(_resident),
+            "resident_bytes": _resident_bytes,
+            "memory_budget_bytes": DATASET_MEMORY_BUDGET
+        }
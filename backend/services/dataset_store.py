@@ -0,0 +1,438 @@
+import json
+import os
+import re
+import shutil
+import time
+import uuid
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from core.config import DATA_DIR, DATASET_HISTORY_MAX_VERSIONS
+
+
+# =====================================================
+# On-disk layout
+# =====================================================
+#
+# Each dataset is a directory holding a manifest and one uncompressed
+# Arrow IPC file per version. Uncompressed IPC can be memory-mapped, so
+# opening a dataset costs no I/O until a column is actually read, and
+# reading a subset of columns only touches those.
+#
+# A version file only contains the columns that version changed. The
+# manifest lists every column of every version together with the
+# version file it lives in, so unchanged columns are shared across the
+# history and disk use grows with the columns touched, not with
+# rows x columns x versions.
+#
+#   DATA_DIR/<name>/manifest.json
+#   DATA_DIR/<name>/v1.arrow        full upload
+#   DATA_DIR/<name>/v2.arrow        columns written by version 2
+
+MANIFEST = "manifest.json"
+
+# Dataset names are generated (uuid4 hex, 12 characters) and arrive
+# from clients; anything else must never reach a path
+DATASET_ID = re.compile(r"[0-9a-f]{12}")
+
+
+def valid_dataset_id(name) -> bool:
+    return isinstance(name, str) and DATASET_ID.fullmatch(name) is not None
+
+
+def dataset_dir(name: str) -> str:
+    if not valid_dataset_id(name):
+        raise ValueError(f"Invalid dataset id: {name!r}")
+    return os.path.join(DATA_DIR, name)
+
+
+def manifest_path(name: str) -> str:
+    return os.path.join(dataset_dir(name), MANIFEST)
+
+
+def version_path(name: str, version: int) -> str:
+    return os.path.join(dataset_dir(name), f"v{version}.arrow")
+
+
+def dataset_exists(name: str) -> bool:
+    return valid_dataset_id(name) and os.path.exists(manifest_path(name))
+
+
+def list_datasets() -> list:
+    """Stored dataset names, most recently written last."""
+    if not os.path.isdir(DATA_DIR):
+        return []
+
+    names = [
+        name for name in os.listdir(DATA_DIR)
+        if valid_dataset_id(name) and os.path.isfile(manifest_path(name))
+    ]
+    names.sort(key=lambda name: os.path.getmtime(manifest_path(name)))
+
+    return names
+
+
+def _write_atomic(path: str, write):
+    # Write to a temp file and swap it in, so readers never see a
+    # half-written file. Existing memory maps keep the old inode.
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def read_manifest(name: str) -> dict:
+    if not dataset_exists(name):
+        raise KeyError(name)
+
+    with open(manifest_path(name)) as f:
+        return json.load(f)
+
+
+def _write_manifest(name: str, manifest: dict):
+    def write(path):
+        with open(path, "w") as f:
+            json.dump(manifest, f)
+
+    _write_atomic(manifest_path(name), write)
+
+
+def _version_entry(manifest: dict, version: int | None) -> dict:
+    version = manifest["current"] if version is None else version
+
+    for entry in manifest["versions"]:
+        if entry["version"] == version:
+            return entry
+
+    raise KeyError(f"Version {version} not found")
+
+
+# =====================================================
+# Copy-on-write sharing
+# =====================================================
+
+def _array_key(values: np.ndarray):
+    return (
+        values.__array_interface__["data"][0],
+        values.strides,
+        len(values),
+        values.dtype.str
+    )
+
+
+def buffer_key(series: pd.Series):
+    """Identity of the memory behind a column, or None if unknown."""
+    values = series.values
+
+    if isinstance(values, np.ndarray):
+        return _array_key(values)
+
+    if isinstance(values, pd.Categorical):
+        return ("category", _array_key(values.codes), id(values.dtype))
+
+    if isinstance(values, pd.arrays.ArrowStringArray):
+        chunks = values.__arrow_array__().chunks
+        return ("arrow", len(values), tuple(
+            (b.address, b.size) for chunk in chunks for b in chunk.buffers() if b is not None
+        ))
+
+    # Nullable integer / float / boolean arrays: values plus missing mask
+    if isinstance(values, (pd.arrays.IntegerArray, pd.arrays.FloatingArray, pd.arrays.BooleanArray)):
+        return ("masked", _array_key(values._data), _array_key(values._mask))
+
+    return None
+
+
+def shared_columns(old_df: pd.DataFrame, new_df: pd.DataFrame) -> dict:
+    """
+    Columns of ``new_df`` still backed by a buffer of ``old_df``.
+
+    Under copy-on-write, columns a transform did not touch (select, drop,
+    rename, reorder, fill on another column) keep pointing at the parent
+    frame's memory. Returns {new column: old column}.
+    """
+    old_keys = {}
+    for col in old_df.columns:
+        key = buffer_key(old_df[col])
+        if key is not None:
+            old_keys[key] = col
+
+    shared = {}
+    for col in new_df.columns:
+        old_col = old_keys.get(buffer_key(new_df[col]))
+        if old_col is not None:
+            shared[col] = old_col
+
+    return shared
+
+
+# =====================================================
+# Writing
+# =====================================================
+
+def save_dataset(
+    name: str,
+    df: pd.DataFrame,
+    parent: int | None = None,
+    shared: dict | None = None,
+    label: str = ""
+) -> int:
+    """
+    Store ``df`` as a new version of ``name`` and make it current.
+
+    ``shared`` maps columns of ``df`` to columns of version ``parent``
+    holding the same data; those are referenced instead of rewritten.
+    Without a parent the dataset starts over at version 1.
+    """
+    if parent is None:
+        if dataset_exists(name):
+            delete_dataset(name)
+        os.makedirs(dataset_dir(name), exist_ok=True)
+        manifest = {"current": 0, "versions": []}
+        parent_columns = {}
+    else:
+        manifest = read_manifest(name)
+        parent_columns = {
+            c["name"]: c for c in _version_entry(manifest, parent)["columns"]
+        }
+
+    shared = shared or {}
+    version = max((e["version"] for e in manifest["versions"]), default=0) + 1
+
+    columns = []
+    written = []
+    for col in df.columns:
+        reused = parent_columns.get(shared.get(col))
+
+        if reused is not None:
+            columns.append({**reused, "name": col})
+        else:
+            columns.append({"name": col, "source": [version, col]})
+            written.append(col)
+
+    bytes_written = 0
+    if written:
+        table = pa.Table.from_pandas(df[written], preserve_index=False)
+        bytes_written = table.nbytes
+
+        types = {field.name: str(field.type) for field in table.schema}
+        for column in columns:
+            if column["source"][0] == version:
+                column["type"] = types[column["name"]]
+
+        def write(path):
+            with pa.OSFile(path, "wb") as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+
+        _write_atomic(version_path(name, version), write)
+
+    manifest["versions"].append({
+        "version": version,
+        "parent": parent,
+        "label": label,
+        "created": time.time(),
+        "rows": len(df),
+        "bytes_written": bytes_written,
+        "columns": columns
+    })
+    manifest["current"] = version
+
+    _prune(name, manifest)
+    _write_manifest(name, manifest)
+
+    return version
+
+
+def rollback_dataset(name: str, version: int) -> int:
+    """
+    Make the contents of ``version`` current again, as a new version.
+
+    Nothing is copied: the new version references the same files.
+    """
+    manifest = read_manifest(name)
+    target = _version_entry(manifest, version)
+
+    new_version = max(e["version"] for e in manifest["versions"]) + 1
+
+    manifest["versions"].append({
+        **target,
+        "version": new_version,
+        "parent": manifest["current"],
+        "label": f"rollback to v{version}",
+        "created": time.time(),
+        "bytes_written": 0
+    })
+    manifest["current"] = new_version
+
+    _prune(name, manifest)
+    _write_manifest(name, manifest)
+
+    return new_version
+
+
+def _prune(name: str, manifest: dict):
+    """Drop versions beyond the history limit and files no longer referenced."""
+    versions = manifest["versions"]
+    if len(versions) <= DATASET_HISTORY_MAX_VERSIONS:
+        return
+
+    manifest["versions"] = versions[-DATASET_HISTORY_MAX_VERSIONS:]
+
+    referenced = {
+        c["source"][0] for e in manifest["versions"] for c in e["columns"]
+    }
+    for entry in versions[:-DATASET_HISTORY_MAX_VERSIONS]:
+        path = version_path(name, entry["version"])
+        if entry["version"] not in referenced and os.path.exists(path):
+            os.remove(path)
+
+
+def delete_dataset(name: str):
+    if os.path.isdir(dataset_dir(name)):
+        shutil.rmtree(dataset_dir(name))
+
+
+# =====================================================
+# Reading
+# =====================================================
+
+# Strings load as Arrow-backed pandas strings: zero-copy from the memory
+# map instead of one Python object per value
+_PANDAS_TYPES = {
+    pa.string(): pd.StringDtype("pyarrow"),
+    pa.large_string(): pd.StringDtype("pyarrow")
+}
+
+def open_table(name: str, version: int) -> pa.Table:
+    source = pa.memory_map(version_path(name, version), "r")
+    return pa.ipc.open_file(source).read_all()
+
+
+def load_dataset(
+    name: str,
+    columns: list | None = None,
+    version: int | None = None
+) -> pd.DataFrame:
+    """
+    Load a dataset version (default: current) as a DataFrame, reading
+    only ``columns`` if given.
+
+    Unknown column names are ignored so callers can keep raising their
+    own "column not found" errors on the returned frame.
+    """
+    entry = _version_entry(read_manifest(name), version)
+    available = {c["name"]: c for c in entry["columns"]}
+
+    if columns is None:
+        wanted = list(available)
+    else:
+        wanted = list(dict.fromkeys(c for c in columns if c in available))
+
+    if not wanted:
+        return pd.DataFrame(index=pd.RangeIndex(entry["rows"]))
+
+    # One memory-mapped read per version file, then glued together
+    # without copying
+    by_file = {}
+    for col in wanted:
+        file_version, stored = available[col]["source"]
+        by_file.setdefault(file_version, []).append((col, stored))
+
+    frames = []
+    for file_version, pairs in by_file.items():
+        stored = list(dict.fromkeys(s for _, s in pairs))
+        frame = open_table(name, file_version).select(stored).to_pandas(
+            split_blocks=True,
+            types_mapper=_PANDAS_TYPES.get
+        )
+        frames.append(
+            frame[[s for _, s in pairs]].set_axis([c for c, _ in pairs], axis=1)
+        )
+
+    df = frames[0] if len(frames) == 1 else pd.concat(frames, axis=1)
+
+    return df[wanted]
+
+
+def open_dataset_table(name: str, version: int | None = None) -> pa.Table:
+    """
+    A dataset version as one Arrow table, without converting to pandas.
+
+    Columns stay memory-mapped from their version files, so this is
+    cheap regardless of dataset size.
+    """
+    entry = _version_entry(read_manifest(name), version)
+
+    tables = {}
+    columns = []
+    for c in entry["columns"]:
+        file_version, stored = c["source"]
+        if file_version not in tables:
+            tables[file_version] = open_table(name, file_version)
+        columns.append(tables[file_version].column(stored))
+
+    return pa.Table.from_arrays(columns, names=[c["name"] for c in entry["columns"]])
+
+
+def current_version(name: str) -> int:
+    return read_manifest(name)["current"]
+
+
+def dataset_columns(name: str, version: int | None = None) -> list:
+    entry = _version_entry(read_manifest(name), version)
+    return [c["name"] for c in entry["columns"]]
+
+
+# =====================================================
+# History
+# =====================================================
+
+def version_history(name: str) -> list:
+    manifest = read_manifest(name)
+
+    return [
+        {
+            "version": e["version"],
+            "parent": e["parent"],
+            "label": e["label"],
+            "created": e["created"],
+            "rows": e["rows"],
+            "columns": len(e["columns"]),
+            "columns_written": sum(c["source"][0] == e["version"] for c in e["columns"]),
+            "bytes_written": e["bytes_written"],
+            "current": e["version"] == manifest["current"]
+        }
+        for e in manifest["versions"]
+    ]
+
+
+def diff_versions(name: str, base: int, target: int | None = None) -> dict:
+    """
+    Schema diff between two versions, from the manifest alone.
+
+    A column counts as changed when it is backed by different stored
+    data, even if its type is the same.
+    """
+    manifest = read_manifest(name)
+    old = {c["name"]: c for c in _version_entry(manifest, base)["columns"]}
+    new_entry = _version_entry(manifest, target)
+    new = {c["name"]: c for c in new_entry["columns"]}
+
+    common = [c for c in new if c in old]
+
+    return {
+        "base": base,
+        "target": new_entry["version"],
+        "rows": {"base": _version_entry(manifest, base)["rows"], "target": new_entry["rows"]},
+        "added": [c for c in new if c not in old],
+        "removed": [c for c in old if c not in new],
+        "type_changed": {
+            c: {"base": old[c]["type"], "target": new[c]["type"]}
+            for c in common
+            if old[c]["type"] != new[c]["type"]
+        },
+        "data_changed": [c for c in common if old[c]["source"] != new[c]["source"]],
+        "unchanged": [c for c in common if old[c]["source"] == new[c]["source"]]
+    }
@@ -0,0 +1,157 @@
+import numpy as np
+import pandas as pd
+
+
+# =====================================================
+# Helpers
+# =====================================================
+
+def numeric_axis(series: pd.Series) -> np.ndarray:
+    """Float view of an axis; positions are used for non-numeric data."""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series.to_numpy(dtype="datetime64[ns]").astype("int64").astype("float64")
+
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        return series.to_numpy(dtype="float64", na_value=np.nan)
+
+    return np.arange(len(series), dtype="float64")
+
+
+def render_info(mode: str, input_rows: int, output_points: int) -> dict:
+    return {
+        "mode": mode,
+        "input_rows": input_rows,
+        "output_points": output_points,
+        "reduction_ratio": round(input_rows / output_points, 2) if output_points else None
+    }
+
+
+# =====================================================
+# Line decimation (row selection)
+# =====================================================
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets: positions of the points to keep."""
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    # n_out - 2 buckets between the (always kept) first and last point
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0] = 0
+    keep[-1] = n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+
+        a = start + int(np.argmax(area))
+        keep[i + 1] = a
+
+    return keep
+
+
+def minmax_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """Keep the min and max of each bucket, preserving spikes exactly."""
+    n = len(y)
+    buckets = n_out // 2
+    if n_out >= n or buckets < 1:
+        return np.arange(n)
+
+    edges = np.linspace(0, n, buckets + 1).astype(np.int64)
+
+    keep = []
+    for start, end in zip(edges[:-1], edges[1:]):
+        if end > start:
+            bucket = y[start:end]
+            keep.append(start + int(np.argmin(bucket)))
+            keep.append(start + int(np.argmax(bucket)))
+
+    return np.unique(keep)
+
+
+def decimate_line(df: pd.DataFrame, x: str, y: str, color: str | None,
+                  max_points: int, method: str = "lttb") -> pd.DataFrame:
+    """Reduce a line chart's rows to about ``max_points``, per color series."""
+    df = df.dropna(subset=[x, y]).sort_values(x, kind="stable")
+
+    groups = [df] if not color else [g for _, g in df.groupby(color, sort=False, observed=True)]
+    budget = max(max_points // max(len(groups), 1), 3)
+
+    kept = []
+    for group in groups:
+        yv = group[y].to_numpy(dtype="float64", na_value=np.nan)
+
+        if method == "minmax":
+            idx = minmax_indices(yv, budget)
+        else:
+            idx = lttb_indices(numeric_axis(group[x]), yv, budget)
+
+        kept.append(group.iloc[idx])
+
+    return pd.concat(kept) if len(kept) > 1 else kept[0]
+
+
+# =====================================================
+# Binning (aggregate instead of ship)
+# =====================================================
+
+def bin_2d(x: np.ndarray, y: np.ndarray, max_cells: int):
+    """2D histogram of (x, y) with about ``max_cells`` cells."""
+    valid = np.isfinite(x) & np.isfinite(y)
+    bins = max(int(np.sqrt(max_cells)), 2)
+
+    counts, x_edges, y_edges = np.histogram2d(x[valid], y[valid], bins=bins)
+
+    x_centers = (x_edges[:-1] + x_edges[1:]) / 2
+    y_centers = (y_edges[:-1] + y_edges[1:]) / 2
+
+    return counts, x_centers, y_centers
+
+
+def histogram_counts(df: pd.DataFrame, x: str, color: str | None,
+                     nbins: int | None = None) -> pd.DataFrame:
+    """
+    Bin counts for a histogram, one row per (bin, color).
+
+    Numeric columns are binned with NumPy using edges shared across
+    colors; other columns are counted per distinct value.
+    """
+    keys = [x] if not color else [x, color]
+    data = df[keys].dropna(subset=[x])
+
+    if not pd.api.types.is_numeric_dtype(data[x]) or pd.api.types.is_bool_dtype(data[x]):
+        return (
+            data.groupby(keys, sort=False, observed=True)
+            .size()
+            .reset_index(name="count")
+        )
+
+    values = data[x].to_numpy(dtype="float64")
+    edges = np.histogram_bin_edges(values, bins=nbins or "auto")
+    # "auto" can explode on heavy-tailed data; cap the bin count
+    if len(edges) > 1001:
+        edges = np.histogram_bin_edges(values, bins=1000)
+    centers = (edges[:-1] + edges[1:]) / 2
+
+    if not color:
+        counts, _ = np.histogram(values, bins=edges)
+        return pd.DataFrame({x: centers, "count": counts})
+
+    frames = []
+    for key, group in data.groupby(color, sort=False, observed=True):
+        counts, _ = np.histogram(group[x].to_numpy(dtype="float64"), bins=edges)
+        frames.append(pd.DataFrame({x: centers, color: key, "count": counts}))
+
+    return pd.concat(frames, ignore_index=True)
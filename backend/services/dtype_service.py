@@ -0,0 +1,116 @@
+import numpy as np
+import pandas as pd
+
+from core.config import CATEGORY_MAX_UNIQUE_RATIO
+
+
+# =====================================================
+# Ingest-time dtype optimization
+# =====================================================
+#
+# The CSV readers hand back int64/float64 for every number and object
+# for every string. Here each column gets the smallest dtype that holds
+# its values exactly:
+#
+# - integers are downcast (int8/16/32)
+# - floats stay float64: float32 storage would make every later sum and
+#   mean accumulate in float32, even when the stored values survive the
+#   round trip; whole-number floats with gaps become nullable integers
+#   (Int8..Int64)
+# - ±inf is treated as missing
+# - strings become category when they repeat enough, otherwise
+#   Arrow-backed strings; true/false columns with gaps become "boolean"
+#
+# Missing values stay as NaN / NA in typed columns instead of pushing
+# the column to object dtype.
+
+STRING_DTYPE = pd.StringDtype("pyarrow")
+
+
+def _optimize_float(series: pd.Series) -> pd.Series:
+    values = series.to_numpy()
+
+    infinite = np.isinf(values)
+    if infinite.any():
+        values = np.where(infinite, np.nan, values)
+        series = pd.Series(values, index=series.index, name=series.name)
+
+    missing = np.isnan(values)
+    present = values[~missing]
+
+    # An integer column with gaps: the CSV readers promote it to float
+    if missing.any() and len(present) and np.array_equal(present, np.trunc(present)):
+        if np.abs(present).max() < 2 ** 53:
+            whole = series.astype("Int64")
+            return pd.to_numeric(whole, downcast="integer")
+
+    return series
+
+
+def _optimize_object(series: pd.Series) -> pd.Series:
+    kind = pd.api.types.infer_dtype(series, skipna=True)
+
+    if kind == "boolean":
+        return series.astype("boolean")
+
+    if kind not in ("string", "empty"):
+        return series
+
+    non_null = series.count()
+    if non_null and series.nunique() <= CATEGORY_MAX_UNIQUE_RATIO * non_null:
+        return series.astype("category")
+
+    return series.astype(STRING_DTYPE)
+
+
+def optimize_column(series: pd.Series) -> pd.Series:
+    dtype = series.dtype
+
+    if pd.api.types.is_bool_dtype(dtype):
+        return series
+
+    if pd.api.types.is_integer_dtype(dtype) and isinstance(dtype, np.dtype):
+        return pd.to_numeric(series, downcast="integer")
+
+    if pd.api.types.is_float_dtype(dtype) and isinstance(dtype, np.dtype):
+        return _optimize_float(series)
+
+    if dtype == object:
+        return _optimize_object(series)
+
+    return series
+
+
+def optimize_dtypes(df: pd.DataFrame):
+    """
+    Return ``df`` with compact dtypes and a memory report.
+
+    The report lists bytes before/after and every column whose dtype
+    changed.
+    """
+    before = df.memory_usage(deep=True)
+
+    optimized = df.assign(**{col: optimize_column(df[col]) for col in df.columns})
+
+    after = optimized.memory_usage(deep=True)
+
+    before_bytes = int(before.sum())
+    after_bytes = int(after.sum())
+
+    report = {
+        "memory_before_bytes": before_bytes,
+        "memory_after_bytes": after_bytes,
+        "reduction_ratio": round(before_bytes / after_bytes, 2) if after_bytes else None,
+        "columns": {
+            col: {
+                "before": str(df[col].dtype),
+                "after": str(optimized[col].dtype),
+                "bytes_before": int(before[col]),
+                "bytes_after": int(after[col])
+            }
+            for col in df.columns
+            if optimized[col].dtype != df[col].dtype
+        }
+    }
+
+    return optimized, report
@@ -0,0 +1,159 @@
+import io
+
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+from core.config import EXPORT_BATCH_ROWS
+from services.dataset_store import open_dataset_table
+from services.serialize_service import dumps
+
+
+# =====================================================
+# Formats
+# =====================================================
+#
+# Exports are streamed straight from the memory-mapped Arrow files of
+# the dataset store, one record batch at a time. Nothing is written to
+# the working directory and the first bytes go out after the first
+# batch, however large the dataset is.
+
+EXPORT_FORMATS = {
+    "csv": {"extension": "csv", "media_type": "text/csv"},
+    "jsonl": {"extension": "jsonl", "media_type": "application/x-ndjson"},
+    "parquet": {"extension": "parquet", "media_type": "application/vnd.apache.parquet"},
+    "arrow": {"extension": "arrow", "media_type": "application/vnd.apache.arrow.stream"}
+}
+
+COMPRESSIONS = {
+    "gzip": {"extension": "gz", "media_type": "application/gzip"},
+    "zstd": {"extension": "zst", "media_type": "application/zstd"}
+}
+
+
+def export_filename(name: str, fmt: str, compression: str | None = None) -> str:
+    filename = f"{name}.{EXPORT_FORMATS[fmt]['extension']}"
+
+    # Parquet compresses internally; the file stays a .parquet
+    if compression and fmt != "parquet":
+        filename += f".{COMPRESSIONS[compression]['extension']}"
+
+    return filename
+
+
+def export_media_type(fmt: str, compression: str | None = None) -> str:
+    if compression and fmt != "parquet":
+        return COMPRESSIONS[compression]["media_type"]
+
+    return EXPORT_FORMATS[fmt]["media_type"]
+
+
+def validate_export(fmt: str, compression: str | None = None):
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format {fmt}")
+
+    if compression and compression not in COMPRESSIONS:
+        raise ValueError(f"Unsupported compression {compression}")
+
+
+# =====================================================
+# Streaming writers
+# =====================================================
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands back whatever was written since the last drain."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _write_csv(sink, batches, schema):
+    options = pa_csv.WriteOptions(quoting_style="needed")
+
+    with pa_csv.CSVWriter(sink, schema, write_options=options) as writer:
+        for batch in batches:
+            writer.write_batch(batch)
+            yield
+
+
+def _write_jsonl(sink, batches, schema):
+    for batch in batches:
+        # orjson writes floats with full precision (they round-trip, like
+        # the other formats) and NaN/inf as null
+        sink.write(b"".join(dumps(row) + b"\n" for row in batch.to_pylist()))
+        yield
+
+
+def _write_parquet(sink, batches, schema, compression):
+    with pq.ParquetWriter(sink, schema, compression=compression or "snappy") as writer:
+        for batch in batches:
+            # One row group per batch
+            writer.write_batch(batch)
+            yield
+
+
+def _write_arrow(sink, batches, schema):
+    with pa.ipc.new_stream(sink, schema) as writer:
+        for batch in batches:
+            writer.write_batch(batch)
+            yield
+
+
+def stream_table(table: pa.Table, fmt: str, compression: str | None = None,
+                 batch_rows: int = EXPORT_BATCH_ROWS):
+    """
+    Yield ``table`` encoded as ``fmt``, one record batch at a time.
+
+    ``compression`` ("gzip" or "zstd") wraps the byte stream, except for
+    Parquet, which uses it as its column codec.
+    """
+    validate_export(fmt, compression)
+
+    batches = table.to_batches(max_chunksize=batch_rows)
+
+    chunks = _ChunkSink()
+    sink = pa.PythonFile(chunks, mode="w")
+
+    if compression and fmt != "parquet":
+        sink = pa.CompressedOutputStream(sink, compression)
+
+    if fmt == "parquet":
+        steps = _write_parquet(sink, batches, table.schema, compression)
+    elif fmt == "arrow":
+        steps = _write_arrow(sink, batches, table.schema)
+    elif fmt == "jsonl":
+        steps = _write_jsonl(sink, batches, table.schema)
+    else:
+        steps = _write_csv(sink, batches, table.schema)
+
+    for _ in steps:
+        data = chunks.drain()
+        if data:
+            yield data
+
+    # Writers are closed by now; closing the sink flushes the compressor
+    sink.close()
+
+    data = chunks.drain()
+    if data:
+        yield data
+
+
+def stream_export(name: str, fmt: str, compression: str | None = None,
+                  batch_rows: int = EXPORT_BATCH_ROWS):
+    """Yield the current version of dataset ``name`` encoded as ``fmt``."""
+    validate_export(fmt, compression)
+
+    yield from stream_table(open_dataset_table(name), fmt, compression, batch_rows)
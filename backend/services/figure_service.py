@@ -0,0 +1,152 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import NamedTuple
+
+from core.config import FIGURE_CACHE_MAX_BYTES
+from services.cache_service import stable_hash
+from services.serialize_service import dumps
+
+
+# =====================================================
+# Rendered figure cache
+# =====================================================
+#
+# Dashboards request the same charts over and over. A /plot response
+# depends only on the dataset version and the chart config, so the
+# rendered result is kept in memory under both:
+#
+# - the key is the dataset id and version plus the canonical config
+#   (keys that do not affect the chart dropped, filters sorted), so a
+#   new version never sees an older figure
+# - entries hold the response already encoded as JSON; a hit skips
+#   filtering, aggregation, the Plotly build and the encoding
+# - the cache is bounded by the size of those bytes
+#   (FIGURE_CACHE_MAX_MB), least recently used first out
+# - every entry has an ETag (hash of its bytes); a request sending it
+#   back in If-None-Match gets 304 without a body
+#
+# The insights_id differs per request and is added to the cached bytes
+# on the way out.
+
+# Config keys the rendered chart depends on
+FIGURE_CONFIG_KEYS = (
+    "chart_type", "x", "y", "color", "aggregation",
+    "approximate", "max_points", "downsample", "nbins",
+    "method", "sample_rows", "cluster"
+)
+
+
+class CachedFigure(NamedTuple):
+    # {"plot", "render", "approximate"} encoded as a JSON object
+    body: bytes
+    etag: str
+    chart_context: dict
+
+
+_lock = threading.Lock()
+_figures: OrderedDict = OrderedDict()
+_bytes = 0
+_stats = {"hits": 0, "misses": 0, "not_modified": 0, "evictions": 0}
+
+
+def canonical_config(config: dict) -> dict:
+    """Chart config reduced to what the figure depends on, in a fixed form."""
+    canonical = {
+        key: config[key]
+        for key in FIGURE_CONFIG_KEYS
+        if config.get(key) is not None
+    }
+
+    if not canonical.get("approximate"):
+        canonical.pop("approximate", None)
+
+    # Filters are ANDed, so their order does not matter
+    filters = config.get("filters") or []
+    if filters:
+        canonical["filters"] = sorted(filters, key=stable_hash)
+
+    return canonical
+
+
+def figure_key(dataset_id: str, version: int, config: dict) -> str:
+    return stable_hash(dataset_id, version, canonical_config(config))
+
+
+def get_figure(key: str) -> CachedFigure | None:
+    with _lock:
+        figure = _figures.get(key)
+
+        if figure is None:
+            _stats["misses"] += 1
+            return None
+
+        _figures.move_to_end(key)
+        _stats["hits"] += 1
+        return figure
+
+
+def store_figure(key: str, response: dict, chart_context: dict) -> CachedFigure:
+    """Encode a /plot response (without insights_id) and cache it."""
+    global _bytes
+
+    body = dumps(response)
+    figure = CachedFigure(
+        body=body,
+        etag='"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"',
+        chart_context=chart_context
+    )
+
+    # Larger than the whole cache: served, never kept
+    if len(body) > FIGURE_CACHE_MAX_BYTES:
+        return figure
+
+    with _lock:
+        previous = _figures.pop(key, None)
+        if previous is not None:
+            _bytes -= len(previous.body)
+
+        _figures[key] = figure
+        _bytes += len(body)
+
+        while _bytes > FIGURE_CACHE_MAX_BYTES:
+            _, evicted = _figures.popitem(last=False)
+            _bytes -= len(evicted.body)
+            _stats["evictions"] += 1
+
+    return figure
+
+
+def figure_body(figure: CachedFigure, insights_id: str) -> bytes:
+    """Response bytes: the cached JSON object with insights_id appended."""
+    return figure.body[:-1] + b',"insights_id":' + dumps(insights_id) + b"}"
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Whether an If-None-Match header names ``etag`` (weak match)."""
+    if not if_none_match:
+        return False
+
+    if if_none_match.strip() == "*":
+        return True
+
+    tags = (tag.strip() for tag in if_none_match.split(","))
+    return etag in (tag[2:] if tag.startswith("W/") else tag for tag in tags)
+
+
+def record_not_modified():
+    with _lock:
+        _stats["not_modified"] += 1
+
+
+def figure_cache_info() -> dict:
+    with _lock:
+        lookups = _stats["hits"] + _stats["misses"]
+
+        return {
+            **_stats,
+            "hit_rate": _stats["hits"] / lookups if lookups else None,
+            "entries": len(_figures),
+            "bytes": _bytes,
+            "max_bytes": FIGURE_CACHE_MAX_BYTES
+        }
@@ -0,0 +1,147 @@
+import operator
+
+import numpy as np
+import pandas as pd
+
+from services.index_service import index_rows
+
+
+# =====================================================
+# Predicate engine
+# =====================================================
+#
+# Shared by plot_service, query_service and transform_service. All
+# conditions are folded into one boolean mask, and rows are taken once
+# at the end, only for the columns the caller actually needs.
+#
+# Columns filtered repeatedly get a sorted index (index_service); a
+# selective condition is then answered by binary search instead of a
+# full scan, and under AND the other conditions are only evaluated on
+# the rows it matched.
+
+OPERATORS = {
+    "==": operator.eq,
+    ">": operator.gt,
+    "<": operator.lt,
+    ">=": operator.ge,
+    "<=": operator.le
+}
+
+
+def _validate(df: pd.DataFrame, condition: dict):
+    if condition["column"] not in df.columns:
+        raise ValueError(f"Column '{condition['column']}' not found")
+
+    if condition["operator"] not in OPERATORS:
+        raise ValueError(f"Unsupported operator {condition['operator']}")
+
+
+def _rows_mask(n: int, rows: np.ndarray) -> np.ndarray:
+    mask = np.zeros(n, dtype=bool)
+    mask[rows] = True
+    return mask
+
+
+def _scan(series: pd.Series, op: str, val) -> np.ndarray:
+    # Categoricals: evaluate once per category, then look up by code
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        categories = pd.Series(series.cat.categories)
+        matches = OPERATORS[op](categories, val).to_numpy(dtype=bool, na_value=False)
+        # Code -1 (missing) picks the appended False
+        return np.append(matches, False)[series.cat.codes.to_numpy()]
+
+    # Missing values never match
+    return OPERATORS[op](series, val).to_numpy(dtype=bool, na_value=False)
+
+
+def _lookup(df: pd.DataFrame, condition: dict) -> np.ndarray | None:
+    return index_rows(df[condition["column"]], condition["operator"], condition["value"])
+
+
+def _mask(df: pd.DataFrame, condition: dict, rows: np.ndarray | None) -> np.ndarray:
+    # ``rows`` is the index lookup already made for this condition
+    if rows is not None:
+        return _rows_mask(len(df), rows)
+
+    return _scan(df[condition["column"]], condition["operator"], condition["value"])
+
+
+def condition_mask(df: pd.DataFrame, condition: dict) -> np.ndarray:
+    _validate(df, condition)
+
+    return _mask(df, condition, _lookup(df, condition))
+
+
+def _indexed_and(df: pd.DataFrame, conditions: list, lookups: list):
+    """AND of ``conditions`` driven by the most selective indexed one, or None."""
+    best = None
+    for i, rows in enumerate(lookups):
+        if rows is not None and (best is None or len(rows) < len(best[1])):
+            best = (i, rows)
+
+    if best is None:
+        return None
+
+    driver, rows = best
+    for i, c in enumerate(conditions):
+        if i != driver and len(rows):
+            subset = df[c["column"]].take(rows)
+            rows = rows[_scan(subset, c["operator"], c["value"])]
+
+    return _rows_mask(len(df), rows)
+
+
+def build_mask(df: pd.DataFrame, conditions: list, logic: str = "AND"):
+    """Single boolean mask for all conditions, or None if there are none."""
+    for condition in conditions:
+        _validate(df, condition)
+
+    # One lookup per condition: each counts as a use of the column's
+    # index (built on the second) and as one lookup or scan in the stats
+    lookups = [_lookup(df, condition) for condition in conditions]
+
+    if logic == "AND" and len(conditions) > 1:
+        mask = _indexed_and(df, conditions, lookups)
+        if mask is not None:
+            return mask
+
+    combine = np.logical_and if logic == "AND" else np.logical_or
+
+    mask = None
+
+    for condition, rows in zip(conditions, lookups):
+        m = _mask(df, condition, rows)
+
+        if mask is None:
+            mask = m
+        else:
+            combine(mask, m, out=mask)
+
+    return mask
+
+
+def select_rows(
+    df: pd.DataFrame,
+    conditions: list | None = None,
+    logic: str = "AND",
+    columns: list | None = None
+) -> pd.DataFrame:
+    """
+    Rows matching ``conditions``, restricted to ``columns``.
+
+    Without conditions this is a column subset of ``df`` (shared buffers
+    under copy-on-write); otherwise only the selected rows of the
+    requested columns are materialized.
+    """
+    mask = build_mask(df, conditions, logic) if conditions else None
+
+    if columns is not None:
+        columns = list(dict.fromkeys(columns))
+
+    if mask is None:
+        return df if columns is None else df[columns]
+
+    if columns is None:
+        return df[mask]
+
+    return df.loc[mask, columns]
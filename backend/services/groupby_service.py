@@ -0,0 +1,219 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from core.config import GROUPBY_PARALLEL_MIN_ROWS, GROUPBY_WORKERS
+
+
+# =====================================================
+# Partitioned parallel groupby
+# =====================================================
+#
+# pandas runs a groupby on one core. Above GROUPBY_PARALLEL_MIN_ROWS
+# the rows are split into one contiguous chunk per worker instead:
+#
+# - sum / count / size / min / max / mean: every chunk groups and
+#   aggregates its own rows (key factorization included), the partials
+#   are merged per group (mean = merged sum / merged count)
+# - median does not merge; keys are factorized once into group
+#   numbers, the groups split into ranges of about equal row count and
+#   each worker computes the exact medians of its groups
+#
+# Workers are threads: the grouping and aggregation kernels release the
+# GIL for numeric and categorical keys, and chunks are views, so
+# nothing is copied to reach a worker. Object / string keys hold the
+# GIL while hashing and gain little.
+#
+# Groups come out in the same order as the serial groupby: merging the
+# partials in chunk order keeps first-seen order, sort=True sorts.
+
+MERGEABLE = {"sum", "count", "size", "min", "max", "mean"}
+
+_executor = ThreadPoolExecutor(
+    max_workers=GROUPBY_WORKERS,
+    thread_name_prefix="groupby"
+)
+
+
+def _serial(target: pd.Series, keys, aggregation: str, sort: bool) -> pd.Series:
+    grouped = target.groupby(keys, sort=sort, observed=True)
+
+    if aggregation == "size":
+        return grouped.size()
+
+    return grouped.agg(aggregation)
+
+
+def _slice(keys, start: int, stop: int):
+    if isinstance(keys, list):
+        return [k.iloc[start:stop] for k in keys]
+    return keys.iloc[start:stop]
+
+
+def _result_dtype(target: pd.Series, aggregation: str):
+    """dtype of the serial result where the parallel path would differ."""
+    if aggregation in ("count", "size"):
+        return None
+
+    # float32 partials are summed in float64, then rounded once
+    if target.dtype == np.float32:
+        return np.float32
+
+    if aggregation == "median" and isinstance(target.dtype, pd.core.dtypes.dtypes.BaseMaskedDtype):
+        return "Float64"
+
+    return None
+
+
+def _bounds(rows: int, parts: int) -> list:
+    edges = np.linspace(0, rows, parts + 1).astype(int)
+    return list(zip(edges[:-1], edges[1:]))
+
+
+# -------------------- Merge by group --------------------
+
+def _merged(target, keys, aggregation: str, sort: bool, workers: int) -> pd.Series:
+    def partial(bounds):
+        start, stop = bounds
+        chunk = target.iloc[start:stop]
+        if chunk.dtype == np.float32:
+            chunk = chunk.astype(np.float64)
+
+        grouped = chunk.groupby(
+            _slice(keys, start, stop), sort=False, observed=True
+        )
+
+        if aggregation == "size":
+            return grouped.size()
+        if aggregation == "mean":
+            return grouped.agg(["sum", "count"])
+        return grouped.agg(aggregation)
+
+    partials = list(_executor.map(partial, _bounds(len(target), workers)))
+
+    combined = pd.concat(partials)
+    levels = list(range(combined.index.nlevels))
+    merged = combined.groupby(level=levels, sort=sort, observed=True)
+
+    if aggregation == "mean":
+        totals = merged.sum()
+        result = totals["sum"] / totals["count"]
+        return result.rename(target.name)
+
+    if aggregation in ("min", "max"):
+        return merged.agg(aggregation)
+
+    # sum, count and size add up
+    return merged.sum()
+
+
+# -------------------- Partition by group --------------------
+
+def _group_codes(keys, sort: bool):
+    """
+    (group number per row, -1 for a missing key; group index) numbered
+    like the serial groupby, or None if the key space is too large.
+    """
+    keys = keys if isinstance(keys, list) else [keys]
+    factorized = [pd.factorize(k, sort=sort) for k in keys]
+
+    if len(keys) == 1:
+        codes, uniques = factorized[0]
+        return codes, uniques.rename(keys[0].name)
+
+    if np.prod([float(len(u)) for _, u in factorized]) >= 2 ** 62:
+        return None
+
+    # One integer per key combination, numbered again in key order
+    combined = np.zeros(len(keys[0]), dtype=np.int64)
+    missing = np.zeros(len(keys[0]), dtype=bool)
+    for codes, uniques in factorized:
+        combined = combined * len(uniques) + codes
+        missing |= codes < 0
+
+    codes, uniques = pd.factorize(np.where(missing, -1, combined), sort=sort)
+    if missing.any():
+        # The -1 placeholder is a "group" of its own; drop it
+        placeholder = int(np.flatnonzero(uniques == -1)[0])
+        uniques = np.delete(uniques, placeholder)
+        codes = np.where(codes == placeholder, -1, codes - (codes > placeholder))
+
+    levels = []
+    for k, (_, key_uniques) in zip(reversed(keys), reversed(factorized)):
+        uniques, level_codes = np.divmod(uniques, len(key_uniques))
+        levels.append(key_uniques.take(level_codes).rename(k.name))
+
+    return codes, pd.MultiIndex.from_arrays(levels[::-1])
+
+
+def _partitioned_median(target, keys, sort: bool, workers: int) -> pd.Series | None:
+    grouping = _group_codes(keys, sort)
+    if grouping is None:
+        return None
+
+    codes, index = grouping
+    if not len(index):
+        return None
+
+    values = target.to_numpy(dtype="float64", na_value=np.nan)
+
+    # Group ranges of about equal row count
+    ends = np.cumsum(np.bincount(codes[codes >= 0], minlength=len(index)))
+    cuts = np.searchsorted(ends, np.linspace(0, ends[-1], workers + 1)[1:-1])
+    edges = np.concatenate([[0], cuts, [len(index)]])
+
+    def medians(bounds):
+        first, last = bounds
+        if first == last:
+            return np.empty(0)
+
+        # Each worker finds its own rows: a parallel pass over the codes
+        # instead of a serial sort
+        rows = np.flatnonzero((codes >= first) & (codes < last))
+
+        # Group numbers as categorical codes: grouped without hashing
+        groups = pd.Categorical.from_codes(codes[rows] - first, pd.RangeIndex(last - first))
+        return pd.Series(values[rows]).groupby(groups, observed=False).median().to_numpy()
+
+    parts = list(_executor.map(medians, zip(edges[:-1], edges[1:])))
+
+    return pd.Series(np.concatenate(parts), index=index, name=target.name)
+
+
+# -------------------- Entry point --------------------
+
+def groupby_aggregate(
+    target: pd.Series,
+    keys,
+    aggregation: str,
+    sort: bool = False,
+    workers: int | None = None
+) -> pd.Series:
+    """
+    ``target.groupby(keys, sort=sort, observed=True).agg(aggregation)``
+    ("size" for group sizes), spread over ``workers`` threads
+    (default GROUPBY_WORKERS) for large inputs.
+
+    ``keys`` is a Series or a list of Series aligned with ``target``.
+    Other aggregations, non-numeric medians and inputs under
+    GROUPBY_PARALLEL_MIN_ROWS run serially.
+    """
+    workers = min(workers or GROUPBY_WORKERS, GROUPBY_WORKERS)
+
+    parallel = workers > 1 and len(target) >= GROUPBY_PARALLEL_MIN_ROWS
+
+    numeric = pd.api.types.is_numeric_dtype(target.dtype) and not pd.api.types.is_bool_dtype(target.dtype)
+
+    if parallel and aggregation in MERGEABLE:
+        result = _merged(target, keys, aggregation, sort, workers)
+    elif parallel and aggregation == "median" and numeric:
+        result = _partitioned_median(target, keys, sort, workers)
+    else:
+        result = None
+
+    if result is None:
+        return _serial(target, keys, aggregation, sort)
+
+    dtype = _result_dtype(target, aggregation)
+    return result if dtype is None else result.astype(dtype)
@@ -0,0 +1,427 @@
+import hashlib
+import io
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import numpy as np
+import pandas as pd
+
+from core.config import IMAGE_CACHE_MAX_BYTES, IMAGE_WORKERS
+from services.downsample_service import (
+    bin_2d,
+    decimate_line,
+    histogram_counts,
+    numeric_axis,
+    render_info
+)
+from services.plot_service import heatmap_columns, prepare_plot_data, render_budget
+
+
+# =====================================================
+# Static chart images
+# =====================================================
+#
+# PNG / SVG rendering of the same chart configs as /plot, for reports
+# and thumbnails:
+#
+# - the data is prepared like for /plot (filters, aggregation, the
+#   render budget: line decimation, scatter density, binned
+#   histograms, box plot statistics), so what reaches the renderer is
+#   small whatever the dataset size
+# - that prepared data is the image spec; its hash identifies the
+#   image, and images are cached by it (IMAGE_CACHE_MAX_MB, LRU), so
+#   the same picture from another dataset version or config is not
+#   drawn twice
+# - drawing uses matplotlib's object-oriented API on an Agg canvas: no
+#   pyplot, no global figure state
+# - matplotlib holds the GIL while drawing, so images are drawn in a
+#   pool of IMAGE_WORKERS processes (0 draws in the calling thread);
+#   only the small spec is sent there
+# - matplotlib is imported on first use (box statistics, drawing), so
+#   importing the API and starting the pool processes does not pay for
+#   it; warm_image_pool() starts the processes and loads it in advance
+
+IMAGE_FORMATS = {"png": "image/png", "svg": "image/svg+xml"}
+
+# Text x axis of a line / scatter chart: at most one labelled tick per
+# this many pixels of width, labels cut to this many characters
+TEXT_TICK_PIXELS = 80
+TEXT_TICK_CHARS = 16
+
+_lock = threading.Lock()
+_images: OrderedDict = OrderedDict()
+_bytes = 0
+_stats = {"hits": 0, "misses": 0, "evictions": 0, "render_seconds": 0.0}
+
+_pool = None
+
+
+def _executor() -> ProcessPoolExecutor:
+    global _pool
+
+    # Started on first use; spawned, since forking a threaded server
+    # can copy held locks
+    with _lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=IMAGE_WORKERS,
+                mp_context=get_context("spawn")
+            )
+        return _pool
+
+
+# =====================================================
+# Image spec (prepared data)
+# =====================================================
+
+def _values(series: pd.Series) -> np.ndarray:
+    """Plain NumPy values matplotlib can draw (NaN for missing)."""
+    if pd.api.types.is_datetime64_any_dtype(series.dtype):
+        return series.dt.tz_localize(None).to_numpy() if series.dt.tz else series.to_numpy()
+
+    if pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype):
+        return series.to_numpy(dtype="float64", na_value=np.nan)
+
+    return series.astype(str).to_numpy(dtype=object)
+
+
+def _series(df: pd.DataFrame, x: str, y: str | None, color: str | None) -> list:
+    """(label, x values, y values) per color group."""
+    groups = [(None, df)] if not color else [
+        (str(key), group) for key, group in df.groupby(color, sort=False, observed=True)
+    ]
+
+    return [
+        (label, _values(group[x]), _values(group[y]) if y else None)
+        for label, group in groups
+    ]
+
+
+def _label(value) -> str:
+    text = str(value)
+    return text if len(text) <= TEXT_TICK_CHARS else text[:TEXT_TICK_CHARS - 1] + "…"
+
+
+def _text_axis(plot_df: pd.DataFrame, x: str, width: int):
+    """
+    Text x values replaced by their rank among the sorted distinct
+    values, plus (positions, labels) of a few ticks; matplotlib would
+    otherwise make every value a category with its own tick.
+    """
+    series = plot_df[x]
+    if (
+        pd.api.types.is_datetime64_any_dtype(series.dtype)
+        or (pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype))
+    ):
+        return plot_df, None
+
+    codes, uniques = pd.factorize(series, sort=True)
+    plot_df = plot_df.assign(**{x: np.where(codes < 0, np.nan, codes)})
+
+    ticks = max(2, width // TEXT_TICK_PIXELS)
+    step = max(1, -(-len(uniques) // ticks))
+    positions = list(range(0, len(uniques), step))
+
+    return plot_df, (positions, [_label(uniques[p]) for p in positions])
+
+
+def image_spec(plot_df: pd.DataFrame, config: dict, fmt: str, width: int, height: int, dpi: int):
+    """
+    (spec, render info) for data prepared by prepare_plot_data().
+
+    The spec holds everything the drawing needs and nothing else.
+    """
+    if fmt not in IMAGE_FORMATS:
+        raise ValueError(f"Unsupported image format: {fmt}")
+
+    chart_type = config["chart_type"]
+    x = config.get("x")
+    y = config.get("y")
+    color = config.get("color")
+
+    max_points = render_budget(config)
+    over_budget = bool(max_points) and len(plot_df) > max_points
+
+    input_rows = len(plot_df)
+    mode = "full"
+    output_points = input_rows
+
+    spec = {
+        "kind": chart_type,
+        "format": fmt,
+        "size": (width, height, dpi),
+        "title": f"{chart_type.capitalize()} Plot",
+        "labels": (x, y)
+    }
+
+    if chart_type in ("line", "scatter", "bar", "box") and not (x and y):
+        raise ValueError(f"{chart_type.capitalize()} chart requires x and y")
+
+    if chart_type in ("line", "scatter") and x:
+        plot_df, spec["ticks"] = _text_axis(plot_df, x, width)
+
+    if chart_type == "line":
+        if over_budget:
+            mode = config.get("downsample", "lttb")
+            plot_df = decimate_line(plot_df, x, y, color, max_points, mode)
+        else:
+            plot_df = plot_df.dropna(subset=[x, y]).sort_values(x, kind="stable")
+        output_points = len(plot_df)
+        spec["series"] = _series(plot_df, x, y, color)
+
+    elif chart_type == "scatter":
+        if over_budget:
+            mode = "density"
+            counts, x_centers, y_centers = bin_2d(
+                numeric_axis(plot_df[x]), numeric_axis(plot_df[y]), max_points
+            )
+            output_points = int(np.count_nonzero(counts))
+            spec.update(kind="density", counts=counts.T, x=x_centers, y=y_centers)
+        else:
+            spec["series"] = _series(plot_df, x, y, color)
+
+    elif chart_type == "bar":
+        spec["series"] = _series(plot_df, x, y, color)
+
+    elif chart_type == "histogram":
+        if not x:
+            raise ValueError("Histogram requires x")
+
+        # Always binned here: drawing one bar per bin is all it takes
+        counts = histogram_counts(plot_df, x, color, config.get("nbins"))
+        mode = "binned"
+        output_points = len(counts)
+        spec["labels"] = (x, "count")
+        spec["series"] = _series(counts, x, "count", color)
+
+    elif chart_type == "box":
+        # Quartiles and whiskers only; outliers capped to the budget
+        from matplotlib.cbook import boxplot_stats
+
+        stats = []
+        for key, group in plot_df.groupby(x, sort=True, observed=True):
+            values = _values(group[y])
+            values = values[~np.isnan(values)]
+            if len(values):
+                box = boxplot_stats(values, labels=[str(key)])[0]
+                box["fliers"] = box["fliers"][:max_points or None]
+                stats.append(box)
+
+        output_points = len(stats)
+        mode = "summary"
+        spec["boxes"] = stats
+
+    elif chart_type == "heatmap":
+        if plot_df.shape[1] < 2:
+            raise ValueError("Heatmap requires at least 2 numeric columns")
+
+        matrix = plot_df.to_numpy()
+        keep = heatmap_columns(plot_df, config, max_points)
+        if len(keep) < len(matrix):
+            mode = "top_columns"
+
+        input_rows = plot_df.attrs["correlation"]["total_rows"]
+        output_points = len(keep) ** 2
+        spec.update(
+            title=f"Correlation Heatmap ({plot_df.attrs['correlation']['method']})",
+            matrix=np.nan_to_num(matrix[np.ix_(keep, keep)], nan=0.0),
+            columns=[str(plot_df.columns[i]) for i in keep]
+        )
+
+    else:
+        raise ValueError("Unsupported chart type")
+
+    return spec, render_info(mode, input_rows, output_points)
+
+
+def spec_hash(spec: dict) -> str:
+    return hashlib.sha256(pickle.dumps(spec, protocol=5)).hexdigest()
+
+
+def prepare_image(
+    df: pd.DataFrame,
+    config: dict,
+    fmt: str = "png",
+    width: int = 640,
+    height: int = 480,
+    dpi: int = 100,
+    dataset_key: tuple | None = None
+):
+    """(spec, spec hash, render info) of a chart config over ``df``."""
+    plot_df = prepare_plot_data(df, config, dataset_key)
+    spec, render = image_spec(plot_df, config, fmt, width, height, dpi)
+
+    return spec, spec_hash(spec), render
+
+
+# =====================================================
+# Drawing (runs in the pool processes)
+# =====================================================
+
+def _draw_series(ax, spec: dict):
+    kind = spec["kind"]
+    series = spec["series"]
+
+    for i, (label, xs, ys) in enumerate(series):
+        if kind == "line":
+            ax.plot(xs, ys, label=label, linewidth=1)
+
+        elif kind == "scatter":
+            ax.scatter(xs, ys, label=label, s=8)
+
+        elif kind == "histogram" and xs.dtype.kind == "f":
+            step = np.min(np.diff(xs)) if len(xs) > 1 else 1.0
+            ax.bar(xs, ys, width=step, label=label, alpha=0.7 if len(series) > 1 else 1.0)
+
+        else:
+            # Categorical bars, side by side per color
+            positions = {value: p for p, value in enumerate(
+                dict.fromkeys(v for _, s, _ in series for v in s)
+            )}
+            width = 0.8 / len(series)
+            offsets = np.array([positions[v] for v in xs]) - 0.4 + width * (i + 0.5)
+            ax.bar(offsets, ys, width=width, label=label)
+
+            if i == len(series) - 1:
+                ax.set_xticks(range(len(positions)), list(positions), rotation=45, ha="right")
+
+    if any(label is not None for label, _, _ in series):
+        ax.legend(fontsize="small")
+
+
+def render_spec(spec: dict) -> bytes:
+    """Draw an image spec; returns the encoded image."""
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    width, height, dpi = spec["size"]
+
+    fig = Figure(figsize=(width / dpi, height / dpi), dpi=dpi, layout="tight")
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+
+    kind = spec["kind"]
+
+    if kind == "density":
+        image = ax.pcolormesh(spec["x"], spec["y"], np.where(spec["counts"] > 0, spec["counts"], np.nan))
+        fig.colorbar(image, ax=ax, label="count")
+
+    elif kind == "box":
+        ax.bxp(spec["boxes"])
+        ax.tick_params(axis="x", labelrotation=45)
+
+    elif kind == "heatmap":
+        columns = spec["columns"]
+        image = ax.imshow(spec["matrix"], cmap="RdBu", vmin=-1, vmax=1)
+        fig.colorbar(image, ax=ax)
+        ax.set_xticks(range(len(columns)), columns, rotation=90, fontsize="small")
+        ax.set_yticks(range(len(columns)), columns, fontsize="small")
+
+    else:
+        _draw_series(ax, spec)
+
+    if spec.get("ticks"):
+        positions, labels = spec["ticks"]
+        ax.set_xticks(positions, labels, rotation=30, ha="right", fontsize="small")
+
+    ax.set_title(spec["title"])
+    if kind != "heatmap":
+        x_label, y_label = spec["labels"]
+        ax.set_xlabel(x_label or "")
+        ax.set_ylabel(y_label or "")
+
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format=spec["format"])
+    return buffer.getvalue()
+
+
+# =====================================================
+# Cache + pool
+# =====================================================
+
+def cached_image(etag: str) -> bytes | None:
+    with _lock:
+        image = _images.get(etag)
+
+        if image is None:
+            _stats["misses"] += 1
+            return None
+
+        _images.move_to_end(etag)
+        _stats["hits"] += 1
+        return image
+
+
+def _store(etag: str, image: bytes):
+    global _bytes
+
+    if len(image) > IMAGE_CACHE_MAX_BYTES:
+        return
+
+    with _lock:
+        if etag in _images:
+            return
+
+        _images[etag] = image
+        _bytes += len(image)
+
+        while _bytes > IMAGE_CACHE_MAX_BYTES:
+            _, evicted = _images.popitem(last=False)
+            _bytes -= len(evicted)
+            _stats["evictions"] += 1
+
+
+def render_image(spec: dict, etag: str | None = None) -> bytes:
+    """Encoded image for a spec, from the cache or drawn in the pool."""
+    etag = etag or spec_hash(spec)
+
+    image = cached_image(etag)
+    if image is not None:
+        return image
+
+    start = time.perf_counter()
+    if IMAGE_WORKERS:
+        image = _executor().submit(render_spec, spec).result()
+    else:
+        image = render_spec(spec)
+
+    with _lock:
+        _stats["render_seconds"] += time.perf_counter() - start
+
+    _store(etag, image)
+    return image
+
+
+def warm_image_pool():
+    """
+    Start the drawing processes and draw a small image in each, so the
+    first request does not wait for process start-up or matplotlib.
+    """
+    frame = pd.DataFrame({"x": [0, 1], "y": [0, 1]})
+    spec, _ = image_spec(frame, {"chart_type": "line", "x": "x", "y": "y"}, "png", 320, 240, 100)
+
+    if not IMAGE_WORKERS:
+        render_spec(spec)
+        return
+
+    pool = _executor()
+    for future in [pool.submit(render_spec, spec) for _ in range(IMAGE_WORKERS)]:
+        future.result()
+
+
+def image_cache_info() -> dict:
+    with _lock:
+        lookups = _stats["hits"] + _stats["misses"]
+
+        return {
+            **_stats,
+            "hit_rate": _stats["hits"] / lookups if lookups else None,
+            "entries": len(_images),
+            "bytes": _bytes,
+            "max_bytes": IMAGE_CACHE_MAX_BYTES,
+            "workers": IMAGE_WORKERS
+        }
@@ -0,0 +1,296 @@
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from core.config import (
+    FILTER_INDEX_CACHE_SIZE,
+    FILTER_INDEX_MAX_BYTES,
+    FILTER_INDEX_MAX_SELECTIVITY,
+    FILTER_INDEX_MIN_ROWS
+)
+from services.dataset_store import buffer_key
+
+
+# =====================================================
+# Sort index
+# =====================================================
+#
+#   order       - row positions in sorted order (stable, so ties keep
+#                 row order), non-null values first, missing values last
+#   sorted_keys - sort key of each non-null row along ``order``: the
+#                 value itself for numbers, its dense rank among the
+#                 sorted distinct values otherwise (the code map for
+#                 strings and categories); negated when descending, so
+#                 it is always ascending
+#
+# Used by /rows for sorted pages and by the filter engine below.
+
+class SortIndex(NamedTuple):
+    order: np.ndarray
+    sorted_keys: np.ndarray
+    uniques: np.ndarray | None
+    non_null: int
+    descending: bool
+
+
+def _is_number(dtype) -> bool:
+    return pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+
+
+def build_sort_index(series: pd.Series, descending: bool = False) -> SortIndex:
+    rows_dtype = np.int32 if len(series) < 2 ** 31 else np.int64
+
+    if _is_number(series.dtype):
+        values = series.to_numpy(dtype="float64", na_value=np.nan)
+        present = ~np.isnan(values)
+        uniques = None
+        keys = values[present]
+    else:
+        # Values are looked up in the uniques by binary search, which
+        # therefore have to be in value order (categories added later
+        # are appended)
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            categories = series.cat.categories
+            if not categories.is_monotonic_increasing:
+                series = series.cat.reorder_categories(categories.sort_values())
+
+        ranks, uniques = pd.factorize(series, sort=True)
+        present = ranks >= 0
+        uniques = np.asarray(pd.Index(uniques), dtype=object)
+        keys = ranks[present].astype(rows_dtype, copy=False)
+
+    non_null_rows = np.flatnonzero(present).astype(rows_dtype, copy=False)
+    null_rows = np.flatnonzero(~present).astype(rows_dtype, copy=False)
+
+    if descending:
+        keys = -keys
+
+    positions = np.argsort(keys, kind="stable")
+
+    return SortIndex(
+        order=np.concatenate([non_null_rows[positions], null_rows]),
+        sorted_keys=keys[positions],
+        uniques=uniques,
+        non_null=len(positions),
+        descending=descending
+    )
+
+
+# =====================================================
+# Predicate lookups
+# =====================================================
+
+def _key_bounds(index: SortIndex, value, side: str):
+    """Search key for ``value`` in an ascending index, or None if not comparable."""
+    if index.uniques is None:
+        if isinstance(value, bool) or not isinstance(value, (int, float, np.number)):
+            return None
+        return float(value)
+
+    # Rank boundary: values below it are < value (side="left") or
+    # <= value (side="right")
+    try:
+        return int(np.searchsorted(index.uniques, value, side=side))
+    except TypeError:
+        return None
+
+
+def index_range(index: SortIndex, op: str, value):
+    """
+    (lo, hi) slice of ``index.order`` holding the rows where
+    ``column <op> value``, or None if the index cannot answer it.
+    """
+    keys = index.sorted_keys
+    numeric = index.uniques is None
+
+    if op in ("==", ">", "<="):
+        bound = _key_bounds(index, value, "right")
+        if bound is None:
+            return None
+        # For ranks, everything before ``bound`` is <= value
+        split_right = int(np.searchsorted(keys, bound, side="right" if numeric else "left"))
+
+    if op in ("==", ">=", "<"):
+        bound = _key_bounds(index, value, "left")
+        if bound is None:
+            return None
+        split_left = int(np.searchsorted(keys, bound, side="left"))
+
+    if op == "==":
+        return split_left, split_right
+    if op == ">":
+        return split_right, index.non_null
+    if op == ">=":
+        return split_left, index.non_null
+    if op == "<":
+        return 0, split_left
+    if op == "<=":
+        return 0, split_right
+
+    return None
+
+
+# =====================================================
+# Filter index cache
+# =====================================================
+#
+# Indexes are keyed by the identity of the column's memory (see
+# dataset_store.buffer_key), so every frame sharing that column under
+# copy-on-write - projections, later dataset versions - shares its
+# index. Each entry holds the column itself: while the entry lives, the
+# memory cannot be freed and handed to another column, so a key never
+# points at stale data.
+#
+# A column is indexed the second time it is filtered; one-off
+# intermediate frames (e.g. inside a transform chain) never pay for an
+# index they would not reuse. A first sighting is remembered through a
+# weak reference to the array owning the memory, so a temporary whose
+# freed address gets reused does not count as seen.
+#
+# The cache is bounded by entry count and by index size
+# (FILTER_INDEX_MAX_MB). Since entries keep their columns alive, the
+# registry drops the indexes of a dataset it evicts or replaces
+# (release_indexes), so they cannot hold on to memory outside its budget.
+
+_lock = threading.Lock()
+_indexes: OrderedDict = OrderedDict()
+_bytes = 0
+_seen: OrderedDict = OrderedDict()
+_stats = {"lookups": 0, "scans": 0, "builds": 0, "build_seconds": 0.0, "evictions": 0}
+
+
+def _owner(series: pd.Series):
+    values = series.values
+
+    # Columns of a 2D block come out as fresh views; their base lives
+    # as long as the data
+    while isinstance(values, np.ndarray) and isinstance(values.base, np.ndarray):
+        values = values.base
+
+    return values
+
+
+def _index_size(index: SortIndex) -> int:
+    size = index.order.nbytes + index.sorted_keys.nbytes
+    if index.uniques is not None:
+        size += index.uniques.nbytes
+    return size
+
+
+def _drop(key):
+    global _bytes
+
+    _, _, size = _indexes.pop(key)
+    _bytes -= size
+
+
+def _cached_index(series: pd.Series) -> SortIndex | None:
+    global _bytes
+
+    key = buffer_key(series)
+    if key is None:
+        return None
+
+    with _lock:
+        entry = _indexes.get(key)
+        if entry is not None:
+            _indexes.move_to_end(key)
+            return entry[1]
+
+        # First sighting only marks the column
+        seen = _seen.get(key)
+        if seen is None or seen() is None:
+            _seen[key] = weakref.ref(_owner(series))
+            _seen.move_to_end(key)
+            while len(_seen) > 4 * FILTER_INDEX_CACHE_SIZE:
+                _seen.popitem(last=False)
+            return None
+        del _seen[key]
+
+    start = time.perf_counter()
+    index = build_sort_index(series)
+    size = _index_size(index)
+
+    with _lock:
+        _stats["builds"] += 1
+        _stats["build_seconds"] += time.perf_counter() - start
+
+        # Larger than the whole cache: used once, not kept
+        if size > FILTER_INDEX_MAX_BYTES:
+            return index
+
+        if key in _indexes:
+            _drop(key)
+
+        _indexes[key] = (series, index, size)
+        _bytes += size
+
+        while len(_indexes) > FILTER_INDEX_CACHE_SIZE or _bytes > FILTER_INDEX_MAX_BYTES:
+            _drop(next(iter(_indexes)))
+            _stats["evictions"] += 1
+
+    return index
+
+
+def release_indexes(df: pd.DataFrame, keep: pd.DataFrame | None = None):
+    """
+    Drop the indexes of the columns of ``df``, except columns whose
+    memory ``keep`` (e.g. the next version of the dataset) still shares.
+    """
+    kept = set()
+    if keep is not None:
+        kept = {buffer_key(keep.iloc[:, i]) for i in range(keep.shape[1])}
+
+    keys = {buffer_key(df.iloc[:, i]) for i in range(df.shape[1])} - kept
+
+    with _lock:
+        for key in keys:
+            if key in _indexes:
+                _drop(key)
+            _seen.pop(key, None)
+
+
+def index_rows(series: pd.Series, op: str, value) -> np.ndarray | None:
+    """
+    Positions of the rows matching ``series <op> value`` via an index.
+
+    Returns None (the caller scans the column instead) when the column
+    is small, not indexed yet, the predicate is not selective enough or
+    the value cannot be compared through the index.
+    """
+    n = len(series)
+    if n < FILTER_INDEX_MIN_ROWS:
+        return None
+
+    index = _cached_index(series)
+    if index is None:
+        return None
+
+    bounds = index_range(index, op, value)
+
+    # Planner: past this share of rows, scattering matches into a mask
+    # costs more than comparing every value
+    if bounds is None or bounds[1] - bounds[0] > FILTER_INDEX_MAX_SELECTIVITY * n:
+        with _lock:
+            _stats["scans"] += 1
+        return None
+
+    with _lock:
+        _stats["lookups"] += 1
+
+    return index.order[bounds[0]:bounds[1]]
+
+
+def filter_index_info() -> dict:
+    with _lock:
+        return {
+            **_stats,
+            "entries": len(_indexes),
+            "bytes": _bytes,
+            "max_bytes": FILTER_INDEX_MAX_BYTES
+        }
@@ -0,0 +1,205 @@
+import asyncio
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+from core.config import (
+    JOB_HISTORY_SIZE,
+    JOB_QUEUE_MAX,
+    JOB_TIMEOUT_SECONDS,
+    JOB_WORKERS
+)
+
+
+# =====================================================
+# Job execution
+# =====================================================
+#
+# CPU-heavy request work (CSV parsing, stats, plots, transforms,
+# queries) runs here instead of on the event loop or in the unbounded
+# default threadpool:
+#
+# - JOB_WORKERS threads execute jobs; datasets and caches live in this
+#   process, so jobs reach them without copying or pickling
+# - backpressure: at most JOB_QUEUE_MAX jobs queued or running, beyond
+#   that submit_job raises JobQueueFull (the API answers 503)
+# - a job not finished after its timeout is reported timed out; work
+#   already running cannot be interrupted, it finishes in the
+#   background and holds its slot until then
+# - finished jobs stay queryable (JOB_HISTORY_SIZE most recent)
+
+class JobQueueFull(Exception):
+    pass
+
+
+class JobTimeout(Exception):
+    pass
+
+
+_executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="job")
+
+_lock = threading.Lock()
+_jobs: OrderedDict = OrderedDict()
+_active = 0
+_running = 0
+
+_stats = {"submitted": 0, "rejected": 0, "done": 0, "failed": 0, "timed_out": 0}
+_run_seconds: deque = deque(maxlen=JOB_HISTORY_SIZE)
+_wait_seconds: deque = deque(maxlen=JOB_HISTORY_SIZE)
+
+
+def _execute(job: dict, fn):
+    global _running
+
+    with _lock:
+        _running += 1
+        job["status"] = "running"
+        job["started"] = time.time()
+        _wait_seconds.append(job["started"] - job["submitted"])
+
+    try:
+        return fn()
+    finally:
+        with _lock:
+            _running -= 1
+            job["finished"] = time.time()
+            _run_seconds.append(job["finished"] - job["started"])
+
+
+def _release(_future):
+    global _active
+
+    with _lock:
+        _active -= 1
+
+
+def _finish(job: dict, status: str, result=None, error: Exception | None = None):
+    with _lock:
+        job["status"] = status
+        job["result"] = result
+        job["error"] = error
+        _stats[status] += 1
+
+
+async def _watch(job: dict, future, finish, timeout: float | None):
+    try:
+        result = await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        if finish is not None:
+            result = finish(result)
+    except asyncio.TimeoutError:
+        _finish(job, "timed_out", error=JobTimeout(f"Job timed out after {timeout:g}s"))
+    except Exception as e:
+        _finish(job, "failed", error=e)
+    else:
+        _finish(job, "done", result)
+
+
+def submit_job(kind: str, fn, finish=None, timeout: float | None = JOB_TIMEOUT_SECONDS) -> dict:
+    """
+    Queue ``fn()`` on the job pool; call from the event loop.
+
+    ``finish(result)``, if given, post-processes the result on the event
+    loop (e.g. to schedule async follow-ups). ``timeout`` None waits
+    indefinitely. Returns the job record.
+    """
+    global _active
+
+    with _lock:
+        if _active >= JOB_QUEUE_MAX:
+            _stats["rejected"] += 1
+            raise JobQueueFull("Too many jobs in progress, retry later")
+        _active += 1
+        _stats["submitted"] += 1
+
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "kind": kind,
+            "status": "queued",
+            "submitted": time.time(),
+            "started": None,
+            "finished": None,
+            "result": None,
+            "error": None
+        }
+        _jobs[job["job_id"]] = job
+
+        # Forget the oldest finished jobs once the table is full
+        while len(_jobs) > JOB_HISTORY_SIZE:
+            oldest = next(iter(_jobs.values()))
+            if oldest["status"] in ("queued", "running"):
+                break
+            _jobs.popitem(last=False)
+
+    future = _executor.submit(_execute, job, fn)
+    future.add_done_callback(_release)
+
+    job["task"] = asyncio.create_task(_watch(job, future, finish, timeout))
+
+    return job
+
+
+async def wait_job(job: dict):
+    """Result of a submitted job; re-raises its error."""
+    # A cancelled request must not cancel the job's bookkeeping
+    await asyncio.shield(job["task"])
+
+    if job["error"] is not None:
+        raise job["error"]
+
+    return job["result"]
+
+
+async def run_job(kind: str, fn, finish=None, timeout: float | None = JOB_TIMEOUT_SECONDS):
+    return await wait_job(submit_job(kind, fn, finish, timeout))
+
+
+def job_status(job_id: str) -> dict | None:
+    """Public view of a job, including its result once done."""
+    job = _jobs.get(job_id)
+    if job is None:
+        return None
+
+    status = {
+        key: job[key]
+        for key in ("job_id", "kind", "status", "submitted", "started", "finished")
+    }
+
+    if job["status"] == "done":
+        status["result"] = job["result"]
+    elif job["error"] is not None:
+        status["error"] = str(job["error"])
+
+    return status
+
+
+# =====================================================
+# Metrics
+# =====================================================
+
+def _summary(samples) -> dict:
+    if not samples:
+        return {"count": 0, "mean": None, "p50": None, "p95": None, "max": None}
+
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "mean": sum(ordered) / len(ordered),
+        "p50": ordered[len(ordered) // 2],
+        "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        "max": ordered[-1]
+    }
+
+
+def job_info() -> dict:
+    with _lock:
+        return {
+            **_stats,
+            "workers": JOB_WORKERS,
+            "max_queue": JOB_QUEUE_MAX,
+            "running": _running,
+            "queue_depth": _active - _running,
+            "run_seconds": _summary(list(_run_seconds)),
+            "wait_seconds": _summary(list(_wait_seconds))
+        }
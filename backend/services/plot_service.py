@@ -1,124 +1,440 @@
+import numpy as np
 import pandas as pd
-import plotly.express as px
 
+from core.config import (
+    APPROX_CONFIDENCE,
+    CORRELATION_SAMPLE_ROWS,
+    CORRELATION_TEXT_MAX_COLUMNS,
+    PLOT_MAX_POINTS
+)
+from services.approx_service import approximate_aggregate
+from services.correlation_service import (
+    cluster_order,
+    dataset_correlation,
+    strongest_columns,
+    top_pairs
+)
+from services.filter_service import select_rows
+from services.groupby_service import groupby_aggregate
+from services.downsample_service import (
+    bin_2d,
+    decimate_line,
+    histogram_counts,
+    numeric_axis,
+    render_info
+)
+
+# plotly is imported where figures are built, not at module import:
+# it is slow to load and only /plot needs it (warm_plotly loads it
+# ahead of the first request)
+
+
+# -------------------- Columns --------------------
+
+def plot_columns(config: dict):
+    """Columns a chart config reads, or None if it needs every column."""
+    if config.get("chart_type") == "heatmap":
+        return None
+
+    columns = [config.get("x"), config.get("y"), config.get("color")]
+    columns += [f["column"] for f in config.get("filters", [])]
+
+    return [c for c in columns if c]
 
-# -------------------- Filters --------------------
-
-def apply_filters(df: pd.DataFrame, filters: list):
-    working_df = df.copy()
-
-    for f in filters:
-        col = f["column"]
-        op = f["operator"]
-        val = f["value"]
-
-        if col not in working_df.columns:
-            raise ValueError(f"Column '{col}' not found")
 
-        if op == "==":
-            working_df = working_df[working_df[col] == val]
-        elif op == ">":
-            working_df = working_df[working_df[col] > val]
-        elif op == "<":
-            working_df = working_df[working_df[col] < val]
-        elif op == ">=":
-            working_df = working_df[working_df[col] >= val]
-        elif op == "<=":
-            working_df = working_df[working_df[col] <= val]
-        else:
-            raise ValueError(f"Unsupported operator {op}")
+# -------------------- Filters --------------------
 
-    return working_df
+def apply_filters(df: pd.DataFrame, filters: list, columns: list | None = None):
+    return select_rows(df, filters, columns=columns)
 
 
 # -------------------- Aggregation --------------------
 
-def aggregate_data(df: pd.DataFrame, x: str, y: str, aggregation: str):
+def approximate_data(
+    df: pd.DataFrame,
+    x: str,
+    y: str,
+    aggregation: str,
+    filters: list,
+    approx_key: tuple
+) -> pd.DataFrame | None:
+    """
+    Estimated per-x aggregate with ``{y}_lower`` / ``{y}_upper`` bound
+    columns, from the stratified sample of the whole (unfiltered)
+    dataset ``df``; None if the aggregation has no approximate method.
+
+    Details of the estimate are left in ``attrs["approximate"]``.
+    """
+    estimate = approximate_aggregate(df, approx_key, aggregation, y, (x,), filters)
+    if estimate is None:
+        return None
+
+    result = pd.DataFrame({
+        x: estimate.labels,
+        y: estimate.value,
+        f"{y}_lower": estimate.lower,
+        f"{y}_upper": estimate.upper
+    })
+    result.attrs["approximate"] = {
+        "approximate": estimate.approximate,
+        "method": estimate.method,
+        "confidence": APPROX_CONFIDENCE,
+        "sample_rows": estimate.sample_rows,
+        "population_rows": estimate.population_rows
+    }
+
+    return result
+
+
+def aggregate_data(
+    df: pd.DataFrame,
+    x: str,
+    y: str,
+    aggregation: str,
+    filters: list | None = None,
+    approx_key: tuple | None = None
+):
+    """
+    Aggregate ``y`` per ``x``.
+
+    With ``approx_key`` (dataset id, version), ``df`` is the whole
+    dataset and the result is estimated from its sample where possible
+    (see approximate_data); ``filters`` then apply to the sampled rows.
+    Otherwise ``df`` is expected to be filtered already.
+    """
     if x not in df.columns or y not in df.columns:
         raise ValueError("Invalid columns for aggregation")
 
-    return (
-        df.groupby(x)[y]
-        .agg(aggregation)
-        .reset_index()
+    if approx_key is not None:
+        approximated = approximate_data(df, x, y, aggregation, filters or [], approx_key)
+        if approximated is not None:
+            return approximated
+
+        df = select_rows(df, filters or [], columns=[x, y])
+
+    return groupby_aggregate(df[y], df[x], aggregation, sort=True).reset_index()
+
+
+# -------------------- Correlation --------------------
+
+def correlation_data(
+    df: pd.DataFrame,
+    config: dict,
+    dataset_key: tuple | None = None
+) -> pd.DataFrame:
+    """
+    Correlation matrix of the numeric columns of the filtered rows, as
+    a square frame; row counts and the method are in
+    ``attrs["correlation"]``.
+
+    ``config`` may set "method" (pearson / spearman) and "sample_rows";
+    with ``dataset_key`` (dataset id, version) the matrix is cached.
+    """
+    correlation = dataset_correlation(
+        dataset_key,
+        lambda: df,
+        config.get("method", "pearson"),
+        config.get("sample_rows", CORRELATION_SAMPLE_ROWS),
+        config.get("filters", [])
     )
 
+    result = pd.DataFrame(
+        correlation.matrix,
+        index=correlation.columns,
+        columns=correlation.columns
+    )
+    result.attrs["correlation"] = {
+        "method": correlation.method,
+        "rows": correlation.rows,
+        "total_rows": correlation.total_rows
+    }
 
-# -------------------- Plot Generator --------------------
+    return result
 
-def generate_plot(df: pd.DataFrame, config: dict):
 
-    chart_type = config["chart_type"]
+# -------------------- Plot Data --------------------
+
+def prepare_plot_data(
+    df: pd.DataFrame,
+    config: dict,
+    dataset_key: tuple | None = None
+) -> pd.DataFrame:
+    """
+    Filtered (and aggregated) rows the chart is drawn from; for a
+    heatmap, the correlation matrix (see correlation_data).
+
+    ``dataset_key`` (dataset id, version) is used when the config asks
+    for ``"approximate": true`` on an aggregated chart, and to cache
+    correlation matrices.
+    """
+    if config["chart_type"] == "heatmap":
+        return correlation_data(df, config, dataset_key)
+
     x = config.get("x")
     y = config.get("y")
     aggregation = config.get("aggregation")
-    color = config.get("color")
-    filters = config.get("filters", [])
 
-    working_df = df.copy()
+    # Only the plotted columns are materialized
+    columns = [c for c in (x, y, config.get("color")) if c]
 
-    # ---------- Apply filters ----------
-    if filters:
-        working_df = apply_filters(working_df, filters)
+    for col in columns:
+        if col not in df.columns:
+            raise ValueError(f"Column '{col}' not found")
+
+    if config.get("approximate") and dataset_key is not None and aggregation and x and y:
+        working_df = aggregate_data(
+            df, x, y, aggregation,
+            filters=config.get("filters", []),
+            approx_key=dataset_key
+        )
+        if working_df.empty:
+            raise ValueError("No data available after filters")
+        return working_df
+
+    working_df = apply_filters(df, config.get("filters", []), columns)
 
     if working_df.empty:
         raise ValueError("No data available after filters")
 
-    # ---------- Aggregation ----------
     if aggregation and x and y:
         working_df = aggregate_data(working_df, x, y, aggregation)
 
+    return working_df
+
+
+def build_chart_context(plot_df: pd.DataFrame, config: dict) -> dict:
+    """Compact summary of the plotted data for chart insights."""
+    if config["chart_type"] == "heatmap":
+        return {
+            "chart_type": "heatmap",
+            **plot_df.attrs["correlation"],
+            "columns": len(plot_df.columns),
+            "top_pairs": top_pairs(list(plot_df.columns), plot_df.to_numpy(), 5)
+        }
+
+    x = config.get("x")
+    y = config.get("y")
+    aggregation = config.get("aggregation")
+
+    if not (aggregation and x and y):
+        plot_df = plot_df[[c for c in (x, y) if c]].dropna()
+
+    return {
+        "chart_type": config["chart_type"],
+        "x": x,
+        "y": y,
+        "aggregation": aggregation,
+        "row_count": len(plot_df),
+        "y_stats": {
+            "min": float(plot_df[y].min()) if y else None,
+            "max": float(plot_df[y].max()) if y else None,
+            "mean": float(plot_df[y].mean()) if y else None
+        }
+    }
+
+
+# -------------------- Render Budget --------------------
+
+def render_budget(config: dict) -> int:
+    max_points = config.get("max_points", PLOT_MAX_POINTS)
+    return int(max_points) if max_points else 0
+
+
+def heatmap_columns(plot_df: pd.DataFrame, config: dict, max_points: int) -> list:
+    """
+    Positions of the correlation matrix columns to draw, in drawing
+    order. Over the render budget only the most strongly correlated
+    columns are kept; "cluster": true orders them so correlated columns
+    sit together.
+    """
+    matrix = plot_df.to_numpy()
+
+    keep = list(range(len(matrix)))
+    if max_points and len(keep) ** 2 > max_points:
+        keep = strongest_columns(matrix, max(2, int(np.sqrt(max_points))))
+
+    if config.get("cluster"):
+        order = cluster_order(matrix[np.ix_(keep, keep)])
+        keep = [keep[i] for i in order]
+
+    return keep
+
+
+def _density_figure(plot_df: pd.DataFrame, x: str, y: str, max_points: int):
+    import plotly.graph_objects as go
+
+    counts, x_centers, y_centers = bin_2d(
+        numeric_axis(plot_df[x]),
+        numeric_axis(plot_df[y]),
+        max_points
+    )
+
+    # Empty cells stay transparent
+    z = np.where(counts.T > 0, counts.T, np.nan)
+
+    fig = go.Figure(go.Heatmap(
+        x=x_centers,
+        y=y_centers,
+        z=z,
+        colorscale="Viridis",
+        colorbar={"title": "count"}
+    ))
+    fig.update_layout(xaxis_title=x, yaxis_title=y)
+
+    return fig, int(np.count_nonzero(counts))
+
+
+def _correlation_figure(plot_df: pd.DataFrame, config: dict, max_points: int):
+    import plotly.graph_objects as go
+
+    matrix = plot_df.to_numpy()
+    columns = list(plot_df.columns)
+
+    keep = heatmap_columns(plot_df, config, max_points)
+    labels = [columns[i] for i in keep]
+
+    # Undefined correlations (constant columns) drawn as 0; float32
+    # halves the encoded matrix
+    z = np.nan_to_num(matrix[np.ix_(keep, keep)], nan=0.0).astype(np.float32)
+
+    text = {}
+    if len(keep) <= CORRELATION_TEXT_MAX_COLUMNS:
+        text = {"texttemplate": "%{z:.2f}"}
+
+    fig = go.Figure(go.Heatmap(
+        x=labels,
+        y=labels,
+        z=z,
+        zmin=-1,
+        zmax=1,
+        colorscale="RdBu",
+        **text
+    ))
+    fig.update_layout(
+        title=f"Correlation Heatmap ({plot_df.attrs['correlation']['method']})",
+        yaxis={"autorange": "reversed"}
+    )
+
+    return fig, len(keep) < len(columns), z.size
+
+
+# -------------------- Error Bars --------------------
+
+def _error_bars(plot_df: pd.DataFrame, y: str) -> dict:
+    """Plotly error bar arguments for approximate aggregates, if any."""
+    if f"{y}_lower" not in plot_df.columns:
+        return {}
+
+    return {
+        "error_y": plot_df[f"{y}_upper"] - plot_df[y],
+        "error_y_minus": plot_df[y] - plot_df[f"{y}_lower"]
+    }
+
+
+# -------------------- Plot Generator --------------------
+
+def build_plot(plot_df: pd.DataFrame, config: dict):
+    """
+    Figure dict for already prepared plot data, plus render info.
+
+    Above the render budget (``max_points``, 0 disables it) line charts
+    are decimated, scatter plots become 2D density heatmaps and
+    histograms are binned server-side, so the payload stays bounded.
+    """
+    import plotly.express as px
+
+    chart_type = config["chart_type"]
+    x = config.get("x")
+    y = config.get("y")
+    color = config.get("color")
+
+    max_points = render_budget(config)
+    over_budget = bool(max_points) and len(plot_df) > max_points
+
+    input_rows = len(plot_df)
+    mode = "full"
+    output_points = input_rows
+
     # ---------- Plot types ----------
 
     if chart_type == "bar":
         if not x or not y:
             raise ValueError("Bar chart requires x and y")
-        fig = px.bar(working_df, x=x, y=y, color=color)
+        fig = px.bar(plot_df, x=x, y=y, color=color, **_error_bars(plot_df, y))
 
     elif chart_type == "line":
         if not x or not y:
             raise ValueError("Line chart requires x and y")
-        fig = px.line(working_df, x=x, y=y, color=color)
+
+        if over_budget:
+            mode = config.get("downsample", "lttb")
+            plot_df = decimate_line(plot_df, x, y, color, max_points, mode)
+            output_points = len(plot_df)
+
+        fig = px.line(plot_df, x=x, y=y, color=color, **_error_bars(plot_df, y))
 
     elif chart_type == "scatter":
         if not x or not y:
             raise ValueError("Scatter requires x and y")
-        fig = px.scatter(working_df, x=x, y=y, color=color)
+
+        if over_budget:
+            mode = "density"
+            fig, output_points = _density_figure(plot_df, x, y, max_points)
+        else:
+            fig = px.scatter(plot_df, x=x, y=y, color=color)
 
     elif chart_type == "histogram":
         if not x:
             raise ValueError("Histogram requires x")
-        fig = px.histogram(working_df, x=x, color=color)
+
+        if over_budget:
+            mode = "binned"
+            counts = histogram_counts(plot_df, x, color, config.get("nbins"))
+            output_points = len(counts)
+
+            fig = px.bar(counts, x=x, y="count", color=color)
+            fig.update_layout(bargap=0)
+        else:
+            fig = px.histogram(plot_df, x=x, color=color)
 
     elif chart_type == "box":
         if not x or not y:
             raise ValueError("Box plot requires x and y")
-        fig = px.box(working_df, x=x, y=y, color=color)
+        fig = px.box(plot_df, x=x, y=y, color=color)
 
     elif chart_type == "heatmap":
 
-        numeric_df = working_df.select_dtypes(include="number")
-
-        if numeric_df.shape[1] < 2:
+        if plot_df.shape[1] < 2:
             raise ValueError("Heatmap requires at least 2 numeric columns")
 
-        corr = numeric_df.corr()
+        fig, reduced, output_points = _correlation_figure(plot_df, config, max_points)
+        input_rows = plot_df.attrs["correlation"]["total_rows"]
+        if reduced:
+            mode = "top_columns"
 
-        # Fix NaNs (very important)
-        corr = corr.fillna(0)
+    else:
+        raise ValueError("Unsupported chart type")
 
-        fig = px.imshow(
-            corr.values,
-            x=corr.columns,
-            y=corr.columns,
-            text_auto=True,
-            aspect="auto",
-            color_continuous_scale="RdBu",
-            title="Correlation Heatmap"
-        )
+    return fig.to_dict(), render_info(mode, input_rows, output_points)
 
 
-    else:
-        raise ValueError("Unsupported chart type")
+def warm_plotly():
+    """
+    Import plotly and build a small figure, which also loads the
+    default template and trace validators the first figure would.
+    """
+    frame = pd.DataFrame({"x": [0, 1], "y": [0, 1]})
+
+    for chart_type in ("bar", "line"):
+        build_plot(frame, {"chart_type": chart_type, "x": "x", "y": "y"})
+
+
+def generate_plot(df: pd.DataFrame, config: dict, plot_df: pd.DataFrame | None = None):
+
+    # Callers that also need the plotted rows pass them in
+    if plot_df is None:
+        plot_df = prepare_plot_data(df, config)
+
+    fig_json, _ = build_plot(plot_df, config)
 
-    return fig.to_dict()
+    return fig_json
@@ -1,58 +1,246 @@
-def execute_query(df, query):
-    working_df = df.copy()
-
-    # -------- Filters --------
-    if "filters" in query:
-        for f in query["filters"]:
-            col = f["column"]
-            op = f["operator"]
-            val = f["value"]
-
-            if op == "==":
-                working_df = working_df[working_df[col] == val]
-            elif op == ">":
-                working_df = working_df[working_df[col] > val]
-            elif op == "<":
-                working_df = working_df[working_df[col] < val]
-            elif op == ">=":
-                working_df = working_df[working_df[col] >= val]
-            elif op == "<=":
-                working_df = working_df[working_df[col] <= val]
-
-    # -------- Grouping --------
-    if "groupby" in query:
-        working_df = working_df.groupby(query["groupby"])
-
-    agg = query["aggregation"]
-    column = query.get("column")
-
-    # -------- Aggregations --------
-    if agg == "mean":
-        result = working_df[column].mean()
-    elif agg == "sum":
-        result = working_df[column].sum()
-    elif agg == "count":
-        if hasattr(working_df, "groups"):  
-            # If grouped
-            result = working_df.size()
-        else:
-            # Normal dataframe
-            result = len(working_df)
-    elif agg == "min":
-        result = working_df[column].min()
-    elif agg == "max":
-        result = working_df[column].max()
-    elif agg == "median":
-        result = working_df[column].median()
-    else:
+from functools import lru_cache
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from core.config import APPROX_CONFIDENCE, QUERY_PLAN_CACHE_SIZE
+from services.approx_service import approximate_aggregate
+from services.filter_service import OPERATORS, build_mask
+from services.groupby_service import groupby_aggregate
+
+
+AGGREGATIONS = {"mean", "sum", "count", "min", "max", "median", "nunique"}
+
+
+def query_columns(query):
+    """Columns a structured query reads."""
+    columns = [f["column"] for f in query.get("filters", [])]
+
+    groupby = query.get("groupby")
+    columns += groupby if isinstance(groupby, list) else [groupby]
+    columns.append(query.get("column"))
+
+    return [c for c in columns if c]
+
+
+# =====================================================
+# Query plans
+# =====================================================
+#
+# A plan is everything about a query except its filter values: which
+# columns are filtered and how, the grouping keys and the aggregation
+# kernel. Plans are validated once and cached by that shape, so the
+# many questions that differ only in their constants share one plan.
+
+class QueryPlan(NamedTuple):
+    filters: tuple
+    groupby: tuple
+    aggregation: str
+    column: str | None
+    multiply: bool
+
+
+def query_shape(query) -> tuple:
+    groupby = query.get("groupby")
+    if groupby is None:
+        groupby = ()
+    elif not isinstance(groupby, list):
+        groupby = (groupby,)
+
+    return (
+        tuple((f["column"], f["operator"]) for f in query.get("filters", [])),
+        tuple(groupby),
+        query.get("aggregation"),
+        query.get("column"),
+        "multiply" in query
+    )
+
+
+@lru_cache(maxsize=QUERY_PLAN_CACHE_SIZE)
+def _compile(shape: tuple, columns: tuple) -> QueryPlan:
+    filters, groupby, aggregation, column, multiply = shape
+    known = set(columns)
+
+    for col, op in filters:
+        if col not in known:
+            raise ValueError(f"Column '{col}' not found")
+        if op not in OPERATORS:
+            raise ValueError(f"Unsupported operator {op}")
+
+    for col in groupby:
+        if col not in known:
+            raise ValueError(f"Column '{col}' not found")
+
+    if aggregation not in AGGREGATIONS:
         raise ValueError("Unsupported aggregation")
 
-    # -------- Math modifier --------
-    if "multiply" in query:
-        result = result * query["multiply"]
+    if aggregation != "count":
+        if not column:
+            raise ValueError(f"Aggregation '{aggregation}' requires a column")
+        if column not in known:
+            raise ValueError(f"Column '{column}' not found")
+
+    return QueryPlan(filters, groupby, aggregation, column, multiply)
+
+
+def compile_query(query, columns) -> QueryPlan:
+    """Validated plan for ``query`` against ``columns`` (cached by shape)."""
+    return _compile(query_shape(query), tuple(columns))
+
+
+def plan_cache_info() -> dict:
+    info = _compile.cache_info()
+    lookups = info.hits + info.misses
+
+    return {
+        "hits": info.hits,
+        "misses": info.misses,
+        "hit_rate": info.hits / lookups if lookups else None,
+        "entries": info.currsize,
+        "max_entries": info.maxsize
+    }
+
+
+# =====================================================
+# Executor
+# =====================================================
+
+def _run_plan(df, plan: QueryPlan, query):
+    # One fused mask for all filters; filter values come from the query
+    mask = build_mask(df, query.get("filters", [])) if plan.filters else None
+
+    # -------- Ungrouped --------
+    if not plan.groupby:
+        if plan.aggregation == "count":
+            return len(df) if mask is None else int(np.count_nonzero(mask))
+
+        series = df[plan.column]
+        if mask is not None:
+            series = series[mask]
 
+        return series.agg(plan.aggregation)
+
+    # -------- Grouped --------
+    # Only the key columns (and target) of matching rows are taken, and
+    # groups come out in first-seen order instead of being sorted. Large
+    # groupbys are spread over GROUPBY_WORKERS threads.
+    keys = [df[col] if mask is None else df[col][mask] for col in plan.groupby]
+    keys = keys[0] if len(keys) == 1 else keys
+
+    if plan.aggregation == "count":
+        target = df[plan.groupby[0]] if mask is None else df[plan.groupby[0]][mask]
+        return groupby_aggregate(target, keys, "size")
+
+    target = df[plan.column] if mask is None else df[plan.column][mask]
+
+    return groupby_aggregate(target, keys, plan.aggregation)
+
+
+def _key_value(value):
+    # Nullable Int / boolean keys come back as NumPy scalars, which
+    # orjson does not take as dict keys (and _default is not called
+    # for keys)
+    if value is pd.NA or value is pd.NaT:
+        return None
+
+    if isinstance(value, np.generic):
+        return value.item()
+
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+
+    return value
+
+
+def _group_key(key):
+    # Several group keys come back as tuples; JSON keys must be strings
+    if isinstance(key, tuple):
+        return ", ".join(str(_key_value(k)) for k in key)
+
+    return _key_value(key)
+
+
+def _answer(result):
     # Convert pandas result to JSON safe
     if hasattr(result, "to_dict"):
-        return result.to_dict()
+        return {_group_key(key): value for key, value in result.to_dict().items()}
 
     return float(result)
+
+
+def _run_approximate(df, plan: QueryPlan, query, approx_key: tuple) -> dict:
+    estimate = approximate_aggregate(
+        df,
+        approx_key,
+        plan.aggregation,
+        column=plan.column if plan.aggregation != "count" else None,
+        groupby=plan.groupby,
+        filters=query.get("filters", [])
+    )
+
+    # No approximate method for this aggregation: answer exactly
+    if estimate is None:
+        result = _run_plan(df, plan, query)
+        if plan.multiply:
+            result = result * query["multiply"]
+
+        return {
+            "answer": _answer(result),
+            "approximate": False,
+            "method": "exact",
+            "error_bounds": None
+        }
+
+    value, lower, upper = estimate.value, estimate.lower, estimate.upper
+
+    # -------- Math modifier --------
+    if plan.multiply:
+        factor = query["multiply"]
+        value, lower, upper = value * factor, lower * factor, upper * factor
+        if factor < 0:
+            lower, upper = upper, lower
+
+    if estimate.labels is None:
+        answer = float(value[0])
+        bounds = {"lower": float(lower[0]), "upper": float(upper[0])}
+    else:
+        keys = [_group_key(label) for label in estimate.labels]
+        answer = dict(zip(keys, value.tolist()))
+        bounds = {
+            key: {"lower": lo, "upper": hi}
+            for key, lo, hi in zip(keys, lower.tolist(), upper.tolist())
+        }
+
+    return {
+        "answer": answer,
+        "approximate": estimate.approximate,
+        "method": estimate.method,
+        "confidence": APPROX_CONFIDENCE,
+        "error_bounds": bounds,
+        "sample_rows": estimate.sample_rows,
+        "population_rows": estimate.population_rows
+    }
+
+
+def execute_query(df, query, approx_key: tuple | None = None):
+    """
+    Answer a structured query.
+
+    With ``approx_key`` (dataset id, version) and ``df`` the whole
+    dataset, the answer is estimated from samples / sketches instead
+    and comes back as a dict with the answer, its error bounds and how
+    it was obtained.
+    """
+    plan = compile_query(query, df.columns)
+
+    if approx_key is not None:
+        return _run_approximate(df, plan, query, approx_key)
+
+    result = _run_plan(df, plan, query)
+
+    # -------- Math modifier --------
+    if plan.multiply:
+        result = result * query["multiply"]
+
+    return _answer(result)
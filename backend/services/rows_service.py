@@ -0,0 +1,194 @@
+import base64
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import orjson
+import pandas as pd
+
+from core.config import ROW_INDEX_CACHE_SIZE, ROWS_MAX_LIMIT
+from services.index_service import SortIndex, build_sort_index
+
+
+# =====================================================
+# Sort indexes
+# =====================================================
+#
+# Browsing a sorted view needs the row order for that sort, not a
+# sorted copy of the data. A SortIndex is built once per dataset
+# version, column and direction; a page is then a slice of its order
+# plus a take() of the requested columns, and a keyset cursor (last
+# value, last row) is found again with two binary searches, so page
+# cost does not depend on how deep the page is.
+
+_index_lock = threading.Lock()
+_indexes: OrderedDict = OrderedDict()
+_index_stats = {"hits": 0, "misses": 0, "builds_seconds": 0.0}
+
+
+def get_sort_index(key: tuple, series_loader, descending: bool) -> SortIndex:
+    """Cached sort index for ``key``; ``series_loader()`` is only called on a miss."""
+    with _index_lock:
+        index = _indexes.get(key)
+        if index is not None:
+            _indexes.move_to_end(key)
+            _index_stats["hits"] += 1
+            return index
+        _index_stats["misses"] += 1
+
+    start = time.perf_counter()
+    index = build_sort_index(series_loader(), descending)
+
+    with _index_lock:
+        _index_stats["builds_seconds"] += time.perf_counter() - start
+        _indexes[key] = index
+        while len(_indexes) > ROW_INDEX_CACHE_SIZE:
+            _indexes.popitem(last=False)
+
+    return index
+
+
+def row_index_info() -> dict:
+    with _index_lock:
+        return {
+            **_index_stats,
+            "entries": len(_indexes),
+            "bytes": sum(i.order.nbytes + i.sorted_keys.nbytes for i in _indexes.values())
+        }
+
+
+def _seek(index: SortIndex, value, row: int) -> int:
+    """Position of the first row after (value, row) in index order."""
+    # Cursor inside the trailing missing values: those are in row order
+    if value is None:
+        nulls = index.order[index.non_null:]
+        return index.non_null + int(np.searchsorted(nulls, row, side="right"))
+
+    keys = index.sorted_keys
+
+    if index.uniques is None:
+        try:
+            target = -float(value) if index.descending else float(value)
+        except (TypeError, ValueError):
+            raise ValueError("Invalid cursor")
+    else:
+        try:
+            pos = int(np.searchsorted(index.uniques, value, side="left"))
+        except TypeError:
+            raise ValueError("Invalid cursor")
+
+        # A value that is gone since sits between two ranks; the page
+        # continues at the first rank past it
+        if pos == len(index.uniques) or index.uniques[pos] != value:
+            next_rank = pos if not index.descending else -(pos - 1)
+            return int(np.searchsorted(keys, next_rank, side="left"))
+
+        target = -pos if index.descending else pos
+
+    lo = int(np.searchsorted(keys, target, side="left"))
+    hi = int(np.searchsorted(keys, target, side="right"))
+    # Ties are stored in row order
+    return lo + int(np.searchsorted(index.order[lo:hi], row, side="right"))
+
+
+# =====================================================
+# Cursors
+# =====================================================
+
+def encode_cursor(sort: str | None, descending: bool, value, row: int) -> str:
+    payload = orjson.dumps(
+        {"sort": sort, "desc": descending, "value": value, "row": row},
+        option=orjson.OPT_SERIALIZE_NUMPY
+    )
+    return base64.urlsafe_b64encode(payload).decode()
+
+
+def decode_cursor(cursor: str) -> dict:
+    try:
+        return orjson.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except ValueError:
+        raise ValueError("Invalid cursor")
+
+
+def _json_value(value):
+    if value is None or value is pd.NA or (isinstance(value, float) and np.isnan(value)):
+        return None
+    return value.item() if isinstance(value, np.generic) else value
+
+
+# =====================================================
+# Pages
+# =====================================================
+
+def get_rows(
+    df: pd.DataFrame,
+    index_key: tuple,
+    offset: int = 0,
+    limit: int = 100,
+    sort: str | None = None,
+    descending: bool = False,
+    columns: list | None = None,
+    cursor: str | None = None
+) -> dict:
+    """
+    One page of rows, optionally sorted and projected; ``page`` is the
+    page as a DataFrame, for the caller to encode.
+
+    ``cursor`` (from a previous page's ``next_cursor``) continues right
+    after that page's last row and takes precedence over ``offset``.
+    """
+    if sort is not None and sort not in df.columns:
+        raise ValueError(f"Column '{sort}' not found")
+
+    for col in columns or []:
+        if col not in df.columns:
+            raise ValueError(f"Column '{col}' not found")
+
+    limit = max(0, min(limit, ROWS_MAX_LIMIT))
+    total = len(df)
+
+    index = None
+    if sort is not None:
+        index = get_sort_index(
+            index_key + (sort, descending),
+            lambda: df[sort],
+            descending
+        )
+
+    if cursor is not None:
+        position = decode_cursor(cursor)
+        if position.get("sort") != sort or position.get("desc") != descending:
+            raise ValueError("Cursor does not match the requested sort")
+
+        if index is None:
+            start = position["row"] + 1
+        else:
+            start = _seek(index, position["value"], position["row"])
+    else:
+        start = max(0, offset)
+
+    stop = min(start + limit, total)
+    if index is None:
+        rows = np.arange(start, stop) if start < stop else np.empty(0, dtype=np.int64)
+    else:
+        rows = index.order[start:stop]
+
+    projected = df if columns is None else df[list(dict.fromkeys(columns))]
+    page = projected.take(rows)
+
+    next_cursor = None
+    if stop < total and len(rows):
+        last = int(rows[-1])
+        value = _json_value(df[sort].iloc[last]) if sort is not None else None
+        next_cursor = encode_cursor(sort, descending, value, last)
+
+    return {
+        "offset": start,
+        "limit": limit,
+        "total_rows": total,
+        "columns": list(page.columns),
+        "row_ids": rows,
+        "page": page,
+        "next_cursor": next_cursor
+    }
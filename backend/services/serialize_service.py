@@ -0,0 +1,66 @@
+import datetime
+import decimal
+
+import numpy as np
+import orjson
+import pandas as pd
+from fastapi.responses import Response
+
+
+# =====================================================
+# JSON encoding
+# =====================================================
+#
+# Responses carrying data (previews, query answers, Plotly figures) are
+# encoded with orjson instead of FastAPI's generic jsonable_encoder:
+#
+# - NumPy arrays and scalars are written natively, so figure dicts are
+#   not converted to Python lists first
+# - NaN and ±inf come out as null, so frames need no cleanup pass; only
+#   the values actually returned are ever looked at
+# - pandas missing markers (NA, NaT) and timestamps are handled in
+#   _default, which orjson only calls for types it does not know
+
+OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def _default(obj):
+    if obj is pd.NA or obj is pd.NaT:
+        return None
+
+    # Object / non-contiguous arrays that orjson does not take natively
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+
+    if isinstance(obj, (pd.Series, pd.Index, pd.api.extensions.ExtensionArray)):
+        return obj.tolist()
+
+    if isinstance(obj, (pd.Timestamp, datetime.date, datetime.time)):
+        return obj.isoformat()
+
+    if isinstance(obj, datetime.timedelta):
+        return pd.Timedelta(obj).isoformat()
+
+    if isinstance(obj, np.generic):
+        return obj.item()
+
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content) -> bytes:
+    return orjson.dumps(content, default=_default, option=OPTIONS)
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+def frame_records(df: pd.DataFrame) -> list:
+    """Rows of ``df`` as dicts; missing and non-finite values become null on encoding."""
+    return df.to_dict(orient="records")
@@ -0,0 +1,152 @@
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+
+# =====================================================
+# Streaming sketches
+# =====================================================
+#
+# Fixed-size summaries of a column, built in one pass over it chunk by
+# chunk and mergeable across chunks:
+#
+# - HyperLogLog: distinct count from 2^HLL_PRECISION one-byte registers
+#   (16 KiB), relative standard error 1.04 / sqrt(registers) ~ 0.8%
+# - t-digest: quantiles from a few hundred weighted centroids, most
+#   precise towards the tails
+#
+# Used by approx_service; both are cached per dataset version and column.
+
+HLL_PRECISION = 14
+TDIGEST_COMPRESSION = 500
+
+# Rows hashed / sorted at a time, bounding temporary memory
+SKETCH_CHUNK_ROWS = 1 << 21
+
+
+def _chunks(series: pd.Series):
+    for start in range(0, len(series), SKETCH_CHUNK_ROWS):
+        yield series.iloc[start:start + SKETCH_CHUNK_ROWS]
+
+
+# =====================================================
+# HyperLogLog
+# =====================================================
+
+def hll_registers(series: pd.Series, precision: int = HLL_PRECISION) -> np.ndarray:
+    """HyperLogLog registers for the non-null values of ``series``."""
+    registers = np.zeros(1 << precision, dtype=np.uint8)
+    tail_bits = 64 - precision
+
+    for chunk in _chunks(series):
+        hashes = pd.util.hash_pandas_object(chunk.dropna(), index=False).to_numpy()
+
+        # First bits pick the register, the position of the first set
+        # bit in the rest is the observation. The rest fits in a
+        # float64 exactly, so frexp gives its bit length.
+        slots = (hashes >> np.uint64(tail_bits)).astype(np.intp)
+        tail = hashes & np.uint64((1 << tail_bits) - 1)
+        _, bit_length = np.frexp(tail.astype(np.float64))
+        ranks = (tail_bits + 1 - bit_length).astype(np.uint8)
+
+        np.maximum.at(registers, slots, ranks)
+
+    return registers
+
+
+def hll_estimate(registers: np.ndarray) -> tuple:
+    """(estimate, relative standard error) of the distinct count."""
+    m = len(registers)
+    alpha = 0.7213 / (1 + 1.079 / m)
+
+    estimate = alpha * m * m / np.sum(np.ldexp(1.0, -registers.astype(np.int64)))
+
+    # Small cardinalities: linear counting on the empty registers
+    empty = int(np.count_nonzero(registers == 0))
+    if estimate <= 2.5 * m and empty:
+        estimate = m * np.log(m / empty)
+
+    return float(estimate), 1.04 / float(np.sqrt(m))
+
+
+# =====================================================
+# t-digest
+# =====================================================
+
+class TDigest(NamedTuple):
+    means: np.ndarray
+    weights: np.ndarray
+    # Smallest / largest value merged into each centroid
+    lows: np.ndarray
+    highs: np.ndarray
+
+
+def _cluster(means, weights, lows, highs, compression: float) -> TDigest:
+    """Merge adjacent centroids (sorted by mean) under the k1 scale function."""
+    total = weights.sum()
+    q_left = (np.cumsum(weights) - weights) / total
+
+    # k1: centroids may span one unit of k, so they are small near the
+    # tails and largest around the median
+    k = compression / (2 * np.pi) * np.arcsin(2 * q_left - 1)
+    cluster = np.floor(k - k[0]).astype(np.int64)
+    starts = np.flatnonzero(np.diff(cluster, prepend=-1))
+
+    merged = np.add.reduceat(weights, starts)
+
+    return TDigest(
+        means=np.add.reduceat(means * weights, starts) / merged,
+        weights=merged,
+        lows=np.minimum.reduceat(lows, starts),
+        highs=np.maximum.reduceat(highs, starts)
+    )
+
+
+def tdigest(series: pd.Series, compression: float = TDIGEST_COMPRESSION) -> TDigest | None:
+    """t-digest of the non-null values of a numeric column, or None if there are none."""
+    digests = []
+
+    for chunk in _chunks(series):
+        values = chunk.to_numpy(dtype="float64", na_value=np.nan)
+        values = np.sort(values[~np.isnan(values)])
+        if len(values):
+            digests.append(_cluster(values, np.ones(len(values)), values, values, compression))
+
+    if not digests:
+        return None
+
+    if len(digests) == 1:
+        return digests[0]
+
+    parts = [np.concatenate(field) for field in zip(*digests)]
+    order = np.argsort(parts[0], kind="stable")
+
+    return _cluster(*(part[order] for part in parts), compression)
+
+
+def tdigest_quantile(digest: TDigest, q: float) -> tuple:
+    """
+    (estimate, lower, upper) of quantile ``q``.
+
+    The bounds are the smallest and largest values merged into the
+    centroid(s) holding that rank.
+    """
+    cumulative = np.cumsum(digest.weights)
+    total = cumulative[-1]
+    centers = cumulative - digest.weights / 2
+
+    target = q * total
+    estimate = np.interp(target, centers, digest.means)
+
+    # Centroids whose rank span touches the target rank
+    first = int(np.searchsorted(cumulative, target, side="left"))
+    last = int(np.searchsorted(cumulative - digest.weights, target, side="right")) - 1
+    first = min(first, len(cumulative) - 1)
+    last = max(last, first)
+
+    return (
+        float(estimate),
+        float(digest.lows[first:last + 1].min()),
+        float(digest.highs[first:last + 1].max())
+    )
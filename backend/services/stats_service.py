@@ -1,25 +1,211 @@
+import threading
+
 import pandas as pd
 import numpy as np
 
-def profile_dataframe(df: pd.DataFrame):
-    df_clean = df.replace([np.inf, -np.inf], None)
-    df_clean = df_clean.where(pd.notnull(df_clean), None)
+from services.dataset_store import shared_columns
+
+
+# =====================================================
+# Column statistics (single pass)
+# =====================================================
+
+# Numeric columns are summarized this many at a time, bounding the
+# temporary float64 block to rows x STATS_COLUMN_BATCH
+STATS_COLUMN_BATCH = 64
+
+SUMMARY_KEYS = ["count", "mean", "std", "min", "25%", "50%", "75%", "max"]
+
+
+def _json_float(value):
+    value = float(value)
+    return value if np.isfinite(value) else None
+
+
+def _numeric_summary(numeric: pd.DataFrame) -> dict:
+    summary = {}
+    columns = list(numeric.columns)
+
+    for start in range(0, len(columns), STATS_COLUMN_BATCH):
+        batch = columns[start:start + STATS_COLUMN_BATCH]
+
+        # A copy: under copy-on-write a float64 block comes back as a
+        # read-only view, and infinities are overwritten below
+        block = numeric[batch].to_numpy(dtype="float64", na_value=np.nan, copy=True)
+        finite = np.isfinite(block)
+        # Infinities are treated as missing, like the old replace() pass
+        block[~finite] = np.nan
+
+        counts = finite.sum(axis=0)
+        has_values = counts > 0
+
+        with np.errstate(all="ignore"):
+            mean = np.sum(block, axis=0, where=finite) / counts
+            sq_dev = np.square(block - mean)
+            std = np.sqrt(np.sum(sq_dev, axis=0, where=finite) / (counts - 1))
+            std[counts < 2] = np.nan
+
+        values = {
+            "count": counts,
+            "mean": mean,
+            "std": std,
+            "min": np.min(block, axis=0, initial=np.inf, where=finite),
+            "max": np.max(block, axis=0, initial=-np.inf, where=finite)
+        }
+
+        # Quartiles only for columns that have at least one value
+        quartiles = np.full((3, len(batch)), np.nan)
+        if has_values.any():
+            quartiles[:, has_values] = np.nanpercentile(
+                block[:, has_values], [25, 50, 75], axis=0
+            )
+        values.update(zip(["25%", "50%", "75%"], quartiles))
+
+        for i, col in enumerate(batch):
+            summary[col] = {key: _json_float(values[key][i]) for key in SUMMARY_KEYS}
 
-    numeric_cols = df_clean.select_dtypes(include=["number"]).columns
-    categorical_cols = df_clean.select_dtypes(include=["object"]).columns
+    return summary
+
+
+def compute_column_stats(df: pd.DataFrame, columns: list | None = None) -> dict:
+    """Per-column dtype, null count and (numeric) summary."""
+    if columns is not None:
+        df = df[columns]
+
+    null_counts = df.isna().sum()
+    numeric = _numeric_summary(df.select_dtypes(include="number"))
 
     return {
+        col: {
+            "dtype": str(df[col].dtype),
+            "nulls": int(null_counts[col]),
+            "numeric": numeric.get(col)
+        }
+        for col in df.columns
+    }
+
+
+def compute_dataset_stats(df: pd.DataFrame) -> dict:
+    return {
+        "rows": len(df),
+        "columns": compute_column_stats(df)
+    }
+
+
+def update_dataset_stats(old_df: pd.DataFrame, old_stats: dict, new_df: pd.DataFrame) -> dict:
+    """
+    Stats for ``new_df``, derived from ``old_df``'s where possible.
+
+    Under copy-on-write, columns a transform did not touch (select, drop,
+    rename, reorder, fill on another column) still share their buffer
+    with the parent frame; their stats are carried over and only the
+    remaining columns are rescanned.
+    """
+    reused = {
+        col: old_stats["columns"][old_col]
+        for col, old_col in shared_columns(old_df, new_df).items()
+    }
+
+    changed = [c for c in new_df.columns if c not in reused]
+    fresh = compute_column_stats(new_df, changed) if changed else {}
+
+    return {
+        "rows": len(new_df),
+        "columns": {col: reused.get(col) or fresh[col] for col in new_df.columns}
+    }
+
+
+# =====================================================
+# Views over cached stats
+# =====================================================
+
+def overview_stats(stats: dict) -> dict:
+    columns = stats["columns"]
+
+    return {
+        "null_counts": {col: s["nulls"] for col, s in columns.items()},
+        "dtypes": {col: s["dtype"] for col, s in columns.items()},
         "shape": {
-            "rows": df_clean.shape[0],
-            "columns": df_clean.shape[1]
-        },
-        "dtypes": df_clean.dtypes.astype(str).to_dict(),
-        "null_counts": df_clean.isnull().sum().to_dict(),
-        "numeric_summary": df_clean[numeric_cols].describe().to_dict() if len(numeric_cols) > 0 else {},
+            "rows": stats["rows"],
+            "columns": len(columns)
+        }
+    }
+
+
+def numeric_summary(stats: dict) -> dict:
+    return {
+        col: s["numeric"]
+        for col, s in stats["columns"].items()
+        if s["numeric"] is not None
+    }
+
+
+# =====================================================
+# Per-dataset cache
+# =====================================================
+#
+# One entry per dataset, tagged with the dataset version it describes.
+# A transform bumps the version, so a stale entry is never served.
+
+_cache_lock = threading.Lock()
+_stats_cache: dict = {}
+_cache_counters = {"hits": 0, "misses": 0}
+
+
+def cache_stats(dataset_id: str, version: int, stats: dict):
+    with _cache_lock:
+        _stats_cache[dataset_id] = (version, stats)
+
+
+def cached_stats(dataset_id: str, version: int) -> dict | None:
+    with _cache_lock:
+        entry = _stats_cache.get(dataset_id)
+
+        if entry is not None and entry[0] == version:
+            _cache_counters["hits"] += 1
+            return entry[1]
+
+        _cache_counters["misses"] += 1
+        return None
+
+
+def get_dataset_stats(dataset_id: str, version: int, load_df) -> dict:
+    """Cached stats for a dataset version; ``load_df()`` is only called on a miss."""
+    stats = cached_stats(dataset_id, version)
+
+    if stats is None:
+        stats = compute_dataset_stats(load_df())
+        cache_stats(dataset_id, version, stats)
+
+    return stats
+
+
+def stats_cache_info() -> dict:
+    with _cache_lock:
+        return {**_cache_counters, "entries": len(_stats_cache)}
+
+
+# =====================================================
+# Full profile
+# =====================================================
+
+def profile_dataframe(df: pd.DataFrame, stats: dict | None = None):
+    if stats is None:
+        stats = compute_dataset_stats(df)
+
+    categorical_cols = df.select_dtypes(include=["object", "category", "string"]).columns
+
+    def top_value(col):
+        mode = df[col].mode()
+        return mode[0] if not mode.empty else None
+
+    return {
+        **overview_stats(stats),
+        "numeric_summary": numeric_summary(stats),
         "categorical_summary": {
             col: {
-                "unique": df_clean[col].nunique(),
-                "top": df_clean[col].mode()[0] if not df_clean[col].mode().empty else None
+                "unique": df[col].nunique(),
+                "top": top_value(col)
             }
             for col in categorical_cols
         }
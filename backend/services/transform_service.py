@@ -1,44 +1,21 @@
+import numpy as np
 import pandas as pd
 
+from services.filter_service import build_mask
+
 
 # =====================================================
 # ROW OPERATIONS
 # =====================================================
 
 def apply_filter(df, operation):
-    conditions = operation["conditions"]
-    logic = operation.get("logic", "AND")
-
-    masks = []
-
-    for cond in conditions:
-        col = cond["column"]
-        op = cond["operator"]
-        val = cond["value"]
-
-        if op == "==":
-            masks.append(df[col] == val)
-        elif op == ">":
-            masks.append(df[col] > val)
-        elif op == "<":
-            masks.append(df[col] < val)
-        elif op == ">=":
-            masks.append(df[col] >= val)
-        elif op == "<=":
-            masks.append(df[col] <= val)
-        else:
-            raise ValueError(f"Unsupported operator {op}")
-
-    if logic == "AND":
-        mask = masks[0]
-        for m in masks[1:]:
-            mask &= m
-    else:
-        mask = masks[0]
-        for m in masks[1:]:
-            mask |= m
+    mask = build_mask(
+        df,
+        operation["conditions"],
+        operation.get("logic", "AND")
+    )
 
-    return df[mask]
+    return df if mask is None else df[mask]
 
 
 def top_n(df, column, n):
@@ -85,22 +62,38 @@ def reorder_columns(df, columns):
     return df[columns]
 
 
+def _fillna(series, value):
+    # Compact ingest dtypes may not hold the fill value as-is
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        if value not in series.cat.categories:
+            series = series.cat.add_categories([value])
+    elif pd.api.types.is_integer_dtype(series) and not float(value).is_integer():
+        series = series.astype("Float64")
+
+    return series.fillna(value)
+
+
 def fill_null(df, column, method, value=None):
+    series = df[column]
+
     if method == "mean":
-        df[column] = df[column].fillna(df[column].mean())
+        filled = _fillna(series, series.mean())
     elif method == "median":
-        df[column] = df[column].fillna(df[column].median())
+        filled = _fillna(series, series.median())
     elif method == "mode":
-        df[column] = df[column].fillna(df[column].mode()[0])
+        filled = _fillna(series, series.mode()[0])
     elif method == "constant":
-        df[column] = df[column].fillna(value)
+        filled = _fillna(series, value)
     elif method == "ffill":
-        df[column] = df[column].fillna(method="ffill")
+        filled = series.ffill()
     elif method == "bfill":
-        df[column] = df[column].fillna(method="bfill")
+        filled = series.bfill()
     else:
         raise ValueError(f"Unsupported fill method {method}")
-    return df
+
+    # assign() returns a new frame, so the caller's frame (possibly the
+    # registry's resident copy) is never modified in place
+    return df.assign(**{column: filled})
 
 
 def drop_columns_with_null_threshold(df, threshold):
@@ -114,7 +107,12 @@ def drop_columns_with_null_threshold(df, threshold):
 # =====================================================
 
 def transform_dataframe(df, config):
-    working_df = df.copy()
+    if config.get("lazy"):
+        return execute_plan(df, optimize_plan(build_plan(config)))
+
+    # No upfront copy: every operation returns a new frame, and under
+    # copy-on-write untouched columns keep sharing the input's buffers
+    working_df = df
 
     # ---------- Row operations ----------
     for op in config.get("row_operations", []):
@@ -184,3 +182,269 @@ def transform_dataframe(df, config):
             raise ValueError(f"Unknown column operation {t}")
 
     return working_df
+
+
+# =====================================================
+# LAZY TRANSFORMATION ENGINE
+# =====================================================
+#
+# With "lazy": true the row/column operations are first collected into
+# a logical plan (a list of operation dicts), rewritten by
+# optimize_plan() and only then executed:
+#
+# - filters move ahead of drop_nulls / remove_duplicates (both are
+#   row-wise, so the order does not change the result) and adjacent
+#   filters merge into one fused mask
+# - top_n / bottom_n run as nlargest / nsmallest instead of a full sort
+# - when the plan ends in a select/reorder, a projection of just the
+#   columns still needed is pushed to the front, so filters and row
+#   takes never touch the other columns
+
+ROW_OPERATIONS = {
+    "filter", "top_n", "bottom_n", "random_sample",
+    "drop_nulls", "row_range", "remove_duplicates"
+}
+
+COLUMN_OPERATIONS = {
+    "select", "drop", "rename", "reorder", "fill_null", "drop_null_threshold"
+}
+
+# Row operations a filter can be moved in front of
+FILTER_COMMUTES_WITH = {"drop_nulls", "remove_duplicates"}
+
+# Row operations whose result depends on every column present
+PROJECTION_BARRIERS = {"drop_nulls", "remove_duplicates"}
+
+
+def build_plan(config):
+    plan = []
+
+    for op in config.get("row_operations", []):
+        if op["type"] not in ROW_OPERATIONS:
+            raise ValueError(f"Unknown row operation {op['type']}")
+
+        if op["type"] == "filter":
+            op = {
+                "type": "filter",
+                "groups": [{
+                    "conditions": op["conditions"],
+                    "logic": op.get("logic", "AND")
+                }]
+            }
+
+        plan.append(dict(op))
+
+    for op in config.get("column_operations", []):
+        if op["type"] not in COLUMN_OPERATIONS:
+            raise ValueError(f"Unknown column operation {op['type']}")
+
+        plan.append(dict(op))
+
+    return plan
+
+
+def _push_down_filters(plan):
+    plan = list(plan)
+
+    for i in range(1, len(plan)):
+        j = i
+        while (
+            plan[j]["type"] == "filter"
+            and plan[j - 1]["type"] in FILTER_COMMUTES_WITH
+        ):
+            plan[j - 1], plan[j] = plan[j], plan[j - 1]
+            j -= 1
+            if j == 0:
+                break
+
+    return plan
+
+
+def _merge_filters(plan):
+    merged = []
+
+    for node in plan:
+        if node["type"] == "filter" and merged and merged[-1]["type"] == "filter":
+            merged[-1] = {
+                "type": "filter",
+                "groups": merged[-1]["groups"] + node["groups"]
+            }
+        else:
+            merged.append(node)
+
+    return merged
+
+
+def _use_partial_sort(plan):
+    kernels = {"top_n": "nlargest", "bottom_n": "nsmallest"}
+
+    return [
+        {**node, "kernel": kernels[node["type"]]} if node["type"] in kernels else node
+        for node in plan
+    ]
+
+
+def _columns_read(node):
+    t = node["type"]
+
+    if t == "filter":
+        return {c["column"] for g in node["groups"] for c in g["conditions"]}
+    if t in ("top_n", "bottom_n", "fill_null"):
+        return {node["column"]}
+    if t == "drop":
+        # drop() raises on missing columns, so they must survive
+        return set(node["columns"])
+
+    return set()
+
+
+def _push_down_projection(plan):
+    projections = [
+        i for i, node in enumerate(plan) if node["type"] in ("select", "reorder")
+    ]
+    if not projections:
+        return plan
+
+    last = projections[-1]
+    required = set(plan[last]["columns"])
+    insert_at = 0
+
+    for i in range(last - 1, -1, -1):
+        node = plan[i]
+        t = node["type"]
+
+        if t in PROJECTION_BARRIERS:
+            insert_at = i + 1
+            break
+
+        if t in ("select", "reorder"):
+            required = set(node["columns"])
+        elif t == "rename":
+            # Keep both names: a mapping may not apply if its source is absent
+            inverse = {new: old for old, new in node["mapping"].items()}
+            required |= {inverse[c] for c in required if c in inverse}
+        else:
+            required |= _columns_read(node)
+
+    # Nothing to gain right in front of the select itself
+    if insert_at == last:
+        return plan
+
+    return plan[:insert_at] + [{"type": "project", "columns": sorted(required)}] + plan[insert_at:]
+
+
+def optimize_plan(plan):
+    plan = _push_down_filters(plan)
+    plan = _merge_filters(plan)
+    plan = _use_partial_sort(plan)
+    plan = _push_down_projection(plan)
+    return plan
+
+
+def _filter_mask(df, node):
+    mask = None
+
+    for group in node["groups"]:
+        m = build_mask(df, group["conditions"], group["logic"])
+        if m is None:
+            continue
+        mask = m if mask is None else np.logical_and(mask, m, out=mask)
+
+    return mask
+
+
+def _partial_sort(df, node):
+    column = node["column"]
+    series = df[column]
+
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        return getattr(df, node["kernel"])(node["n"], column)
+
+    # nlargest/nsmallest only handle numbers; fall back to a full sort
+    if node["type"] == "top_n":
+        return top_n(df, column, node["n"])
+    return bottom_n(df, column, node["n"])
+
+
+def execute_plan(df, plan):
+    working_df = df
+
+    for node in plan:
+        t = node["type"]
+
+        if t == "project":
+            working_df = working_df[[c for c in working_df.columns if c in node["columns"]]]
+        elif t == "filter":
+            mask = _filter_mask(working_df, node)
+            if mask is not None:
+                working_df = working_df[mask]
+        elif t in ("top_n", "bottom_n"):
+            if "kernel" in node:
+                working_df = _partial_sort(working_df, node)
+            elif t == "top_n":
+                working_df = top_n(working_df, node["column"], node["n"])
+            else:
+                working_df = bottom_n(working_df, node["column"], node["n"])
+        elif t == "random_sample":
+            working_df = random_sample(working_df, node["n"])
+        elif t == "drop_nulls":
+            working_df = drop_null_rows(working_df)
+        elif t == "row_range":
+            working_df = row_range(working_df, node["start"], node["end"])
+        elif t == "remove_duplicates":
+            working_df = remove_duplicates(working_df)
+        elif t == "select":
+            working_df = select_columns(working_df, node["columns"])
+        elif t == "drop":
+            working_df = drop_columns(working_df, node["columns"])
+        elif t == "rename":
+            working_df = rename_columns(working_df, node["mapping"])
+        elif t == "reorder":
+            working_df = reorder_columns(working_df, node["columns"])
+        elif t == "fill_null":
+            working_df = fill_null(
+                working_df,
+                node["column"],
+                node["method"],
+                node.get("value")
+            )
+        elif t == "drop_null_threshold":
+            working_df = drop_columns_with_null_threshold(
+                working_df,
+                node["threshold"]
+            )
+
+    return working_df
+
+
+def _describe_node(node):
+    t = node["type"]
+
+    if t == "filter":
+        groups = [
+            "(" + f" {g['logic']} ".join(
+                f"{c['column']} {c['operator']} {c['value']!r}" for c in g["conditions"]
+            ) + ")"
+            for g in node["groups"]
+        ]
+        return "filter " + " AND ".join(groups)
+
+    if t in ("project", "select", "reorder", "drop"):
+        return f"{t} [{', '.join(map(str, node['columns']))}]"
+
+    if t in ("top_n", "bottom_n"):
+        line = f"{t} {node['column']} n={node['n']}"
+        return f"{line} via {node['kernel']}" if "kernel" in node else line
+
+    args = ", ".join(f"{k}={v!r}" for k, v in node.items() if k != "type")
+    return f"{t} {args}".strip()
+
+
+def explain_plan(config):
+    """Logical plan as written and after optimization, one step per line."""
+    plan = build_plan(config)
+
+    return {
+        "plan": [_describe_node(node) for node in plan],
+        "optimized_plan": [_describe_node(node) for node in optimize_plan(plan)]
+    }
@@ -0,0 +1,127 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from services.export_service import stream_table
+from services.serialize_service import dumps
+
+
+# =====================================================
+# Data transport
+# =====================================================
+#
+# Endpoints returning table data pick the encoding from the Accept
+# header:
+#
+#   application/vnd.apache.arrow.stream       Arrow IPC stream, sent
+#                                             record batch by record
+#                                             batch
+#   application/vnd.datainsight.columnar+json {column: [values]}: one
+#                                             array per column, NumPy
+#                                             columns written natively
+#   application/json                          row records, where an
+#                                             endpoint always returned
+#                                             them
+#
+# Column-oriented payloads carry each column name once instead of once
+# per row, and skip building a dict per row on the server.
+
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+COLUMNAR_JSON = "application/vnd.datainsight.columnar+json"
+RECORDS_JSON = "application/json"
+
+
+def _accepted(accept: str) -> list:
+    """(media range, q) pairs of an Accept header."""
+    ranges = []
+
+    for part in accept.split(","):
+        media, *params = [p.strip() for p in part.split(";")]
+        if not media:
+            continue
+
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+
+        ranges.append((media.lower(), q))
+
+    return ranges
+
+
+def negotiate(accept: str | None, offered: list) -> str | None:
+    """
+    The media type from ``offered`` (in order of preference) that the
+    Accept header ranks highest. The first one without a header, None
+    if the header accepts none of them.
+    """
+    if not accept:
+        return offered[0]
+
+    ranges = _accepted(accept)
+
+    best, best_q = None, 0.0
+    for media in offered:
+        # The most specific matching range decides
+        q, specificity = 0.0, -1
+        for media_range, range_q in ranges:
+            if media_range == media:
+                match = 2
+            elif media_range == media.split("/")[0] + "/*":
+                match = 1
+            elif media_range == "*/*":
+                match = 0
+            else:
+                continue
+
+            if match > specificity:
+                q, specificity = range_q, match
+
+        if q > best_q:
+            best, best_q = media, q
+
+    return best
+
+
+# =====================================================
+# Encodings
+# =====================================================
+
+def _column_values(series: pd.Series):
+    dtype = series.dtype
+
+    # Plain NumPy columns are written by orjson directly; NaN / inf
+    # become null
+    if isinstance(dtype, np.dtype) and dtype.kind in "biuf":
+        return np.ascontiguousarray(series.to_numpy())
+
+    if isinstance(dtype, np.dtype) and dtype.kind == "M" and not series.hasnans:
+        return np.ascontiguousarray(series.to_numpy())
+
+    # Nullable, text, categorical and anything else
+    return series.tolist()
+
+
+def frame_columns(df: pd.DataFrame) -> dict:
+    """Column name -> values, for columnar JSON."""
+    return {col: _column_values(df[col]) for col in df.columns}
+
+
+def frame_table(df: pd.DataFrame, metadata: dict | None = None) -> pa.Table:
+    """``df`` as an Arrow table; ``metadata`` is stored JSON-encoded in the schema."""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+
+    if metadata is not None:
+        table = table.replace_schema_metadata({"datainsight": dumps(metadata)})
+
+    return table
+
+
+def arrow_stream(table: pa.Table):
+    """Arrow IPC stream bytes of ``table``, one record batch at a time."""
+    return stream_table(table, "arrow")
@@ -0,0 +1,90 @@
+import threading
+import time
+
+from core.config import READY_WARMUP
+from services.ai_service import get_client
+from services.dataset_registry import dataset_version, get_dataset, latest_dataset_id
+from services.image_service import warm_image_pool
+from services.plot_service import warm_plotly
+from services.stats_service import get_dataset_stats
+
+
+# =====================================================
+# Readiness warmup
+# =====================================================
+#
+# plotly, matplotlib and the OpenAI SDK are loaded on first use, so a
+# worker imports and starts quickly. The first requests would then pay
+# for them instead; GET /ready avoids that:
+#
+# - its first call starts the READY_WARMUP steps in a background
+#   thread, one after the other, and answers 503
+# - once every step has finished it answers 200, so traffic is only
+#   routed to warm instances
+# - a failed step (e.g. no API key for "ai") is reported but does not
+#   keep the instance out of rotation: that part loads on first use
+
+
+def _warm_latest_dataset():
+    dataset_id = latest_dataset_id()
+    if dataset_id is None:
+        return
+
+    version = dataset_version(dataset_id)
+    get_dataset_stats(
+        dataset_id,
+        version,
+        lambda: get_dataset(dataset_id, version=version)
+    )
+
+
+WARMUP_STEPS = {
+    "plotly": warm_plotly,
+    "images": warm_image_pool,
+    "ai": get_client,
+    "datasets": _warm_latest_dataset
+}
+
+_lock = threading.Lock()
+_thread = None
+_steps = {step: {"status": "pending"} for step in READY_WARMUP}
+
+
+def _run_warmup():
+    for step in _steps:
+        with _lock:
+            _steps[step] = {"status": "running"}
+
+        start = time.perf_counter()
+        try:
+            if step not in WARMUP_STEPS:
+                raise ValueError(f"Unknown warmup step: {step}")
+            WARMUP_STEPS[step]()
+            result = {"status": "done"}
+        except Exception as e:
+            result = {"status": "failed", "error": str(e)}
+
+        result["seconds"] = round(time.perf_counter() - start, 3)
+
+        with _lock:
+            _steps[step] = result
+
+
+def start_warmup():
+    """Start the warmup steps, once per process."""
+    global _thread
+
+    with _lock:
+        if _thread is None:
+            _thread = threading.Thread(target=_run_warmup, name="warmup", daemon=True)
+            _thread.start()
+
+
+def warmup_status() -> dict:
+    with _lock:
+        steps = {step: dict(info) for step, info in _steps.items()}
+
+    return {
+        "ready": all(info["status"] in ("done", "failed") for info in steps.values()),
+        "steps": steps
+    }
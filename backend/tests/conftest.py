@@ -0,0 +1,16 @@
+import os
+import sys
+import tempfile
+
+import pandas as pd
+
+# Services import from backend/ ("services.*", "core.*"), and config is
+# read at import time: point the store and caches at a scratch directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_scratch = tempfile.mkdtemp(prefix="datainsight-tests-")
+os.environ.setdefault("DATA_DIR", os.path.join(_scratch, "data"))
+os.environ.setdefault("CACHE_DIR", os.path.join(_scratch, "cache"))
+
+# As in main.py / upload.py: transforms share untouched column buffers
+pd.set_option("mode.copy_on_write", True)
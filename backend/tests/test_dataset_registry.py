@@ -0,0 +1,28 @@
+import pandas as pd
+
+from services.dataset_registry import (
+    create_dataset,
+    dataset_snapshot,
+    get_dataset,
+    update_dataset
+)
+
+
+def test_pinned_read_returns_the_version_asked_for():
+    dataset_id = create_dataset(pd.DataFrame({"a": [1, 2, 3], "b": [4, 5, 6]}))
+    version = dataset_snapshot(dataset_id)[1]
+
+    update_dataset(dataset_id, pd.DataFrame({"a": [7, 8], "b": [9, 10]}))
+
+    assert get_dataset(dataset_id, ["a"], version)["a"].tolist() == [1, 2, 3]
+    assert get_dataset(dataset_id, version=version + 1)["a"].tolist() == [7, 8]
+
+
+def test_column_snapshot_pairs_frame_with_its_version():
+    dataset_id = create_dataset(pd.DataFrame({"a": [1, 2, 3], "b": [4, 5, 6]}))
+    update_dataset(dataset_id, pd.DataFrame({"a": [7, 8], "b": [9, 10]}))
+
+    df, version = dataset_snapshot(dataset_id, ["b"])
+
+    assert list(df.columns) == ["b"]
+    assert df.equals(get_dataset(dataset_id, ["b"], version))
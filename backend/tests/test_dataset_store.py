@@ -0,0 +1,118 @@
+import os
+import uuid
+
+import numpy as np
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
+
+from services import dataset_store
+
+
+@pytest.mark.parametrize("name", ["../outside", "..", "/etc", "ABCDEF123456", "0123456789abc", "", None])
+def test_malformed_ids_never_reach_a_path(name):
+    assert not dataset_store.valid_dataset_id(name)
+    assert not dataset_store.dataset_exists(name)
+
+    with pytest.raises(ValueError):
+        dataset_store.dataset_dir(name)
+
+
+def test_generated_ids_are_valid():
+    assert dataset_store.valid_dataset_id("0123456789ab")
+
+
+# -------------------- Versions sharing column files --------------------
+
+@pytest.fixture
+def name():
+    return uuid.uuid4().hex[:12]
+
+
+@pytest.fixture
+def original():
+    return pd.DataFrame({
+        "a": np.arange(5),
+        "b": [1.5, None, 3.0, None, 5.5],
+        "c": ["x", "y", "z", "x", "y"]
+    })
+
+
+def _derive(original):
+    """A transform touching one column: the others share its buffers."""
+    derived = original.rename(columns={"c": "label"})
+    return derived.assign(b=derived["b"].fillna(0.0))
+
+
+def _save_two_versions(name, original):
+    dataset_store.save_dataset(name, original)
+    derived = _derive(original)
+    shared = dataset_store.shared_columns(original, derived)
+    dataset_store.save_dataset(name, derived, parent=1, shared=shared, label="fill b")
+    return derived
+
+
+def test_unchanged_columns_are_referenced_not_rewritten(name, original):
+    derived = _derive(original)
+
+    assert dataset_store.shared_columns(original, derived) == {"a": "a", "label": "c"}
+
+    _save_two_versions(name, original)
+    history = dataset_store.version_history(name)
+
+    assert [v["columns_written"] for v in history] == [3, 1]
+    assert history[1]["current"] and history[1]["parent"] == 1
+
+
+def test_each_version_loads_its_own_data(name, original):
+    derived = _save_two_versions(name, original)
+
+    assert_frame_equal(dataset_store.load_dataset(name, version=1), original, check_dtype=False)
+    assert_frame_equal(dataset_store.load_dataset(name), derived, check_dtype=False)
+    assert_frame_equal(
+        dataset_store.load_dataset(name, ["label", "b"]),
+        derived[["label", "b"]],
+        check_dtype=False
+    )
+    assert dataset_store.open_dataset_table(name, 1).column_names == ["a", "b", "c"]
+
+
+def test_rollback_references_the_old_files(name, original):
+    _save_two_versions(name, original)
+
+    version = dataset_store.rollback_dataset(name, 1)
+    history = dataset_store.version_history(name)
+
+    assert version == 3 and dataset_store.current_version(name) == 3
+    assert history[-1]["bytes_written"] == 0 and history[-1]["columns_written"] == 0
+    assert_frame_equal(dataset_store.load_dataset(name), original, check_dtype=False)
+    assert dataset_store.diff_versions(name, 1)["unchanged"] == ["a", "b", "c"]
+
+
+def test_diff_follows_the_stored_data(name, original):
+    _save_two_versions(name, original)
+
+    diff = dataset_store.diff_versions(name, 1, 2)
+
+    assert diff["added"] == ["label"]
+    assert diff["removed"] == ["c"]
+    assert diff["data_changed"] == ["b"]
+    assert diff["unchanged"] == ["a"]
+    assert diff["type_changed"] == {}
+
+
+def test_pruning_keeps_files_later_versions_share(name, original, monkeypatch):
+    monkeypatch.setattr(dataset_store, "DATASET_HISTORY_MAX_VERSIONS", 2)
+    derived = _save_two_versions(name, original)
+
+    # v3 still reads "a" from v1's file once v1 itself is pruned
+    more = derived.assign(b=derived["b"] * 2)
+    shared = dataset_store.shared_columns(derived, more)
+    dataset_store.save_dataset(name, more, parent=2, shared=shared)
+
+    assert [v["version"] for v in dataset_store.version_history(name)] == [2, 3]
+    assert os.path.exists(dataset_store.version_path(name, 1))
+    assert_frame_equal(dataset_store.load_dataset(name), more, check_dtype=False)
+
+    with pytest.raises(KeyError):
+        dataset_store.load_dataset(name, version=1)
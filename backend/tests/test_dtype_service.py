@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.dtype_service import optimize_dtypes
+from services.query_service import execute_query
+
+
+@pytest.fixture
+def df():
+    # Float values that survive a float32 round trip, so only the
+    # aggregates would show a downcast
+    rng = np.random.default_rng(0)
+    rows = 200_000
+    return pd.DataFrame({
+        "group": rng.choice(["a", "b", "c"], rows),
+        "price": rng.integers(0, 4000, rows) / 4.0 + 0.5
+    })
+
+
+def test_floats_keep_float64(df):
+    optimized, report = optimize_dtypes(df)
+
+    assert optimized["price"].dtype == np.float64
+    assert "price" not in report["columns"]
+
+
+@pytest.mark.parametrize("query", [
+    {"aggregation": "sum", "column": "price"},
+    {"aggregation": "mean", "column": "price"},
+    {"groupby": "group", "aggregation": "mean", "column": "price"},
+    {"groupby": "group", "aggregation": "sum", "column": "price"}
+])
+def test_aggregates_unchanged_by_optimization(df, query):
+    optimized, _ = optimize_dtypes(df)
+
+    assert execute_query(optimized, query) == execute_query(df, query)
+
+
+def test_ints_and_strings_still_shrink(df):
+    df = df.assign(count=np.arange(len(df)) % 100)
+
+    optimized, report = optimize_dtypes(df)
+
+    assert optimized["count"].dtype == np.int8
+    assert optimized["group"].dtype == "category"
+    assert report["memory_after_bytes"] < report["memory_before_bytes"]
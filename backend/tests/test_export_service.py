@@ -0,0 +1,49 @@
+import datetime
+import json
+
+import numpy as np
+import pyarrow as pa
+
+from services.export_service import stream_table
+
+
+def _jsonl_rows(table, **options):
+    text = b"".join(stream_table(table, "jsonl", **options)).decode("utf-8")
+    return [json.loads(line) for line in text.splitlines()]
+
+
+def test_jsonl_floats_round_trip_exactly():
+    values = [0.08365797896292382, 1 / 3, 123456789.12345679, 5e-324, -2.5e300]
+    table = pa.table({"x": pa.array(values, pa.float64())})
+
+    rows = _jsonl_rows(table)
+
+    assert [row["x"] for row in rows] == values
+
+
+def test_jsonl_matches_arrow_export_across_batches():
+    rng = np.random.default_rng(0)
+    values = rng.random(1000)
+    table = pa.table({"x": values, "n": np.arange(1000)})
+
+    rows = _jsonl_rows(table, batch_rows=64)
+
+    assert [row["x"] for row in rows] == values.tolist()
+    assert [row["n"] for row in rows] == list(range(1000))
+
+
+def test_jsonl_missing_and_temporal_values():
+    table = pa.table({
+        "x": pa.array([1.5, None, float("nan")]),
+        "s": pa.array(["a", None, "c"]),
+        "t": pa.array([datetime.datetime(2024, 1, 2, 3, 4, 5), None, None], pa.timestamp("us")),
+        "d": pa.array([datetime.timedelta(seconds=90), None, None], pa.duration("s"))
+    })
+
+    rows = _jsonl_rows(table)
+
+    assert [row["x"] for row in rows] == [1.5, None, None]
+    assert [row["s"] for row in rows] == ["a", None, "c"]
+    assert rows[0]["t"] == "2024-01-02T03:04:05"
+    assert rows[0]["d"] == "P0DT0H1M30S"
+    assert rows[1]["t"] is None and rows[1]["d"] is None
@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from services import index_service
+from services.filter_service import build_mask
+from services.index_service import filter_index_info
+
+
+@pytest.fixture(autouse=True)
+def small_indexes(monkeypatch):
+    monkeypatch.setattr(index_service, "FILTER_INDEX_MIN_ROWS", 0)
+
+
+def test_and_looks_up_each_condition_once():
+    df = pd.DataFrame({"a": np.arange(1000), "b": np.arange(1000) % 7})
+    # Neither condition is selective enough to use an index
+    conditions = [
+        {"column": "a", "operator": ">=", "value": 0},
+        {"column": "b", "operator": "<", "value": 7}
+    ]
+
+    before = filter_index_info()
+    assert build_mask(df, conditions).all()
+    first = filter_index_info()
+
+    # First use only marks the columns as seen
+    assert first["builds"] == before["builds"]
+
+    assert build_mask(df, conditions).all()
+    second = filter_index_info()
+
+    assert second["builds"] - first["builds"] == 2
+    assert second["scans"] - first["scans"] == 2
@@ -0,0 +1,132 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from services import index_service
+from services.filter_service import build_mask, condition_mask
+from services.index_service import build_sort_index, index_range, index_rows
+
+OPS = ["==", "<", "<=", ">", ">="]
+
+ROWS = 500
+
+
+def _with_gaps(values, rng):
+    values = pd.Series(values, dtype=object)
+    values[rng.random(len(values)) < 0.15] = None
+    return values
+
+
+def _columns():
+    rng = np.random.default_rng(0)
+    words = np.array(["apple", "kiwi", "mango", "pear", "plum"])
+    # Unsorted categories: the index has to put them in value order
+    categories = ["plum", "apple", "pear", "mango", "kiwi", "fig"]
+
+    return {
+        "int": (pd.Series(rng.integers(-5, 5, ROWS)), [-6, -5, 0, 3, 4, 9, 2.5]),
+        "float": (
+            pd.Series(np.where(rng.random(ROWS) < 0.15, np.nan, rng.integers(0, 20, ROWS) / 4)),
+            [0.0, 1.25, 1.3, 4.75, 10]
+        ),
+        "nullable int": (
+            pd.Series(_with_gaps(rng.integers(0, 8, ROWS), rng), dtype="Int16"),
+            [0, 3, 7, 8, -1]
+        ),
+        "string": (
+            pd.Series(_with_gaps(rng.choice(words, ROWS), rng), dtype=pd.StringDtype("pyarrow")),
+            ["apple", "banana", "mango", "plum", "zzz", "a"]
+        ),
+        "object": (
+            pd.Series(_with_gaps(rng.choice(words, ROWS), rng)),
+            ["kiwi", "lemon", "pear", "aaa"]
+        ),
+        "category": (
+            pd.Series(
+                pd.Categorical(_with_gaps(rng.choice(words, ROWS), rng), categories=categories)
+            ),
+            ["fig", "kiwi", "lime", "pear", "plum", "zzz"]
+        )
+    }
+
+
+CASES = [
+    pytest.param(series, op, value, id=f"{name} {op} {value!r}")
+    for name, (series, values) in _columns().items()
+    for op in OPS
+    for value in values
+]
+
+
+def _scan_rows(series, op, value):
+    """Rows the filter engine matches without an index."""
+    df = pd.DataFrame({"col": series})
+
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(index_service, "FILTER_INDEX_MIN_ROWS", ROWS + 1)
+        mask = condition_mask(df, {"column": "col", "operator": op, "value": value})
+
+    return np.flatnonzero(mask)
+
+
+@pytest.mark.parametrize("series, op, value", CASES)
+def test_index_matches_scan(series, op, value):
+    index = build_sort_index(series)
+    bounds = index_range(index, op, value)
+
+    assert bounds is not None
+    rows = np.sort(index.order[bounds[0]:bounds[1]])
+
+    np.testing.assert_array_equal(rows, _scan_rows(series, op, value))
+
+
+@pytest.mark.parametrize("descending", [False, True])
+def test_sort_order_puts_nulls_last(descending):
+    series, _ = _columns()["category"]
+
+    index = build_sort_index(series, descending)
+    ordered = series.take(index.order).reset_index(drop=True)
+
+    assert ordered[index.non_null:].isna().all()
+    assert ordered[:index.non_null].notna().all()
+
+    expected = series.dropna().astype(str).sort_values(ascending=not descending, kind="stable")
+    assert ordered[:index.non_null].astype(str).tolist() == expected.tolist()
+
+
+@pytest.fixture
+def always_indexed(monkeypatch):
+    monkeypatch.setattr(index_service, "FILTER_INDEX_MIN_ROWS", 0)
+    monkeypatch.setattr(index_service, "FILTER_INDEX_MAX_SELECTIVITY", 1.0)
+
+
+def test_incomparable_value_falls_back_to_scan(always_indexed):
+    series, _ = _columns()["int"]
+
+    index_rows(series, "==", 1)
+    assert index_rows(series, "==", 1) is not None
+    assert index_rows(series, "==", "1") is None
+    assert index_rows(series, "<", True) is None
+
+
+@pytest.mark.parametrize("logic", ["AND", "OR"])
+def test_indexed_masks_match_scanned_masks(always_indexed, logic):
+    df = pd.DataFrame({name: series for name, (series, _) in _columns().items()})
+    conditions = [
+        {"column": "int", "operator": ">=", "value": 0},
+        {"column": "category", "operator": "<", "value": "mango"},
+        {"column": "nullable int", "operator": "==", "value": 3}
+    ]
+
+    scanned = np.logical_and.reduce if logic == "AND" else np.logical_or.reduce
+    expected = scanned([
+        np.isin(np.arange(ROWS), _scan_rows(df[c["column"]], c["operator"], c["value"]))
+        for c in conditions
+    ])
+
+    build_mask(df, conditions, logic)
+    before = index_service.filter_index_info()["lookups"]
+
+    # Second use: answered through the indexes built for each column
+    np.testing.assert_array_equal(build_mask(df, conditions, logic), expected)
+    assert index_service.filter_index_info()["lookups"] - before == len(conditions)
@@ -0,0 +1,48 @@
+import orjson
+import pandas as pd
+import pytest
+
+from services.query_service import execute_query
+from services.serialize_service import dumps
+
+
+@pytest.fixture
+def df():
+    # The dtypes upload gives int and true/false columns with gaps
+    return pd.DataFrame({
+        "level": pd.array([1, 2, None, 1, 2, 3], dtype="Int16"),
+        "active": pd.array([True, None, False, True, False, True], dtype="boolean"),
+        "salary": [10.0, 20.0, 30.0, 40.0, 50.0, 60.0]
+    })
+
+
+@pytest.mark.parametrize("groupby, expected", [
+    ("level", {"1": 25.0, "2": 35.0, "3": 60.0}),
+    ("active", {"true": 110 / 3, "false": 40.0})
+])
+def test_grouped_answer_with_nullable_keys_serializes(df, groupby, expected):
+    query = {"groupby": groupby, "aggregation": "mean", "column": "salary"}
+
+    answer = execute_query(df, query)
+
+    assert all(not hasattr(key, "dtype") for key in answer)
+    assert orjson.loads(dumps(answer)) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("groupby", ["level", "active"])
+def test_approximate_answer_with_nullable_keys_serializes(df, groupby):
+    query = {"groupby": groupby, "aggregation": "sum", "column": "salary"}
+
+    result = execute_query(df, query, approx_key=("nullable-keys", groupby))
+    decoded = orjson.loads(dumps(result))
+
+    assert set(decoded["answer"]) == set(decoded["error_bounds"])
+    assert sum(decoded["answer"].values()) == pytest.approx(df["salary"][df[groupby].notna()].sum())
+
+
+def test_several_group_keys_join_into_one_string(df):
+    query = {"groupby": ["level", "active"], "aggregation": "count"}
+
+    answer = orjson.loads(dumps(execute_query(df, query)))
+
+    assert answer == {"1, True": 2, "2, False": 1, "3, True": 1}
@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
+
+from services.transform_service import (
+    build_plan,
+    execute_plan,
+    optimize_plan,
+    transform_dataframe
+)
+
+
+@pytest.fixture
+def df():
+    rng = np.random.default_rng(0)
+    rows = 2000
+    return pd.DataFrame({
+        "id": rng.permutation(rows),
+        "city": rng.choice(["Oslo", "Lima", None], rows),
+        "score": np.where(rng.random(rows) < 0.1, np.nan, rng.integers(0, 50, rows)),
+        "level": rng.integers(0, 4, rows),
+        "note": rng.choice(["a", "b"], rows)
+    })
+
+
+def _filter(*conditions, logic="AND"):
+    return {
+        "type": "filter",
+        "logic": logic,
+        "conditions": [
+            {"column": c, "operator": op, "value": v} for c, op, v in conditions
+        ]
+    }
+
+
+CONFIGS = {
+    "filters past drop_nulls and remove_duplicates": {
+        "row_operations": [
+            {"type": "drop_nulls"},
+            {"type": "remove_duplicates"},
+            _filter(("score", ">", 20)),
+            _filter(("level", "==", 2))
+        ],
+        "column_operations": [{"type": "select", "columns": ["id", "score"]}]
+    },
+    "top_n as nlargest after a merged filter": {
+        "row_operations": [
+            _filter(("score", ">=", 10)),
+            _filter(("city", "==", "Oslo"), ("level", "<", 3), logic="OR"),
+            {"type": "top_n", "column": "id", "n": 25}
+        ],
+        "column_operations": [
+            {"type": "rename", "mapping": {"id": "key"}},
+            {"type": "reorder", "columns": ["key", "city", "score"]}
+        ]
+    },
+    "filter stays behind bottom_n": {
+        "row_operations": [
+            {"type": "bottom_n", "column": "id", "n": 300},
+            _filter(("level", ">", 1))
+        ],
+        "column_operations": [{"type": "select", "columns": ["id", "level"]}]
+    },
+    "projection stays behind remove_duplicates": {
+        "row_operations": [
+            _filter(("level", "<=", 1)),
+            {"type": "remove_duplicates"}
+        ],
+        "column_operations": [{"type": "select", "columns": ["note"]}]
+    },
+    "rename then select by the new name": {
+        "row_operations": [
+            _filter(("score", "<", 30)),
+            {"type": "row_range", "start": 5, "end": 400}
+        ],
+        "column_operations": [
+            {"type": "rename", "mapping": {"score": "points"}},
+            {"type": "fill_null", "column": "points", "method": "constant", "value": 0},
+            {"type": "select", "columns": ["points", "city"]}
+        ]
+    },
+    "drop and null threshold without projection": {
+        "row_operations": [_filter(("city", "==", "Lima"))],
+        "column_operations": [
+            {"type": "drop", "columns": ["note"]},
+            {"type": "drop_null_threshold", "threshold": 0.05}
+        ]
+    }
+}
+
+
+@pytest.mark.parametrize("config", CONFIGS.values(), ids=CONFIGS.keys())
+def test_optimized_plan_matches_eager_result(df, config):
+    eager = transform_dataframe(df, config)
+
+    assert_frame_equal(execute_plan(df, build_plan(config)), eager)
+    assert_frame_equal(execute_plan(df, optimize_plan(build_plan(config))), eager)
+    assert_frame_equal(transform_dataframe(df, {**config, "lazy": True}), eager)
+
+
+def test_filters_move_ahead_and_merge():
+    plan = optimize_plan(build_plan(CONFIGS["filters past drop_nulls and remove_duplicates"]))
+
+    assert [node["type"] for node in plan] == ["filter", "drop_nulls", "remove_duplicates", "select"]
+    assert len(plan[0]["groups"]) == 2
+
+
+def test_projection_pushed_to_the_front():
+    plan = optimize_plan(build_plan(CONFIGS["rename then select by the new name"]))
+
+    assert plan[0] == {"type": "project", "columns": ["city", "points", "score"]}
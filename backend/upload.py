@@ -1,27 +1,72 @@
-from fastapi import FastAPI, UploadFile, File
+from fastapi import FastAPI, UploadFile, File, Header, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 import pandas as pd
-import json
+
+from services.dataset_registry import create_dataset
+from services.dtype_service import optimize_dtypes
+from services.export_service import stream_export
+from services.file_service import read_csv_stream
+from services.serialize_service import FastJSONResponse, frame_records
+from services.transport_service import (
+    ARROW_STREAM,
+    COLUMNAR_JSON,
+    RECORDS_JSON,
+    frame_columns,
+    negotiate
+)
 
 app = FastAPI()
 
+pd.set_option("mode.copy_on_write", True)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:3000"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Dataset-Id"],
 )
 
+# The uploaded CSV is stored like a main API upload (so plotgen.py and
+# the main API can use its dataset_id) and sent back whole, encoded per
+# the Accept header: row records (default), columnar JSON or an Arrow
+# stream read back from the stored file.
+
+UPLOAD_FORMATS = [RECORDS_JSON, COLUMNAR_JSON, ARROW_STREAM]
+
 @app.post("/upload")
-async def upload_csv(file: UploadFile = File(...)):
-    df = pd.read_csv(file.file)
+def upload_csv(file: UploadFile = File(...), accept: str | None = Header(None)):
+    media_type = negotiate(accept, UPLOAD_FORMATS)
+    if media_type is None:
+        raise HTTPException(
+            status_code=406,
+            detail=f"Acceptable formats: {', '.join(UPLOAD_FORMATS)}"
+        )
 
-    return {
-        "columns": df.columns.tolist(),
-        "data": json.loads(df.to_json(orient="records"))
-    }
+    try:
+        df, _ = read_csv_stream(file.file)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid CSV file")
 
+    df, _ = optimize_dtypes(df)
+    dataset_id = create_dataset(df)
 
+    if media_type == ARROW_STREAM:
+        return StreamingResponse(
+            stream_export(dataset_id, "arrow"),
+            media_type=ARROW_STREAM,
+            headers={"X-Dataset-Id": dataset_id}
+        )
 
+    data = frame_columns(df) if media_type == COLUMNAR_JSON else frame_records(df)
 
+    return FastJSONResponse(
+        {
+            "dataset_id": dataset_id,
+            "columns": df.columns.tolist(),
+            "data": data
+        },
+        media_type=media_type
+    )
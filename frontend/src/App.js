@@ -13,7 +13,7 @@ const chartExamples = {
 function App() {
   const [file, setFile] = useState(null);
   const [columns, setColumns] = useState([]);
-  const [dataset, setDataset] = useState([]);
+  const [datasetId, setDatasetId] = useState(null);
   const [chartType, setChartType] = useState("line");
   const [xColumn, setXColumn] = useState("");
   const [yColumn, setYColumn] = useState("");
@@ -24,8 +24,8 @@ function App() {
   const fileInputRef = useRef(null);
 
   const canGenerate = useMemo(
-    () => dataset.length > 0 && xColumn && yColumn && chartType,
-    [dataset, xColumn, yColumn, chartType]
+    () => datasetId && xColumn && yColumn && chartType,
+    [datasetId, xColumn, yColumn, chartType]
   );
 
   useEffect(() => {
@@ -54,7 +54,7 @@ function App() {
       const data = await res.json();
 
       setColumns(data.columns || []);
-      setDataset(data.data || []);
+      setDatasetId(data.dataset_id || null);
       setXColumn(data.columns?.[0] || "");
       setYColumn(data.columns?.[1] || data.columns?.[0] || "");
       setStatus(`Loaded ${selectedFile.name}`);
@@ -95,10 +95,12 @@ function App() {
           "Content-Type": "application/json",
         },
         body: JSON.stringify({
-          data: dataset,
-          chart_type: chartType,
-          x_column: xColumn,
-          y_column: yColumn,
+          dataset_id: datasetId,
+          config: {
+            chart_type: chartType,
+            x: xColumn,
+            y: yColumn,
+          },
         }),
       });
       if (!res.ok) {